@@ -0,0 +1,233 @@
+# Admission control in front of the RPC functions: a fixed number of calls run at once, waiting calls are
+# served by priority lane (exam traffic before registrations before browsing), each session is held to a
+# token-bucket rate, and calls that cannot be served soon are refused at once with a retry-after hint
+import asyncio
+import threading
+import time
+import xmlrpc.client
+from collections import OrderedDict, deque
+from functools import wraps
+
+# Priority lanes, most urgent first
+LANE_EXAM = 0          # A student mid-exam: questions, answers, the timer
+LANE_REGISTRATION = 1
+LANE_BROWSE = 2        # Sessions and the schedule
+LANES = (LANE_EXAM, LANE_REGISTRATION, LANE_BROWSE)
+
+# Fault codes clients can tell apart from application errors; both mean "try again after retry_after"
+RATE_LIMITED = 429
+OVERLOADED = 503
+
+
+class Rejected(xmlrpc.client.Fault):
+    """Raised inside an RPC so the dispatcher sends it as a Fault whose string carries the retry hint."""
+
+    def __init__(self, code, reason, retry_after):
+        self.retry_after = round(retry_after, 3)
+        super().__init__(code, f"{reason}; retry_after={self.retry_after}")
+
+
+def retry_after(fault):
+    """Seconds a client should wait before retrying a rejected call, or None if fault was not a rejection."""
+    if fault.faultCode not in (RATE_LIMITED, OVERLOADED):
+        return None
+    _, _, value = fault.faultString.rpartition("retry_after=")
+    try:
+        return float(value)
+    except ValueError:
+        return 1.0
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+
+
+class RateLimiter:
+    """Token bucket per key: `rate` calls per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys  # Least recently used buckets beyond this are dropped (they were full anyway)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Returns 0 if a call by key may proceed, else the seconds until it may."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.burst, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ("cond", "granted")
+
+    def __init__(self, mutex):
+        self.cond = threading.Condition(mutex)
+        self.granted = False
+
+    def wake(self):
+        self.granted = True
+        self.cond.notify()
+
+
+class _AsyncWaiter:
+    """A call waiting on an event loop rather than in a thread."""
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+    def wake(self):
+        self.granted = True
+        self.loop.call_soon_threadsafe(self._resolve)  # release() runs on worker threads
+
+    def _resolve(self):
+        if not self.future.done():  # Cancelled if the wait timed out just before the slot arrived
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    def __init__(self, max_workers=32, queue_limits=(256, 256, 128), queue_timeout=2.0,
+                 session_rate=5.0, session_burst=20, alpha=0.2):
+        self.max_workers = max_workers        # Calls running at once, whatever the number of server threads
+        self.queue_limits = queue_limits      # Calls allowed to wait, per lane; more are refused immediately
+        self.queue_timeout = queue_timeout    # Seconds a call may wait for a worker before it is refused
+        self.alpha = alpha                    # Weight of the newest sample in the service time EWMA
+        self.limiter = RateLimiter(session_rate, session_burst) if session_rate else None
+        self._mutex = threading.Lock()
+        self._queues = tuple(deque() for _ in LANES)
+        self._active = 0
+        self._service_time = 0.01             # EWMA of seconds per call, for retry-after estimates
+
+        # Metrics
+        self.admitted = [0] * len(LANES)
+        self.queued = [0] * len(LANES)        # Admitted after waiting
+        self.shed = [0] * len(LANES)          # Refused: lane queue full or waited past queue_timeout
+        self.rate_limited = 0
+
+    def acquire(self, lane, session_code=None):
+        """Blocks until the call may run; raises Rejected when it is rate limited or the server is overloaded."""
+        self._check_rate(session_code)
+        with self._mutex:
+            queue = self._admit_or_queue(lane)
+            if queue is None:
+                return
+            waiter = _Waiter(self._mutex)
+            queue.append(waiter)
+            deadline = time.monotonic() + self.queue_timeout
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    queue.remove(waiter)
+                    self.shed[lane] += 1
+                    raise Rejected(OVERLOADED, "Server busy", self._estimate_wait(lane))
+                waiter.cond.wait(remaining)
+            self.admitted[lane] += 1
+            self.queued[lane] += 1
+
+    async def acquire_async(self, lane, session_code=None):
+        """acquire() for the event loop: the call waits for its slot without holding a thread."""
+        self._check_rate(session_code)
+        with self._mutex:
+            queue = self._admit_or_queue(lane)
+            if queue is None:
+                return
+            waiter = _AsyncWaiter(asyncio.get_running_loop())
+            queue.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # The connection went away: give back a slot that was already handed over, or leave the queue
+            with self._mutex:
+                if not waiter.granted:
+                    queue.remove(waiter)
+            if waiter.granted:
+                self.release(0.0)
+            raise
+        with self._mutex:
+            if not waiter.granted:
+                queue.remove(waiter)
+                self.shed[lane] += 1
+                raise Rejected(OVERLOADED, "Server busy", self._estimate_wait(lane))
+            self.admitted[lane] += 1
+            self.queued[lane] += 1
+
+    def release(self, elapsed):
+        """Frees the caller's worker slot and hands it to the oldest waiter of the most urgent lane."""
+        with self._mutex:
+            self._service_time += self.alpha * (elapsed - self._service_time)
+            for queue in self._queues:
+                if queue:
+                    queue.popleft().wake()  # The slot passes straight to the waiter; _active is unchanged
+                    return
+            self._active -= 1
+
+    def wrap(self, function, lane, keyed=True):
+        """Wraps an RPC function; keyed functions take session_code as their first parameter."""
+        @wraps(function)
+        def wrapper(*args):
+            self.acquire(lane, args[0] if keyed and args else None)
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self.release(time.perf_counter() - start)
+        return wrapper
+
+    def stats(self):
+        with self._mutex:
+            stats = {"active": self._active, "max_workers": self.max_workers, "rate_limited": self.rate_limited,
+                     "service_time": round(self._service_time, 6)}
+            for lane, name in zip(LANES, ("exam", "registration", "browse")):
+                stats[f"{name}_waiting"] = len(self._queues[lane])
+                stats[f"{name}_admitted"] = self.admitted[lane]
+                stats[f"{name}_queued"] = self.queued[lane]
+                stats[f"{name}_shed"] = self.shed[lane]
+            return stats
+
+    def _check_rate(self, session_code):
+        if self.limiter and session_code is not None:
+            wait = self.limiter.take(session_code)
+            if wait:
+                with self._mutex:
+                    self.rate_limited += 1
+                raise Rejected(RATE_LIMITED, "Too many requests from this session", wait)
+
+    def _admit_or_queue(self, lane):
+        """Takes a slot and returns None, or returns the lane queue to wait in; called with the mutex held."""
+        # Run now only if nothing of equal or higher priority is already waiting
+        if self._active < self.max_workers and not any(self._queues[i] for i in range(lane + 1)):
+            self._active += 1
+            self.admitted[lane] += 1
+            return None
+        queue = self._queues[lane]
+        if len(queue) >= self.queue_limits[lane]:
+            self.shed[lane] += 1
+            raise Rejected(OVERLOADED, "Server busy", self._estimate_wait(lane))
+        return queue
+
+    def _estimate_wait(self, lane):
+        # Calls ahead of this lane, drained max_workers at a time
+        ahead = sum(len(self._queues[i]) for i in range(lane + 1))
+        return max(0.05, min(30.0, (ahead + 1) * self._service_time / self.max_workers))
@@ -0,0 +1,202 @@
+# Write-behind answer log: answers are appended to an in-memory ring and a local append-only file
+# (fsynced in batches), then flushed to MySQL in bulk by a background thread. Records that were
+# durable in the file but not yet in MySQL are replayed when the server restarts.
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# REPLACE keeps replays idempotent: re-applying a record overwrites the same (Exam, Student, Question_id) row
+UPSERT_ANSWERS_SQL = "REPLACE INTO exam_answers (Exam, Student, Question_id, Answer) VALUES (%s, %s, %s, %s)"
+
+
+class AnswerLog:
+    def __init__(self, pool, path, ring_size=200000, fsync_interval=0.005, db_flush_interval=0.25,
+                 db_batch=5000, compact_bytes=64 * 1024 * 1024):
+        self.pool = pool                            # ConnectionPool used for the bulk flushes
+        self.path = path                            # Append-only log; `path.checkpoint` holds the flushed seq
+        self.checkpoint_path = path + ".checkpoint"
+        self.ring_size = ring_size                  # Records held in memory awaiting the database
+        self.fsync_interval = fsync_interval        # Seconds between group fsyncs
+        self.db_flush_interval = db_flush_interval  # Seconds between bulk flushes to the database
+        self.db_batch = db_batch                    # Rows per bulk INSERT
+        self.compact_bytes = compact_bytes          # Truncate the log past this size once fully flushed
+
+        self._ring = deque()
+        self._cond = threading.Condition()
+        self._last_seq = 0       # Last sequence number handed out
+        self._written_seq = 0    # Last sequence number written to the file buffer
+        self._durable_seq = 0    # Last sequence number fsynced to disk
+        self._flushed_seq = 0    # Last sequence number stored in the database
+        self._running = True
+
+        # Metrics
+        self.appended = 0
+        self.fsyncs = 0
+        self.db_flushes = 0
+        self.replayed = 0
+
+        self._recover()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._fsync_thread = threading.Thread(target=self._fsync_loop, name="answer-log-fsync", daemon=True)
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="answer-log-flush", daemon=True)
+        self._fsync_thread.start()
+        self._flush_thread.start()
+
+    def append(self, exam_id, student, answers, wait=True):
+        """Logs {question_id: answer} for a student; with wait=True returns once the records are on disk."""
+        with self._cond:
+            while len(self._ring) + len(answers) > self.ring_size and self._running:
+                self._cond.wait()  # Backpressure while the database is behind
+            if not self._running:
+                raise RuntimeError("Answer log is closed")
+            lines = []
+            for question_id, answer in answers.items():
+                self._last_seq += 1
+                record = (self._last_seq, exam_id, student, int(question_id), str(answer))
+                self._ring.append(record)
+                lines.append(json.dumps(record, separators=(",", ":")))
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+            self._written_seq = self._last_seq
+            self.appended += len(lines)
+            seq = self._last_seq
+            self._cond.notify_all()
+            if wait:
+                while self._durable_seq < seq and self._running:
+                    self._cond.wait()
+        return seq
+
+    def stats(self):
+        with self._cond:
+            return {
+                "appended": self.appended,
+                "pending_db": len(self._ring),
+                "fsyncs": self.fsyncs,
+                "db_flushes": self.db_flushes,
+                "replayed": self.replayed,
+                "durable_seq": self._durable_seq,
+                "flushed_seq": self._flushed_seq,
+            }
+
+    def close(self):
+        """Fsyncs and flushes everything outstanding, then stops the background threads."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._fsync_thread.join()
+        self._flush_thread.join()
+        self._file.close()
+
+    def _fsync_loop(self):
+        while True:
+            with self._cond:
+                # Appends arriving while the previous fsync runs are covered together by the next one
+                while self._running and self._written_seq == self._durable_seq:
+                    self._cond.wait(self.fsync_interval)
+                target = self._written_seq
+                self._file.flush()
+                running = self._running
+            if target > self._durable_seq:
+                os.fsync(self._file.fileno())  # Outside the lock so appends keep filling the next batch
+                with self._cond:
+                    self._durable_seq = target
+                    self.fsyncs += 1
+                    self._cond.notify_all()
+            if not running:
+                return
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: not self._running or self._flushable(), self.db_flush_interval)
+                running = self._running
+            flushed = True
+            while flushed:
+                flushed = self._flush_once()
+            if not running:
+                with self._cond:
+                    done = self._durable_seq == self._written_seq and not self._flushable()
+                # Records left behind by a failing database are durable and will be replayed on restart
+                if done or flushed is None:
+                    return
+
+    def _flushable(self):
+        return bool(self._ring) and self._ring[0][0] <= self._durable_seq
+
+    def _flush_once(self):
+        """Writes up to db_batch durable records to the database.
+
+        Returns True if anything was flushed, False if nothing was ready and None if the database failed.
+        """
+        with self._cond:
+            batch = []
+            for record in self._ring:
+                if record[0] > self._durable_seq or len(batch) >= self.db_batch:
+                    break
+                batch.append(record)
+        if not batch:
+            return False
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.executemany(UPSERT_ANSWERS_SQL, [record[1:] for record in batch])
+                connection.commit()
+                cursor.close()
+        except Exception as error:
+            log.warning("Answer log flush failed, will retry", extra={"error": error})
+            time.sleep(self.db_flush_interval)
+            return None
+
+        with self._cond:
+            for _ in batch:
+                self._ring.popleft()
+            self._flushed_seq = batch[-1][0]
+            self.db_flushes += 1
+            self._cond.notify_all()
+        self._write_checkpoint()
+        return True
+
+    def _write_checkpoint(self):
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, "w") as checkpoint:
+            checkpoint.write(str(self._flushed_seq))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temporary, self.checkpoint_path)
+
+        # Everything is in the database: the log can start over
+        with self._cond:
+            if (not self._ring and self._flushed_seq == self._last_seq
+                    and self._file.tell() > self.compact_bytes):
+                self._file.truncate(0)
+                self._file.seek(0)
+
+    def _recover(self):
+        """Reloads records that reached the log file but not the database before the last shutdown."""
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as checkpoint:
+                self._flushed_seq = int(checkpoint.read().strip() or 0)
+        last_seq = self._flushed_seq
+        if os.path.exists(self.path):
+            with open(self.path, "rb+") as handle:
+                good_bytes = 0
+                for line in handle:
+                    try:
+                        record = tuple(json.loads(line))
+                    except ValueError:
+                        break
+                    good_bytes += len(line)
+                    last_seq = max(last_seq, record[0])
+                    if record[0] > self._flushed_seq:
+                        self._ring.append(record)
+                # Drop a torn final write from a crash so new appends start on a clean line
+                handle.truncate(good_bytes)
+        self._last_seq = self._written_seq = self._durable_seq = last_seq
+        self.replayed = len(self._ring)
+        if self.replayed:
+            log.info("Replaying answers", extra={"count": self.replayed, "path": self.path})
@@ -0,0 +1,202 @@
+# Asyncio XML-RPC server: one event loop multiplexes every client connection and the blocking
+# RPC handlers run on a bounded thread pool, instead of one OS thread per request
+import asyncio
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from xmlrpc.server import SimpleXMLRPCDispatcher
+
+from admission import Rejected
+from transport import COMPACT_PATH, codec_for, compact_reply, dispatch_compact
+
+RPC_PATHS = ("/", "/RPC2", COMPACT_PATH)
+MAX_HEADER_LINES = 100
+
+
+class AsyncXMLRPCServer:
+    def __init__(self, addr, max_workers=32, max_pending=1024, max_connections=10000,
+                 max_body=1024 * 1024, keepalive_timeout=15, allow_none=True, admission=None):
+        self.addr = addr
+        self.max_pending = max_pending          # Requests queued or running before new ones get a 503
+        self.max_connections = max_connections  # Open client connections before new ones are refused
+        self.max_body = max_body                # Largest request body accepted, in bytes
+        self.keepalive_timeout = keepalive_timeout
+        self.dispatcher = SimpleXMLRPCDispatcher(allow_none=allow_none, encoding=None)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rpc-worker")
+        # Calls under admission control wait for their slot on the event loop, by priority lane, and then run
+        # on workers of their own, one per slot: queued in the shared executor they would wait first in its
+        # FIFO order, behind long-polls and browsing, whatever their lane
+        self.admission = admission
+        self.admitted_executor = ThreadPoolExecutor(max_workers=admission.max_workers,
+                                                    thread_name_prefix="rpc-admitted") if admission else None
+        self._lanes = {}  # RPC name -> (lane, keyed) for functions under admission control
+        self.pending = 0
+        self.connections = 0
+        self.rejected = 0
+        self._server = None
+
+    def register_function(self, function, name=None, lane=None, keyed=True):
+        """Registers an RPC; with a lane it is admitted by the server's AdmissionController before it runs.
+
+        Keyed functions take session_code as their first parameter, which admission rate limits on.
+        """
+        self.dispatcher.register_function(function, name)
+        if lane is not None and self.admission:
+            self._lanes[name or function.__name__] = (lane, keyed)
+
+    def register_introspection_functions(self):
+        self.dispatcher.register_introspection_functions()
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if self.admitted_executor:
+                self.admitted_executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.close()
+
+    async def _serve(self):
+        host, port = self.addr
+        self._server = await asyncio.start_server(self._handle_connection, host, port, backlog=1024)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        if self.connections >= self.max_connections:
+            self.rejected += 1
+            await self._respond(writer, 503, b"Too many connections", keep_alive=False,
+                                extra_headers={"Retry-After": "1"})
+            writer.close()
+            return
+        self.connections += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keepalive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                keep_alive = await self._handle_request(writer, *request)
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Parses one HTTP request; returns (method, path, version, headers, body) or None on EOF."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, version = request_line.decode("latin-1").split(None, 2)
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body:
+            raise ConnectionError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, version.strip(), headers, body
+
+    async def _handle_request(self, writer, method, path, version, headers, body):
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if method != "POST":
+            await self._respond(writer, 501, b"Unsupported method", keep_alive)
+            return keep_alive
+        if path not in RPC_PATHS:
+            await self._respond(writer, 404, b"No such page", keep_alive)
+            return keep_alive
+
+        # Backpressure: shed load with a retry hint instead of queueing without bound
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            await self._respond(writer, 503, b"Server busy", keep_alive, extra_headers={"Retry-After": "1"})
+            return keep_alive
+
+        self.pending += 1
+        try:
+            content_type, response = await self._call(path, headers, body)
+        finally:
+            self.pending -= 1
+        await self._respond(writer, 200, response, keep_alive, content_type=content_type)
+        return keep_alive
+
+    async def _call(self, path, headers, body):
+        """Runs one RPC and returns (content_type, response body)."""
+        loop = asyncio.get_running_loop()
+        request = self._decode(path, headers, body) if self._lanes else None
+        if request is None or request[1] not in self._lanes:
+            if path == COMPACT_PATH:
+                call = partial(dispatch_compact, self.dispatcher._dispatch, headers.get("content-type", ""), body)
+            else:
+                call = partial(self._dispatch_xml, body)
+            return await loop.run_in_executor(self.executor, call)
+
+        encode, method, params = request
+        lane, keyed = self._lanes[method]
+        try:
+            await self.admission.acquire_async(lane, params[0] if keyed and params else None)
+        except Rejected as fault:
+            return encode(error=fault)
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self.admitted_executor, self._invoke, encode, method, params)
+        finally:
+            self.admission.release(time.perf_counter() - start)
+
+    def _decode(self, path, headers, body):
+        """Returns (encode, method, params), or None if the body does not parse (the dispatcher reports why)."""
+        try:
+            if path == COMPACT_PATH:
+                codec = codec_for(headers.get("content-type", ""))
+                request = codec.loads(body)
+                return partial(compact_reply, codec), request["method"], tuple(request.get("params", ()))
+            params, method = xmlrpc.client.loads(body, use_builtin_types=self.dispatcher.use_builtin_types)
+            return self._encode_xml, method, params
+        except Exception:
+            return None
+
+    def _invoke(self, encode, method, params):
+        try:
+            result = self.dispatcher._dispatch(method, params)
+        except Exception as error:
+            return encode(error=error)
+        return encode(result)
+
+    def _encode_xml(self, result=None, error=None):
+        # As SimpleXMLRPCDispatcher._marshaled_dispatch encodes its responses
+        if error is None:
+            payload = (result,)
+        elif isinstance(error, xmlrpc.client.Fault):
+            payload = error
+        else:
+            payload = xmlrpc.client.Fault(1, f"{type(error)}:{error}")
+        response = xmlrpc.client.dumps(payload, methodresponse=error is None, allow_none=self.dispatcher.allow_none,
+                                       encoding=self.dispatcher.encoding)
+        return "text/xml", response.encode(self.dispatcher.encoding, "xmlcharrefreplace")
+
+    def _dispatch_xml(self, body):
+        return "text/xml", self.dispatcher._marshaled_dispatch(body)
+
+    @staticmethod
+    async def _respond(writer, status, body, keep_alive, content_type="text/plain", extra_headers=None):
+        reasons = {200: "OK", 404: "Not Found", 501: "Not Implemented", 503: "Service Unavailable"}
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        headers.update(extra_headers or {})
+        head = f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
@@ -0,0 +1,135 @@
+# Overload benchmark for admission control. Calls arrive open-loop at a multiple of what the database can
+# serve, one thread each as ThreadingMixIn spawns them, and run against a model of the connection pool
+# (pool_size connections, fixed service time, acquire timeout). Without admission control every call
+# queues for a connection and latency grows until calls time out; with it, excess calls are refused at
+# once with a retry hint and the calls that are served keep a stable p99, exam traffic first.
+# Run from the repository root:  python -m benchmarks.bench_admission --loads 0.5 2 10
+import argparse
+import random
+import threading
+import time
+
+from admission import LANE_BROWSE, LANE_EXAM, LANE_REGISTRATION, AdmissionController, Rejected
+from benchmarks.bench_server_modes import percentile
+
+# Share of calls per lane: students mid-exam, registrations, schedule browsing
+MIX = ((LANE_EXAM, 0.15), (LANE_REGISTRATION, 0.25), (LANE_BROWSE, 0.60))
+
+
+class PoolModel:
+    """pool_size connections, each call holds one for `service` seconds; waiting longer than `timeout` fails."""
+
+    def __init__(self, pool_size, service, timeout):
+        self.connections = threading.BoundedSemaphore(pool_size)
+        self.service = service
+        self.timeout = timeout
+
+    def query(self):
+        if not self.connections.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for a database connection")
+        try:
+            time.sleep(self.service)
+        finally:
+            self.connections.release()
+
+
+def run(load, args, controller):
+    pool = PoolModel(args.pool_size, args.service, args.pool_timeout)
+    capacity = args.pool_size / args.service
+    rate = load * capacity
+    rng = random.Random(args.seed)
+    lanes = [lane for lane, _ in MIX]
+    weights = [share for _, share in MIX]
+    served = {lane: [] for lane in lanes}
+    outcomes = {"served": 0, "shed": 0, "rate_limited": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def call(lane, session_code):
+        start = time.perf_counter()
+        try:
+            if controller:
+                controller.acquire(lane, session_code)
+                began = time.perf_counter()
+                try:
+                    pool.query()
+                finally:
+                    controller.release(time.perf_counter() - began)
+            else:
+                pool.query()
+        except Rejected as rejected:
+            with lock:
+                outcomes["rate_limited" if rejected.faultCode == 429 else "shed"] += 1
+            return
+        except TimeoutError:
+            with lock:
+                outcomes["errors"] += 1
+            return
+        with lock:
+            served[lane].append(time.perf_counter() - start)
+            outcomes["served"] += 1
+
+    threads = []
+    start = time.perf_counter()
+    next_arrival = start
+    end = start + args.duration
+    while next_arrival < end:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        lane = rng.choices(lanes, weights)[0]
+        session_code = "hot-session" if rng.random() < args.hot_share else f"student-{rng.randrange(args.students)}"
+        thread = threading.Thread(target=call, args=(lane, session_code), daemon=True)
+        thread.start()
+        threads.append(thread)
+        next_arrival += rng.expovariate(rate)
+    peak_threads = threading.active_count()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    everything = sorted(latency for latencies in served.values() for latency in latencies)
+    return {
+        "offered": len(threads) / args.duration,
+        "served": outcomes["served"] / elapsed,
+        "refused": (outcomes["shed"] + outcomes["rate_limited"]) / len(threads),
+        "rate_limited": outcomes["rate_limited"],
+        "errors": outcomes["errors"] / len(threads),
+        "p50": percentile(everything, 50),
+        "p99": percentile(everything, 99),
+        "exam_p99": percentile(served[LANE_EXAM], 99),
+        "browse_p99": percentile(served[LANE_BROWSE], 99),
+        "threads": peak_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail latency under overload with and without admission control")
+    parser.add_argument("--loads", type=float, nargs="+", default=[0.5, 2, 10], help="Offered load / capacity")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of arrivals per run")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--service", type=float, default=0.04, help="Seconds a call holds a connection")
+    parser.add_argument("--pool-timeout", type=float, default=5.0, help="Connection acquire timeout, seconds")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--hot-share", type=float, default=0.02, help="Share of calls from one runaway session")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    capacity = args.pool_size / args.service
+    print(f"database capacity {capacity:.0f} calls/s ({args.pool_size} connections x {args.service * 1000:.0f}ms), "
+          f"{args.duration:.0f}s of arrivals per run, {args.hot_share:.0%} of calls from one session")
+    print(f"  {'load':>5} {'policy':<10} {'offered/s':>10} {'served/s':>9} {'refused':>8} {'errors':>7} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'exam p99':>9} {'browse p99':>11} {'threads':>8}")
+    for load in args.loads:
+        for label in ("unbounded", "admission"):
+            controller = None
+            if label == "admission":
+                controller = AdmissionController(max_workers=args.pool_size, queue_limits=(64, 32, 16),
+                                                 queue_timeout=0.5, session_rate=10.0, session_burst=30)
+            result = run(load, args, controller)
+            print(f"  {load:>4}x {label:<10} {result['offered']:>10.0f} {result['served']:>9.0f} "
+                  f"{result['refused']:>8.1%} {result['errors']:>7.1%} {result['p50'] * 1000:>8.1f} "
+                  f"{result['p99'] * 1000:>8.1f} {result['exam_p99'] * 1000:>9.1f} "
+                  f"{result['browse_p99'] * 1000:>11.1f} {result['threads']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Sustained answer ingestion through the write-behind log with thousands of simultaneous test-takers,
+# followed by a crash/replay check. Each answer is acknowledged only once it is fsynced locally.
+# Run from the repository root:  python -m benchmarks.bench_answer_log --students 5000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from answer_log import AnswerLog
+from db_pool import ConnectionPool
+from exam_delivery import RESULT_TABLES_SQL
+from benchmarks import standin
+
+
+def answers_in_database(path):
+    connection = sqlite3.connect(path)
+    count = connection.execute("SELECT COUNT(*) FROM exam_answers").fetchone()[0]
+    connection.close()
+    return count
+
+
+def prepare(path):
+    connection = sqlite3.connect(path)
+    for statement in RESULT_TABLES_SQL:
+        connection.execute(statement)
+    connection.commit()
+    connection.close()
+
+
+def wait_for_rows(path, expected, timeout=120):
+    deadline = time.monotonic() + timeout
+    while answers_in_database(path) < expected:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"only {answers_in_database(path)} of {expected} answers reached the database")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write-behind answer log throughput and replay")
+    parser.add_argument("--students", type=int, default=5000, help="Simultaneous test-takers")
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=256, help="Server threads handling answer RPCs")
+    parser.add_argument("--rtt", type=float, default=0.001, help="Simulated DB round trip in seconds")
+    args = parser.parse_args()
+
+    db_path = standin.create_database()
+    prepare(db_path)
+    log_dir = tempfile.mkdtemp(prefix="answer-log-")
+    log_path = os.path.join(log_dir, "answers.log")
+    pool = ConnectionPool(standin.connection_factory(db_path, args.rtt), pool_size=4)
+
+    # Sustained ingestion: every student streams one answer per call, question by question
+    log = AnswerLog(pool, log_path)
+    total = args.students * args.questions
+
+    def answer(i):
+        student, question = divmod(i, args.questions)
+        log.append("dsgt", f"student-{student}", {question + 1: str(question * 2)})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        # Interleave students so all of them are mid-exam at the same time
+        order = (student * args.questions + question for question in range(args.questions)
+                 for student in range(args.students))
+        list(executor.map(answer, order, chunksize=64))
+    durable = time.perf_counter() - start
+    wait_for_rows(db_path, total)
+    in_database = time.perf_counter() - start
+    stats = log.stats()
+    log.close()
+    print(f"{total} answers from {args.students} students: {total / durable:,.0f} answers/s durable, "
+          f"all in database after {in_database:.2f}s")
+    print(f"fsyncs: {stats['fsyncs']} ({total / max(stats['fsyncs'], 1):.0f} answers each), "
+          f"bulk database flushes: {stats['db_flushes']}")
+
+    # Crash/replay: answers logged while the database is unreachable must arrive after a restart
+    def unreachable():
+        raise ConnectionError("database down")
+
+    down = ConnectionPool(unreachable, pool_size=1)
+    log = AnswerLog(down, log_path, db_flush_interval=0.05)
+    for student in range(100):
+        log.append("replay", f"student-{student}", {1: "a", 2: "b"})
+    log.close()  # Flushing fails; the records stay in the log file
+
+    log = AnswerLog(pool, log_path)
+    replayed = log.stats()["replayed"]
+    wait_for_rows(db_path, total + 200)
+    log.close()
+    print(f"replay after restart: {replayed} answers recovered from the log and stored")
+
+    pool.close()
+    os.remove(db_path)
+    for name in os.listdir(log_dir):
+        os.remove(os.path.join(log_dir, name))
+    os.rmdir(log_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Concurrent readers and writers against the exam store backends: students submitting responses while
+# others list the available exams and admins pull cohort responses for reports.
+# Run from the repository root:  python -m benchmarks.bench_exam_store --readers 16 --writers 4
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from exam_store import MemoryStore, SQLiteStore
+
+
+def make_questions(count):
+    return [{"question": f"Question {i}", "options": ["a", "b", "c", "d"], "correct_answer": "a"} for i in range(count)]
+
+
+def seed(store, exams, questions):
+    for exam in range(exams):
+        store.add_exam(f"EXAM{exam}", make_questions(questions), 60)
+
+
+def writer(store, writer_id, deadline, exams, questions, counts):
+    done = 0
+    while time.monotonic() < deadline:
+        responses = {i: random.choice("abcd") for i in range(questions)}
+        store.add_response(f"w{writer_id}-{done}", f"EXAM{done % exams}", responses, bytes(2 * questions))
+        done += 1
+    counts.append(done)
+
+
+def reader(store, deadline, exams, latencies):
+    local = []
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        store.get_exams(active_only=True)
+        store.get_responses(f"EXAM{random.randrange(exams)}")
+        local.append(time.perf_counter() - start)
+    latencies.extend(local)
+
+
+def run_threads(store, args):
+    deadline = time.monotonic() + args.seconds
+    writes, latencies = [], []
+    threads = [threading.Thread(target=writer, args=(store, i, deadline, args.exams, args.questions, writes))
+               for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(store, deadline, args.exams, latencies))
+                for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(writes), latencies
+
+
+def process_main(path, role, worker_id, seconds, exams, questions, results):
+    store = SQLiteStore(path)
+    deadline = time.monotonic() + seconds
+    if role == "writer":
+        writes = []
+        writer(store, worker_id, deadline, exams, questions, writes)
+        results.put(("writer", writes[0], []))
+    else:
+        latencies = []
+        reader(store, deadline, exams, latencies)
+        results.put(("reader", 0, latencies))
+    store.close()
+
+
+def run_processes(path, args):
+    # Separate processes share nothing but the database file, like several Streamlit servers would
+    results = multiprocessing.Queue()
+    roles = [("writer", i) for i in range(args.writers)] + [("reader", i) for i in range(args.readers)]
+    processes = [multiprocessing.Process(target=process_main,
+                                         args=(path, role, i, args.seconds, args.exams, args.questions, results))
+                 for role, i in roles]
+    for process in processes:
+        process.start()
+    writes, latencies = 0, []
+    for _ in processes:
+        _, count, local = results.get()
+        writes += count
+        latencies.extend(local)
+    for process in processes:
+        process.join()
+    return writes, latencies
+
+
+def report(label, writes, latencies, seconds):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+    median = statistics.median(latencies) if latencies else 0
+    print(f"{label:<26} writes/s {writes / seconds:9,.0f}   reads/s {len(latencies) / seconds:9,.0f}   "
+          f"read p50 {median * 1e3:6.2f}ms  p99 {p99 * 1e3:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent reader/writer throughput of the exam store backends")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=50)
+    args = parser.parse_args()
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s each")
+
+    memory = MemoryStore()
+    seed(memory, args.exams, args.questions)
+    report("memory (threads)", *run_threads(memory, args), args.seconds)
+
+    directory = tempfile.mkdtemp(prefix="exam-store-")
+    path = os.path.join(directory, "exam_system.db")
+    store = SQLiteStore(path)
+    seed(store, args.exams, args.questions)
+    report("sqlite WAL (threads)", *run_threads(store, args), args.seconds)
+    store.close()
+    report("sqlite WAL (processes)", *run_processes(path, args), args.seconds)
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
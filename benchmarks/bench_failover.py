@@ -0,0 +1,76 @@
+# Leader failover benchmark: starts an N-node cluster on localhost, repeatedly kills the leader
+# and measures how long the survivors take to agree on a new one, then restarts the killed node.
+# Run from the repository root:  python -m benchmarks.bench_failover --nodes 3 --rounds 5
+import argparse
+import os
+import subprocess
+import sys
+import time
+import xmlrpc.client
+
+from benchmarks import standin
+from transport import TimeoutTransport
+
+
+def start_node(node_id, args, path):
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.run_server", "--db", path, "--node-id", str(node_id),
+         "--cluster-size", str(args.nodes), "--base-port", str(args.base_port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def leader_seen_by(node_id, base_port):
+    proxy = xmlrpc.client.ServerProxy(f"http://localhost:{base_port + node_id}/", transport=TimeoutTransport(0.5))
+    try:
+        return proxy.get_cluster()["leader"]
+    except (OSError, xmlrpc.client.Error):
+        return None
+
+
+def wait_for_agreement(node_ids, base_port, timeout=30):
+    """Polls until every listed node reports the same leader; returns (leader, seconds waited)."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        leaders = {leader_seen_by(i, base_port) for i in node_ids}
+        if len(leaders) == 1 and None not in leaders and leaders <= set(node_ids):
+            return leaders.pop(), time.perf_counter() - start
+        time.sleep(0.02)
+    raise RuntimeError(f"Nodes {node_ids} did not agree on a leader within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure leader failover time of a local cluster")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--base-port", type=int, default=5800)
+    args = parser.parse_args()
+
+    path = standin.create_database()
+    processes = {i: start_node(i, args, path) for i in range(args.nodes)}
+    try:
+        leader, _ = wait_for_agreement(list(processes), args.base_port)
+        print(f"initial leader: node {leader}")
+        timings = []
+        for round_number in range(1, args.rounds + 1):
+            processes[leader].kill()
+            processes[leader].wait()
+            survivors = [i for i in processes if i != leader]
+            new_leader, seconds = wait_for_agreement(survivors, args.base_port)
+            timings.append(seconds)
+            print(f"round {round_number}: killed node {leader}, node {new_leader} took over in {seconds:.3f}s")
+
+            # Bring the killed node back; being the highest id it bullies its way back to leadership
+            processes[leader] = start_node(leader, args, path)
+            leader, _ = wait_for_agreement(list(processes), args.base_port)
+        print(f"failover over {len(timings)} rounds: mean {sum(timings) / len(timings):.3f}s, max {max(timings):.3f}s")
+    finally:
+        for process in processes.values():
+            process.kill()
+            process.wait()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Grading benchmark: the old per-response Python loop from generate_report versus the vectorized engine.
+# Run from the repository root:  python -m benchmarks.bench_grading --submissions 100000
+import argparse
+import random
+import time
+
+import numpy as np
+
+from grading import AnswerKey, grade_cohort
+
+
+def make_exam(num_questions, num_options):
+    questions = []
+    for i in range(num_questions):
+        options = [f"Q{i} option {j}" for j in range(num_options)]
+        questions.append({"question": f"Question {i}", "options": options, "correct_answer": random.choice(options)})
+    return questions
+
+
+def make_submissions(questions, count):
+    submissions = {}
+    for student in range(count):
+        ability = random.random()
+        responses = {}
+        for i, question in enumerate(questions):
+            if random.random() < 0.03:
+                continue  # Left blank
+            responses[i] = question["correct_answer"] if random.random() < ability else random.choice(question["options"])
+        submissions[f"student-{student}"] = responses
+    return submissions
+
+
+def legacy_report(questions, responses_store, exam_id):
+    """The loop generate_report used before the grading engine."""
+    total_questions = len(questions)
+    report = {}
+    for (username, ex_id), responses in responses_store.items():
+        if ex_id == exam_id:
+            correct_answers = sum(1 for i, q in enumerate(questions) if responses.get(i) == q["correct_answer"])
+            report[username] = {"score": correct_answers / total_questions * 100,
+                                "correct_answers": correct_answers, "total_questions": total_questions}
+    return report
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a large cohort with the loop and the vectorized engine")
+    parser.add_argument("--submissions", type=int, default=100000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--options", type=int, default=4)
+    args = parser.parse_args()
+
+    random.seed(7)
+    questions = make_exam(args.questions, args.options)
+    submissions = make_submissions(questions, args.submissions)
+    store = {(username, "EXAM"): responses for username, responses in submissions.items()}
+
+    legacy, legacy_seconds = timed(legacy_report, questions, store, "EXAM")
+    (report, result), engine_seconds = timed(grade_cohort, questions, submissions)
+    assert all(report[u]["correct_answers"] == legacy[u]["correct_answers"] for u in legacy)
+
+    # different.py encodes each submission when it is stored, so reports grade pre-encoded rows
+    key = AnswerKey(questions)
+    start = time.perf_counter()
+    encoded = {username: key.encode_one(responses) for username, responses in submissions.items()}
+    encode_seconds = (time.perf_counter() - start) / len(encoded)
+    (encoded_report, result), encoded_seconds = timed(grade_cohort, questions, encoded)
+    assert encoded_report == report
+
+    print(f"{args.submissions} submissions x {args.questions} questions")
+    print(f"legacy loop (scores only):                    {legacy_seconds:8.3f}s")
+    print(f"grade_cohort on raw responses (+ stats):      {engine_seconds:8.3f}s  {legacy_seconds / engine_seconds:5.1f}x")
+    print(f"grade_cohort on stored encoded rows (+ stats):{encoded_seconds:8.3f}s  "
+          f"{legacy_seconds / encoded_seconds:5.1f}x")
+    print(f"encoding at submission time:                  {encode_seconds * 1e6:8.1f}us per submission")
+    hardest = int(np.argmin(result.difficulty))
+    print(f"hardest question: {hardest + 1} (difficulty {result.difficulty[hardest]:.3f}, "
+          f"discrimination {result.discrimination[hardest]:.3f})")
+
+
+if __name__ == "__main__":
+    main()
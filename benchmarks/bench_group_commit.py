@@ -0,0 +1,56 @@
+# Group commit benchmark: one commit per registration versus batched commits.
+# Run from the repository root:  python -m benchmarks.bench_group_commit
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import ConnectionPool
+from group_commit import GroupCommitter
+from registration import RegistrationEngine, REGISTERED
+from benchmarks import standin
+
+
+def run(register, workers, registrations, exams):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda i: register(f"EXAM-{i % exams + 1}"), range(registrations)))
+    elapsed = time.perf_counter() - start
+    return results.count(REGISTERED), registrations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registration throughput with and without group commit")
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--registrations", type=int, default=4000)
+    parser.add_argument("--capacity", type=int, default=150)
+    parser.add_argument("--rtt", type=float, default=0.001, help="Simulated DB round trip in seconds")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--window", type=float, default=0.005)
+    args = parser.parse_args()
+    expected = min(args.registrations, args.capacity * args.exams)
+
+    path = standin.create_database(exams=args.exams)
+    pool = ConnectionPool(standin.connection_factory(path, args.rtt), pool_size=args.workers)
+    engine = RegistrationEngine(pool, capacity=args.capacity)
+    ok, rate = run(lambda exam_id: engine.register("bench", exam_id), args.workers, args.registrations, args.exams)
+    pool.close()
+    os.remove(path)
+    print(f"per-request commit: {rate:8.0f} reg/s, {ok} registered, {ok} commits")
+    assert ok == expected
+
+    path = standin.create_database(exams=args.exams)
+    pool = ConnectionPool(standin.connection_factory(path, args.rtt), pool_size=4)
+    committer = GroupCommitter(pool, capacity=args.capacity, window=args.window)
+    ok, rate = run(committer.register, args.workers, args.registrations, args.exams)
+    committer.stop()
+    stats = committer.stats()
+    pool.close()
+    os.remove(path)
+    print(f"group commit:       {rate:8.0f} reg/s, {ok} registered, {stats['batches']} commits "
+          f"(largest batch {stats['largest_batch']})")
+    assert ok == expected
+
+
+if __name__ == "__main__":
+    main()
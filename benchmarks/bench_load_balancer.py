@@ -0,0 +1,123 @@
+# Discrete-event simulation of request routing under skewed load: a fifth of the nodes are slow and
+# request sizes are heavy-tailed. Compares the old load_balance (Node.load was never updated, so it
+# always chose node 0) with round robin, random, a full least-loaded scan and the LoadBalancer.
+# Run from the repository root:  python -m benchmarks.bench_load_balancer --nodes 3 10 50
+import argparse
+import heapq
+import itertools
+import random
+
+from load_balancer import LoadBalancer
+
+
+class SimNode:
+    def __init__(self, node_id, speed):
+        self.id = node_id
+        self.speed = speed  # Work units per simulated second
+        self.load = 0
+        self.latency_ewma = 0.0
+        self.busy_until = 0.0
+
+
+class Policy:
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.balancer = LoadBalancer(nodes, seed=1)  # Keeps load and latency on every node for all policies
+
+    def pick(self):
+        raise NotImplementedError
+
+
+class Legacy(Policy):
+    def pick(self):
+        # The old load_balance scanned Node.load, which nothing updated, so it always returned node 0
+        return self.nodes[0]
+
+
+class RoundRobin(Policy):
+    def __init__(self, nodes):
+        super().__init__(nodes)
+        self._next = itertools.cycle(nodes)
+
+    def pick(self):
+        return next(self._next)
+
+
+class Random(Policy):
+    def __init__(self, nodes):
+        super().__init__(nodes)
+        self._random = random.Random(2)
+
+    def pick(self):
+        return self._random.choice(self.nodes)
+
+
+class LeastLoadedScan(Policy):
+    def pick(self):
+        return min(self.nodes, key=lambda node: node.load)
+
+
+class PowerOfTwo(Policy):
+    def pick(self):
+        return self.balancer.pick()
+
+
+POLICIES = [("always node 0 (old)", Legacy), ("round robin", RoundRobin), ("random", Random),
+            ("least in-flight scan", LeastLoadedScan), ("power of two", PowerOfTwo)]
+
+
+def simulate(policy_class, node_count, requests, utilization, seed):
+    rng = random.Random(seed)
+    speeds = [0.33 if i % 5 == 4 else 1.0 for i in range(node_count)]  # Every fifth node is 3x slower
+    rng.shuffle(speeds)
+    nodes = [SimNode(i, speed) for i, speed in enumerate(speeds)]
+    policy = policy_class(nodes)
+    balancer = policy.balancer
+
+    mean_size = 1.0
+    rate = utilization * sum(speeds) / mean_size
+    sigma = 1.0  # Lognormal request sizes: most are small, a few are very large
+    mu = -sigma * sigma / 2
+
+    now = 0.0
+    completions = []  # Heap of (time, seq, node, response time)
+    seq = itertools.count()
+    responses = []
+    for _ in range(requests):
+        now += rng.expovariate(rate)
+        while completions and completions[0][0] <= now:
+            _, _, node, response = heapq.heappop(completions)
+            balancer.finish(node, response)
+        node = policy.pick()
+        balancer.start(node)
+        size = rng.lognormvariate(mu, sigma) * mean_size
+        node.busy_until = max(now, node.busy_until) + size / node.speed
+        response = node.busy_until - now
+        heapq.heappush(completions, (node.busy_until, next(seq), node, response))
+        responses.append(response)
+    responses.sort()
+    return responses
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail latency of routing policies under skewed load")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[3, 10, 50])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--utilization", type=float, default=0.7, help="Offered load as a share of total capacity")
+    args = parser.parse_args()
+
+    for node_count in args.nodes:
+        print(f"{node_count} nodes, {args.utilization:.0%} utilization, {args.requests} requests "
+              f"(times in mean service times)")
+        for label, policy_class in POLICIES:
+            responses = simulate(policy_class, node_count, args.requests, args.utilization, seed=node_count)
+            print(f"  {label:<22} p50 {percentile(responses, 0.5):9.2f}   p95 {percentile(responses, 0.95):9.2f}   "
+                  f"p99 {percentile(responses, 0.99):9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Lock contention benchmark: N threads repeatedly lock the same exam, hold it briefly and release it.
+# Compares the old busy-wait acquire_lock from different.py with the condition-variable LockManager.
+# Run from the repository root:  python -m benchmarks.bench_lock_manager --contenders 1 10 100
+import argparse
+import queue
+import threading
+import time
+
+from lock_manager import LockManager
+
+
+class LegacyLocks:
+    """acquire_lock/release_lock as DistributedExamSystem implemented them before the lock manager."""
+
+    def __init__(self):
+        self.message_queue = queue.Queue()
+        self.queue_lock = threading.Lock()
+
+    def acquire(self, resource_id, owner):
+        with self.queue_lock:
+            while resource_id in [msg[1] for msg in self.message_queue.queue]:
+                time.sleep(0.1)
+            self.message_queue.put((owner, resource_id))
+
+    def release(self, resource_id, owner):
+        with self.queue_lock:
+            try:
+                self.message_queue.queue.remove((owner, resource_id))
+            except ValueError:
+                pass
+
+
+def run(acquire, release, contenders, rounds, hold, limit):
+    """Returns (acquisition latencies, wall seconds, CPU seconds), or None if the run did not finish in limit seconds."""
+    latencies = []
+    start_gate = threading.Barrier(contenders)
+
+    def contender(owner):
+        start_gate.wait()
+        local = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            acquire("EXAM", owner)
+            local.append(time.perf_counter() - start)
+            time.sleep(hold)
+            release("EXAM", owner)
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=contender, args=(owner,), daemon=True) for owner in range(contenders)]
+    cpu, wall = time.process_time(), time.perf_counter()
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + limit
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()))
+        if thread.is_alive():
+            return None
+    return latencies, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def describe(label, outcome, contenders, rounds, limit):
+    if outcome is None:
+        print(f"{label:<14} {contenders:>4} contenders: did not finish within {limit:.0f}s (stuck)")
+        return
+    latencies, wall, cpu = outcome
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<14} {contenders:>4} contenders: {contenders * rounds / wall:8,.0f} locks/s  "
+          f"acquire p50 {p50 * 1e3:8.2f}ms  p99 {p99 * 1e3:8.2f}ms  cpu {cpu:5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acquisition latency of the busy-wait lock versus LockManager")
+    parser.add_argument("--contenders", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rounds", type=int, default=50, help="Lock/unlock cycles per contender")
+    parser.add_argument("--hold", type=float, default=0.0002, help="Seconds the lock is held each time")
+    parser.add_argument("--limit", type=float, default=10.0, help="Give up on a run after this many seconds")
+    args = parser.parse_args()
+
+    for contenders in args.contenders:
+        # Stuck legacy threads are daemons holding their own lock objects, so later runs are unaffected
+        legacy = LegacyLocks()
+        outcome = run(legacy.acquire, legacy.release, contenders, args.rounds, args.hold, args.limit)
+        describe("busy-wait", outcome, contenders, args.rounds, args.limit)
+
+        manager = LockManager()
+        outcome = run(lambda resource, owner: manager.acquire(resource, owner), manager.release,
+                      contenders, args.rounds, args.hold, args.limit)
+        describe("LockManager", outcome, contenders, args.rounds, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Per-registration latency of the old name-keyed statements against the query layer (name resolved once,
+# then prepared statements keyed by primary key), as the scheduled table grows. Runs on the SQLite stand-in,
+# which models index use but not MySQL's statement parsing, so prepared-statement savings on a real server
+# come on top of these numbers.
+# Run from the repository root:  python -m benchmarks.bench_queries --exams 20 1000 20000
+import argparse
+import os
+import time
+
+from benchmarks import standin
+from benchmarks.bench_server_modes import percentile
+from db_pool import ConnectionPool
+from registration import EXAM_FULL, NOT_FOUND, REGISTERED, RegistrationEngine
+
+# The statements registration used before the query layer
+LEGACY_REGISTER_SQL = ("UPDATE scheduled SET Student_registered = Student_registered + 1 "
+                       "WHERE Name = %s AND Student_registered < %s")
+LEGACY_EXISTS_SQL = "SELECT 1 FROM scheduled WHERE Name = %s"
+
+
+class LegacyEngine(RegistrationEngine):
+    """The engine as it was: locks and updates by name with a fresh cursor and statement text each call."""
+
+    def register(self, session_code, exam_id, timestamp=None):
+        lock = self._checkout_lock(exam_id)
+        try:
+            lock.acquire(session_code, time.time(), self.wait_timeout)
+            try:
+                return self._apply(exam_id)
+            finally:
+                lock.release()
+        finally:
+            self._return_lock(exam_id, lock)
+
+    def _apply(self, exam_id):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(LEGACY_REGISTER_SQL, (exam_id, self.capacity))
+            connection.commit()
+            if cursor.rowcount:
+                cursor.close()
+                return REGISTERED
+            cursor.execute(LEGACY_EXISTS_SQL, (exam_id,))
+            exists = cursor.fetchone() is not None
+            cursor.close()
+        return EXAM_FULL if exists else NOT_FOUND
+
+
+def measure(engine_class, exams, registrations, rtt, indexed):
+    path = standin.create_database(exams=exams, indexed=indexed)
+    pool = ConnectionPool(standin.connection_factory(path, rtt), pool_size=1)
+    engine = engine_class(pool, capacity=registrations)
+    with pool.connection() as connection:
+        # As server.load_schedule does, so names resolve from memory rather than one query each
+        cursor = connection.cursor()
+        cursor.execute("SELECT id, Name FROM scheduled")
+        engine.exam_ids.update({"id": exam_pk, "Name": name} for exam_pk, name in cursor.fetchall())
+        cursor.close()
+    names = [f"EXAM-{i % exams + 1}" for i in range(registrations)]
+    engine.register("warmup", names[0])
+    latencies = []
+    for i, name in enumerate(names):
+        start = time.perf_counter()
+        result = engine.register(f"session-{i}", name)
+        latencies.append(time.perf_counter() - start)
+        assert result == REGISTERED, result
+    pool.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return percentile(latencies, 50), percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-registration latency: name-keyed SQL vs the query layer")
+    parser.add_argument("--exams", type=int, nargs="+", default=[20, 1000, 20000], help="Rows in scheduled")
+    parser.add_argument("--registrations", type=int, default=2000)
+    parser.add_argument("--rtt", type=float, default=0.0, help="Simulated DB round trip in seconds")
+    args = parser.parse_args()
+
+    variants = [("name-keyed, no index (old)", LegacyEngine, False),
+                ("name-keyed, migrated", LegacyEngine, True),
+                ("query layer, migrated", RegistrationEngine, True)]
+    print(f"{args.registrations} sequential registrations, simulated round trip {args.rtt * 1000:.1f}ms")
+    for exams in args.exams:
+        print(f"  {exams} exams")
+        baseline = None
+        for label, engine_class, indexed in variants:
+            p50, p99 = measure(engine_class, exams, args.registrations, args.rtt, indexed)
+            baseline = baseline or p50
+            print(f"    {label:<28} p50 {p50 * 1e6:8.1f}us   p99 {p99 * 1e6:8.1f}us   {baseline / p50:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Registration throughput benchmark: per-exam locking versus a single server-wide critical section.
+# Run from the repository root:  python -m benchmarks.bench_registration
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import ConnectionPool
+from registration import RegistrationEngine, REGISTERED
+from benchmarks import standin
+
+
+class GlobalLockEngine:
+    """Baseline that funnels every registration through one lock, like the old MutexManager."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.lock = threading.Lock()
+
+    def register(self, session_code, exam_id):
+        with self.lock:
+            return self.engine.register(session_code, exam_id)
+
+
+def run(engine, workers, registrations, exams):
+    ok = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(engine.register, f"session-{i}", f"EXAM-{i % exams + 1}")
+                   for i in range(registrations)]
+        for future in futures:
+            ok += future.result() == REGISTERED
+    elapsed = time.perf_counter() - start
+    return ok, registrations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registration throughput versus worker threads")
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--registrations", type=int, default=2000)
+    parser.add_argument("--rtt", type=float, default=0.001, help="Simulated DB round trip in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'global lock reg/s':>18} {'per-exam reg/s':>15} {'speedup':>8}")
+    for workers in args.workers:
+        results = []
+        for per_exam in (False, True):
+            path = standin.create_database(exams=args.exams)
+            pool = ConnectionPool(standin.connection_factory(path, args.rtt), pool_size=workers)
+            engine = RegistrationEngine(pool, capacity=args.registrations)
+            if not per_exam:
+                engine = GlobalLockEngine(engine)
+            ok, rate = run(engine, workers, args.registrations, args.exams)
+            assert ok == args.registrations, f"only {ok} of {args.registrations} registrations succeeded"
+            pool.close()
+            os.remove(path)
+            results.append(rate)
+        print(f"{workers:>8} {results[0]:>18.0f} {results[1]:>15.0f} {results[1] / results[0]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
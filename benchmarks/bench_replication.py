@@ -0,0 +1,190 @@
+# Replication benchmark: admins publish exams through different source nodes while the catalogue grows.
+# The old replicate_data pushed the whole data dict to each replica in turn under the source's lock;
+# the Replicator ships only changed keys in parallel. Links are simulated as latency + size / bandwidth.
+# Run from the repository root:  python -m benchmarks.bench_replication --questions 10 100 1000
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from replication import Replicator, apply_entries
+
+
+class Node:
+    """The fields of different.Node that replication touches."""
+
+    def __init__(self, node_id):
+        self.id = node_id
+        self.lamport_clock = 0
+        self.replica_data = {}
+        self.replicated_seq = 0
+        self.lock = threading.Lock()
+
+
+class Link:
+    def __init__(self, latency, bandwidth):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.down = set()  # Node IDs that currently refuse connections
+
+    def send(self, node, payload_bytes):
+        if node.id in self.down:
+            raise ConnectionError("replica unreachable")
+        time.sleep(self.latency + payload_bytes / self.bandwidth)
+
+
+def make_exam(exam_id, questions):
+    return [{"question": f"{exam_id} question {i} " + "x" * 60, "options": ["a", "b", "c", "d"],
+             "correct_answer": "a"} for i in range(questions)]
+
+
+def legacy_replicate(nodes, link, data, source_node):
+    """replicate_data as different.py implemented it before the Replicator."""
+    payload = len(json.dumps(data))
+    with source_node.lock:
+        for node in nodes:
+            if node is not source_node:
+                link.send(node, payload)
+                node.replica_data.update(data)
+                source_node.lamport_clock += 1
+                node.lamport_clock = max(node.lamport_clock, source_node.lamport_clock) + 1
+
+
+def workload(args, questions, replicate):
+    """Each admin republishes its whole catalogue with one new exam per round; returns per-call latencies."""
+    latencies = []
+
+    def admin(writer, source):
+        catalogue = {}
+        for round_ in range(args.rounds):
+            exam_id = f"exam-{writer}-{round_}"
+            catalogue[exam_id] = make_exam(exam_id, questions)
+            start = time.perf_counter()
+            replicate(dict(catalogue), source)
+            latencies.append(time.perf_counter() - start)
+
+    return admin, latencies
+
+
+def run(args, questions, label, make_replicate):
+    nodes = [Node(i) for i in range(args.nodes)]
+    link = Link(args.latency, args.bandwidth)
+    replicate, finish = make_replicate(nodes, link)
+    admin, latencies = workload(args, questions, replicate)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=admin, args=(writer, nodes[writer % len(nodes)]))
+               for writer in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lags = finish(nodes)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    lags.sort()
+    calls = args.writers * args.rounds
+    print(f"  {label:<16} {calls / elapsed:8.1f} publishes/s   call p50 {latencies[len(latencies) // 2] * 1e3:8.1f}ms   "
+          f"replication lag p50 {lags[len(lags) // 2] * 1e3:8.1f}ms  p99 {lags[int(len(lags) * 0.99)] * 1e3:8.1f}ms")
+
+
+def legacy(nodes, link):
+    lags = []
+
+    def replicate(data, source):
+        start = time.perf_counter()
+        legacy_replicate(nodes, link, data, source)
+        lags.append(time.perf_counter() - start)  # Synchronous: every replica has it when the call returns
+
+    return replicate, lambda nodes: lags
+
+
+def delta(acks):
+    def make(nodes, link):
+        published = {}  # seq -> time the change was published
+        applied = {}    # seq -> time the last replica applied it
+        record = threading.Lock()
+
+        def ship(node, entries):
+            link.send(node, sum(len(json.dumps(entry.value)) for entry in entries))
+            apply_entries(node, entries)
+            now = time.perf_counter()
+            with record:
+                for entry in entries:
+                    applied[entry.seq] = now
+
+        replicator = Replicator(nodes, ThreadPoolExecutor(max_workers=len(nodes) * 2), acks, ship=ship)
+
+        def replicate(data, source):
+            before = time.perf_counter()
+            first = replicator.log.last_seq + 1
+            result = replicator.replicate(data, source)
+            with record:
+                for seq in range(first, result["seq"] + 1):
+                    published.setdefault(seq, before)
+
+        def finish(nodes):
+            replicator.wait_for(replicator.log.last_seq, len(nodes), timeout=60)
+            replicator.executor.shutdown()
+            return [applied[seq] - published[seq] for seq in published if seq in applied]
+
+        return replicate, finish
+    return make
+
+
+def catch_up(args, questions):
+    """A replica misses many publishes, then catches up from the log instead of taking a full copy."""
+    nodes = [Node(i) for i in range(args.nodes)]
+    link = Link(args.latency, args.bandwidth)
+    sent = []
+
+    def ship(node, entries):
+        payload = sum(len(json.dumps(entry.value)) for entry in entries)
+        link.send(node, payload)
+        sent.append((node.id, payload))
+        apply_entries(node, entries)
+
+    replicator = Replicator(nodes, acks="quorum", ship=ship)
+    catalogue = {}
+    for round_ in range(args.rounds):
+        catalogue[f"exam-{round_}"] = make_exam(f"exam-{round_}", questions)
+        replicator.replicate(dict(catalogue), nodes[0])
+    link.down.add(nodes[-1].id)
+    logging.getLogger("replication").setLevel(logging.ERROR)  # One warning per publish while the replica is down
+    for round_ in range(args.rounds, args.rounds * 2):
+        catalogue[f"exam-{round_}"] = make_exam(f"exam-{round_}", questions)
+        replicator.replicate(dict(catalogue), nodes[0])
+    lag = replicator.lag()[nodes[-1].id]
+    link.down.clear()
+    sent.clear()
+    start = time.perf_counter()
+    replicator.catch_up(nodes[-1]).result()
+    caught_up = time.perf_counter() - start
+    shipped = sum(size for node_id, size in sent if node_id == nodes[-1].id)
+    full_copy = len(json.dumps(catalogue))
+    print(f"  catch-up: replica {lag} entries behind applied them in {caught_up * 1e3:.1f}ms, "
+          f"{shipped / 1e6:.2f}MB shipped vs {full_copy / 1e6:.2f}MB for a full copy")
+    replicator.executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replication lag and throughput as exams grow")
+    parser.add_argument("--questions", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--nodes", type=int, default=5)
+    parser.add_argument("--writers", type=int, default=4, help="Admins publishing concurrently")
+    parser.add_argument("--rounds", type=int, default=15, help="Exams each admin publishes")
+    parser.add_argument("--latency", type=float, default=0.001, help="Seconds per message on the simulated link")
+    parser.add_argument("--bandwidth", type=float, default=100e6, help="Bytes per second on the simulated link")
+    args = parser.parse_args()
+
+    for questions in args.questions:
+        print(f"{questions} questions per exam, {args.nodes} nodes, {args.writers} admins x {args.rounds} exams")
+        run(args, questions, "legacy full push", legacy)
+        for acks in ("async", "quorum", "all"):
+            run(args, questions, f"delta acks={acks}", delta(acks))
+        catch_up(args, questions)
+
+
+if __name__ == "__main__":
+    main()
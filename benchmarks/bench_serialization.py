@@ -0,0 +1,68 @@
+# Serialization microbenchmark for view_schedule responses shaped like rows of the `scheduled` table.
+# Run from the repository root:  python -m benchmarks.bench_serialization --rows 500
+import argparse
+import time
+import xmlrpc.client
+
+import transport
+
+
+def schedule_rows(count):
+    # Dates and times are strings here because xmlrpc cannot marshal datetime.date or timedelta values
+    return [
+        {
+            "id": i,
+            "Name": f"EXAM-{i}",
+            "Marks": 100,
+            "Student_registered": i % 120,
+            "Exam_date": f"2026-11-{i % 28 + 1:02d}",
+            "Start_time": "09:00:00",
+            "Duration": 180,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def xmlrpc_roundtrip(rows):
+    data = xmlrpc.client.dumps((rows,), methodresponse=True, allow_none=True).encode()
+    xmlrpc.client.loads(data)
+    return len(data)
+
+
+def codec_roundtrip(codec):
+    def roundtrip(rows):
+        data = codec.dumps({"result": rows})
+        codec.loads(data)
+        return len(data)
+    return roundtrip
+
+
+def measure(roundtrip, rows, repeat):
+    size = roundtrip(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        roundtrip(rows)
+    return size, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode+decode cost of schedule responses per transport")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    candidates = [("xmlrpc", xmlrpc_roundtrip)]
+    candidates += [(name, codec_roundtrip(codec)) for name, codec in transport.CODECS.items()]
+
+    print(f"{'rows':>6} {'transport':>10} {'bytes':>10} {'round trip ms':>14} {'vs xmlrpc':>10}")
+    for count in args.rows:
+        rows = schedule_rows(count)
+        baseline = None
+        for name, roundtrip in candidates:
+            size, seconds = measure(roundtrip, rows, args.repeat)
+            baseline = baseline or seconds
+            print(f"{count:>6} {name:>10} {size:>10} {seconds * 1000:>14.3f} {baseline / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Load generator comparing the threaded and asyncio server modes on latency and memory.
+# Each mode is started in its own process on the SQLite stand-in; memory figures are read from /proc (Linux).
+# Run from the repository root:  python -m benchmarks.bench_server_modes --clients 2000
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import xmlrpc.client
+
+from benchmarks import standin
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def proc_status(pid):
+    """Returns peak RSS in MiB and the current thread count of a process."""
+    fields = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            fields[name] = value.split()
+    return int(fields["VmHWM"][0]) / 1024, int(fields["Threads"][0])
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+async def call(port, method, params):
+    """Sends one XML-RPC request over a fresh connection, the way ServerProxy does per Streamlit rerun."""
+    body = xmlrpc.client.dumps(params, method).encode()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(
+            b"POST /RPC2 HTTP/1.1\r\nHost: localhost\r\nContent-Type: text/xml\r\nConnection: close\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    status = response.split(b" ", 2)[1]
+    return status == b"200" and b"<fault>" not in response
+
+
+async def virtual_student(port, index, requests, register_ratio, exams, latencies, errors):
+    session_code = f"student-{index}"
+    await call(port, "initialize_client", (session_code,))
+    for _ in range(requests):
+        if random.random() < register_ratio:
+            method, params = "register_exam", (session_code, f"EXAM-{random.randint(1, exams)}")
+        else:
+            method, params = "view_schedule", (session_code,)
+        start = time.perf_counter()
+        try:
+            ok = await call(port, method, params)
+        except OSError:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(method)
+
+
+async def drive(port, pid, clients, requests, register_ratio, exams):
+    latencies, errors = [], []
+    peak_threads = 0
+
+    async def sample():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, proc_status(pid)[1])
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_student(port, i, requests, register_ratio, exams, latencies, errors)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return latencies, errors, elapsed, peak_threads
+
+
+def run_mode(mode, args, port):
+    path = standin.create_database(exams=args.exams)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.run_server", "--db", path, "--mode", mode,
+         "--port", str(port), "--rtt", str(args.rtt)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        latencies, errors, elapsed, peak_threads = asyncio.run(
+            drive(port, process.pid, args.clients, args.requests, args.register_ratio, args.exams))
+        peak_rss, _ = proc_status(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+        os.remove(path)
+    return {
+        "mode": mode,
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "errors": len(errors),
+        "peak_rss": peak_rss,
+        "peak_threads": peak_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare threaded and asyncio server modes under load")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent virtual students")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per virtual student")
+    parser.add_argument("--register-ratio", type=float, default=0.1)
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--rtt", type=float, default=0.001, help="Simulated DB round trip in seconds")
+    parser.add_argument("--port", type=int, default=5600)
+    parser.add_argument("--modes", nargs="+", default=["threaded", "async"])
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak RSS MiB':>13} {'threads':>8}")
+    for offset, mode in enumerate(args.modes):
+        result = run_mode(mode, args, args.port + offset)
+        print(f"{result['mode']:>9} {result['rps']:>8.0f} {result['p50']:>8.1f} {result['p99']:>8.1f} "
+              f"{result['errors']:>7} {result['peak_rss']:>13.1f} {result['peak_threads']:>8}")
+
+
+if __name__ == "__main__":
+    main()
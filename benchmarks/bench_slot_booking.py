@@ -0,0 +1,132 @@
+# Booking storm: thousands of students hit the earliest free slots of one exam at once, retrying on the
+# next free slot when theirs fills up. Checks that no slot is ever overbooked, across threads and
+# across processes sharing one SQLite file, and compares the "next N free" index with a table scan.
+# Run from the repository root:  python -m benchmarks.bench_slot_booking --students 5000 --slots 2000
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from exam_store import SLOT_BOOKED, SLOT_FULL, MemoryStore, SQLiteStore
+from slot_booking import SLOT_FORMAT, SlotBookingService
+
+
+def slot_times(count):
+    start = datetime(2030, 1, 1, 9)
+    return [(start + timedelta(hours=i)).strftime(SLOT_FORMAT) for i in range(count)]
+
+
+def storm(service, students, workers, prefix=""):
+    """Every student books the earliest free slot, moving on to the next one when it fills up."""
+    latencies = []
+    conflicts = [0]
+    lock = threading.Lock()
+
+    def student(i):
+        username = f"{prefix}student-{i}"
+        while True:
+            free = service.next_free("EXAM", count=1)
+            if not free:
+                return False
+            start = time.perf_counter()
+            status = service.book("EXAM", free[0][0], username)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status == SLOT_FULL:
+                    conflicts[0] += 1
+            if status == SLOT_BOOKED:
+                return True
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        booked = sum(executor.map(student, range(students)))
+    return booked, latencies, conflicts[0]
+
+
+def check(store, expected_bookings):
+    table = store.get_slot_table("EXAM")
+    overbooked = [slot_time for slot_time, capacity, booked in table if booked > capacity]
+    seats = sum(booked for _, _, booked in table)
+    assert not overbooked, f"overbooked slots: {overbooked[:5]}"
+    assert seats == expected_bookings, f"{seats} seats taken for {expected_bookings} bookings"
+
+
+def describe(label, booked, latencies, conflicts, elapsed):
+    latencies.sort()
+    print(f"  {label:<24} {booked / elapsed:9,.0f} bookings/s   book p50 {latencies[len(latencies) // 2] * 1e3:6.2f}ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:6.2f}ms   lost races {conflicts}")
+
+
+def process_main(path, students, workers, prefix, results):
+    service = SlotBookingService(SQLiteStore(path), refresh_interval=0.2)
+    results.put(storm(service, students, workers, prefix))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent slot booking storm")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--slots", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+    print(f"{args.students} students, {args.slots} slots x {args.capacity} seats, {args.workers} threads")
+
+    # Memory and SQLite stores driven by threads of one process
+    directory = tempfile.mkdtemp(prefix="slot-booking-")
+    for label, store in (("memory", MemoryStore()), ("sqlite", SQLiteStore(os.path.join(directory, "threads.db")))):
+        service = SlotBookingService(store)
+        service.create_slots("EXAM", slot_times(args.slots), args.capacity)
+        start = time.perf_counter()
+        booked, latencies, conflicts = storm(service, args.students, args.workers)
+        describe(f"{label} (threads)", booked, latencies, conflicts, time.perf_counter() - start)
+        check(store, booked)
+
+    # Several processes, each with its own index, racing for the same seats in one database
+    path = os.path.join(directory, "processes.db")
+    SlotBookingService(SQLiteStore(path)).create_slots("EXAM", slot_times(args.slots), args.capacity)
+    results = multiprocessing.Queue()
+    per_process = args.students // args.processes
+    processes = [multiprocessing.Process(target=process_main,
+                                         args=(path, per_process, args.workers // args.processes, f"p{i}-", results))
+                 for i in range(args.processes)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    booked = sum(outcome[0] for outcome in outcomes)
+    latencies = [latency for outcome in outcomes for latency in outcome[1]]
+    describe(f"sqlite ({args.processes} processes)", booked, latencies, sum(outcome[2] for outcome in outcomes), elapsed)
+    check(SQLiteStore(path), booked)
+    print("  capacity held: no slot overbooked, seats taken match bookings")
+
+    # "Next N free slots" from the index versus scanning the slot table
+    store = SQLiteStore(path)
+    service = SlotBookingService(store, refresh_interval=60)
+    after = slot_times(args.slots)[args.slots // 2]
+    service.next_free("EXAM", 10, after)  # Load the index
+    rounds = 2000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        service.next_free("EXAM", 10, after)
+    indexed = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for _ in range(rounds // 20):
+        [slot for slot in store.get_slot_table("EXAM") if slot[0] > after and slot[2] < slot[1]][:10]
+    scanned = (time.perf_counter() - start) / (rounds // 20)
+    print(f"  next 10 free slots: index {indexed * 1e6:.1f}us vs table scan {scanned * 1e6:.1f}us")
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
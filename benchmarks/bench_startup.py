@@ -0,0 +1,110 @@
+# Time to first widget for main.py: the time from the start of a run until the login form is drawn, on a
+# session's first run and on its reruns. The old startup re-read config.yml and built a new authenticator
+# (hashing plain-text passwords with bcrypt) on every rerun; main.py parses and hashes once per process and
+# builds each run's authenticator from the hashed copy. Runs the pages headless with Streamlit's AppTest
+# against a generated config.yml, so no server or browser is needed.
+# Run from the repository root:  python -m benchmarks.bench_startup --users 3 --reruns 20
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import streamlit as st
+import streamlit_authenticator as stauth
+import yaml
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_app():
+    # main.py's startup before the startup layer, as AppTest runs the body of this function as the script
+    import streamlit_authenticator as stauth
+    import yaml
+    from yaml.loader import SafeLoader
+
+    with open('config.yml') as file:
+        config = yaml.load(file, Loader=SafeLoader)
+    authenticator = stauth.Authenticate(
+        config['credentials'],
+        config['cookie']['name'],
+        config['cookie']['key'],
+        config['cookie']['expiry_days']
+    )
+    authenticator.login(location="main", key="Login")
+
+
+def write_config(directory, users):
+    config = {
+        "credentials": {"usernames": {f"20223001{i:02}": {"email": f"student{i}@example.com", "name": f"Student {i}",
+                                                          "password": f"password-{i}"}
+                                      for i in range(users)}},
+        "cookie": {"name": "exam_auth", "key": "bench-signature-key", "expiry_days": 1},
+    }
+    with open(os.path.join(directory, "config.yml"), "w") as file:
+        yaml.safe_dump(config, file)
+
+
+class FirstWidget:
+    """Records when each run reaches Authenticate.login, the first widget main.py draws."""
+
+    def __init__(self):
+        self.reached = None
+        self._login = stauth.Authenticate.login
+        first_widget = self
+
+        def login(authenticator, *args, **kwargs):
+            first_widget.reached = time.perf_counter()
+            return first_widget._login(authenticator, *args, **kwargs)
+
+        stauth.Authenticate.login = login
+
+    def restore(self):
+        stauth.Authenticate.login = self._login
+
+
+def measure(app, reruns, probe):
+    """Returns (first run, median rerun) time to first widget in seconds for one browser session."""
+    st.cache_resource.clear()  # Each variant starts from a fresh process's caches
+    times = []
+    for _ in range(reruns + 1):
+        probe.reached = None
+        start = time.perf_counter()
+        # AppTest has no browser cookies, and streamlit_authenticator prints its failure to decode what it gets
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.run(timeout=60)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+        times.append(probe.reached - start)
+    return times[0], statistics.median(times[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first widget of main.py, first run and reruns")
+    parser.add_argument("--users", type=int, default=3, help="Users in the generated config.yml")
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)  # main.py imports the repository's modules
+    probe = FirstWidget()
+    with tempfile.TemporaryDirectory() as directory:
+        write_config(directory, args.users)
+        os.chdir(directory)  # Both versions open config.yml relative to the working directory
+        variants = [("per-rerun config and authenticator (old)", AppTest.from_function(legacy_app)),
+                    ("startup layer (main.py)", AppTest.from_file(os.path.join(ROOT, "main.py")))]
+        print(f"config.yml with {args.users} plain-text passwords, {args.reruns} reruns per session")
+        try:
+            for label, app in variants:
+                first, rerun = measure(app, args.reruns, probe)
+                print(f"  {label:<42} first run {first * 1000:8.1f}ms   rerun p50 {rerun * 1000:8.1f}ms")
+        finally:
+            probe.restore()
+            os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# Pre-season load test: virtual students run the real student flow (initialize_client, then polling
+# view_schedule and registering for exams) against server.py on the SQLite stand-in, or against a running
+# server with --url. Reports throughput, p50/p95/p99 and error/deferral rates per RPC, and with --baseline
+# fails when a run is slower or less reliable than a saved one.
+# Run from the repository root:
+#   python -m benchmarks.load_test --students 500 --duration 30 --save baseline.json
+#   python -m benchmarks.load_test --students 500 --duration 30 --baseline baseline.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import xmlrpc.client
+from urllib.parse import urlsplit
+
+from admission import retry_after
+from benchmarks import standin
+from benchmarks.bench_server_modes import percentile, wait_for_port
+from registration import EXAM_FULL, NOT_FOUND, REGISTERED, TIMED_OUT
+
+METHODS = ("initialize_client", "view_schedule", "register_exam")
+
+# Outcomes of one call; a deferral is the server asking the student to come back later
+OK, DEFERRED, ERROR = "ok", "deferred", "error"
+
+
+class Results:
+    def __init__(self):
+        self.latencies = {method: [] for method in METHODS}
+        self.outcomes = {method: {OK: 0, DEFERRED: 0, ERROR: 0} for method in METHODS}
+        self.registrations = {REGISTERED: 0, EXAM_FULL: 0, NOT_FOUND: 0}
+        self.error_samples = []
+
+    def record(self, method, elapsed, outcome, detail=None):
+        self.latencies[method].append(elapsed)
+        self.outcomes[method][outcome] += 1
+        if outcome == ERROR and len(self.error_samples) < 5:
+            self.error_samples.append(f"{method}: {detail}")
+
+    def summary(self, elapsed):
+        report = {"elapsed": round(elapsed, 3), "methods": {}}
+        total = 0
+        for method in METHODS:
+            latencies, outcomes = self.latencies[method], self.outcomes[method]
+            calls = len(latencies)
+            total += calls
+            report["methods"][method] = {
+                "calls": calls,
+                "rps": round(calls / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2) if calls else None,
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2) if calls else None,
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2) if calls else None,
+                "error_rate": round(outcomes[ERROR] / calls, 4) if calls else 0.0,
+                "deferral_rate": round(outcomes[DEFERRED] / calls, 4) if calls else 0.0,
+            }
+        report["rps"] = round(total / elapsed, 1)
+        report["registrations"] = dict(self.registrations)
+        return report
+
+
+async def rpc(host, port, method, params):
+    """One XML-RPC call over a fresh connection, as ServerProxy makes it; returns (HTTP status, result)."""
+    body = xmlrpc.client.dumps(params, method, allow_none=True).encode()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            b"POST /RPC2 HTTP/1.1\r\nHost: " + host.encode() + b"\r\nContent-Type: text/xml\r\nConnection: close\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    if status != 200:
+        return status, None
+    (result,), _ = xmlrpc.client.loads(payload, use_builtin_types=True)
+    return status, result
+
+
+async def timed_call(target, results, method, params):
+    start = time.perf_counter()
+    try:
+        status, result = await rpc(*target, method, params)
+    except xmlrpc.client.Fault as fault:
+        if retry_after(fault) is not None:  # Rate limited or shed by admission control
+            results.record(method, time.perf_counter() - start, DEFERRED)
+        else:
+            results.record(method, time.perf_counter() - start, ERROR, fault.faultString)
+        return None
+    except (OSError, ValueError, IndexError) as error:
+        results.record(method, time.perf_counter() - start, ERROR, repr(error))
+        return None
+    elapsed = time.perf_counter() - start
+    if status == 503:  # Async mode sheds load with 503 once its queue is full
+        results.record(method, elapsed, DEFERRED)
+    elif status != 200:
+        results.record(method, elapsed, ERROR, f"HTTP {status}")
+    elif method == "register_exam" and result == TIMED_OUT:
+        results.record(method, elapsed, DEFERRED)
+    else:
+        results.record(method, elapsed, OK)
+        return result
+    return None
+
+
+async def virtual_student(target, index, deadline, args, exam_names, results):
+    rng = random.Random(args.seed * 100003 + index)
+    session_code = f"loadtest-{index}"
+    await asyncio.sleep(rng.uniform(0, args.ramp))  # Spread logins over the ramp-up period
+    await timed_call(target, results, "initialize_client", (session_code,))
+    version = None
+    registered = set()
+    while time.monotonic() < deadline:
+        if exam_names and rng.random() < args.register_ratio and len(registered) < len(exam_names):
+            exam = rng.choice(exam_names)
+            result = await timed_call(target, results, "register_exam", (session_code, exam))
+            if result in results.registrations:
+                results.registrations[result] += 1
+                registered.add(exam)
+        else:
+            reply = await timed_call(target, results, "view_schedule", (session_code, version))
+            if isinstance(reply, dict):
+                version = reply["version"]
+        if args.think:
+            await asyncio.sleep(rng.expovariate(1 / args.think))
+
+
+async def fetch_exam_names(target):
+    status, rows = await rpc(*target, "view_schedule", ("loadtest-setup",))
+    if status != 200:
+        raise RuntimeError(f"view_schedule returned HTTP {status}")
+    return [row["Name"] for row in rows]
+
+
+async def run_load(target, args):
+    exam_names = await fetch_exam_names(target)
+    results = Results()
+    start = time.perf_counter()
+    deadline = time.monotonic() + args.ramp + args.duration
+    await asyncio.gather(*(virtual_student(target, i, deadline, args, exam_names, results)
+                           for i in range(args.students)))
+    return results.summary(time.perf_counter() - start), results.error_samples
+
+
+def server_metrics(url):
+    """Server-side RPC latencies from get_metrics, when the server has it."""
+    try:
+        snapshot = xmlrpc.client.ServerProxy(url, allow_none=True).get_metrics()
+    except (OSError, xmlrpc.client.Error):
+        return {}
+    return {entry["labels"]["method"]: entry for entry in snapshot["histograms"].get("rpc_latency_seconds", [])
+            if entry["labels"].get("method") in METHODS}
+
+
+def compare(report, baseline, tolerance):
+    """Regressions of this run against a baseline report: slower percentiles or higher error/deferral rates."""
+    problems = []
+    for method, current in report["methods"].items():
+        previous = baseline["methods"].get(method)
+        if not previous or not current["calls"] or not previous["calls"]:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] > previous[key] * (1 + tolerance) and current[key] - previous[key] > 1:
+                problems.append(f"{method} {key} {previous[key]} -> {current[key]}")
+        for key in ("error_rate", "deferral_rate"):
+            if current[key] > previous[key] + 0.01:
+                problems.append(f"{method} {key} {previous[key]:.2%} -> {current[key]:.2%}")
+    if report["rps"] < baseline["rps"] * (1 - tolerance):
+        problems.append(f"throughput {baseline['rps']} -> {report['rps']} req/s")
+    return problems
+
+
+def print_report(report, samples, server_side):
+    print(f"{report['rps']:.0f} req/s over {report['elapsed']:.1f}s   registrations {report['registrations']}")
+    print(f"  {'method':<18} {'calls':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>8} {'deferred':>9} {'server p99 ms':>14}")
+    for method, row in report["methods"].items():
+        if not row["calls"]:
+            continue
+        server_p99 = server_side.get(method, {}).get("p99")
+        print(f"  {method:<18} {row['calls']:>8} {row['rps']:>8.0f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['error_rate']:>8.2%} {row['deferral_rate']:>9.2%} "
+              f"{'-' if server_p99 is None else f'{server_p99 * 1000:.2f}':>14}")
+    for sample in samples:
+        print(f"  error: {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py with concurrent virtual students")
+    parser.add_argument("--students", type=int, default=200, help="Concurrent virtual students")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of steady load after ramp-up")
+    parser.add_argument("--ramp", type=float, default=2, help="Seconds over which students log in")
+    parser.add_argument("--think", type=float, default=0.25, help="Mean pause between a student's calls, seconds")
+    parser.add_argument("--register-ratio", type=float, default=0.1, help="Share of calls that are registrations")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="Test a running server instead of starting one on the stand-in")
+    parser.add_argument("--mode", choices=["threaded", "async"], default="threaded")
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--rtt", type=float, default=0.001, help="Simulated DB round trip in seconds")
+    parser.add_argument("--port", type=int, default=5700)
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a saved report and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown vs the baseline")
+    args = parser.parse_args()
+
+    process = path = None
+    if args.url:
+        url = args.url
+    else:
+        path = standin.create_database(exams=args.exams)
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.run_server", "--db", path, "--mode", args.mode,
+             "--host", "127.0.0.1", "--port", str(args.port), "--rtt", str(args.rtt)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f"http://127.0.0.1:{args.port}"
+    parts = urlsplit(url)
+    target = (parts.hostname, parts.port or 80)
+    try:
+        if process:
+            wait_for_port(target[1])
+        print(f"{args.students} students for {args.duration:.0f}s against {url}"
+              + (f" ({args.mode} mode, stand-in DB rtt {args.rtt * 1000:.1f}ms)" if process else ""))
+        report, samples = asyncio.run(run_load(target, args))
+        server_side = server_metrics(url)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+            os.remove(path)
+    report["config"] = {key: value for key, value in vars(args).items() if key not in ("save", "baseline")}
+    print_report(report, samples, server_side)
+
+    if args.save:
+        with open(args.save, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            problems = compare(report, json.load(handle), args.tolerance)
+        for problem in problems:
+            print(f"  REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("  no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Runs server.py against a stand-in database instead of MySQL.
+# Usage:  python -m benchmarks.run_server --db /tmp/exam.db --mode async --port 5000
+#         python -m benchmarks.run_server --db /tmp/exam.db --node-id 1 --cluster-size 3
+import argparse
+
+import metrics
+import server
+from benchmarks import standin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RPC server on a SQLite stand-in backend")
+    parser.add_argument("--db", help="Stand-in database path; a fresh one is created when omitted")
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--rtt", type=float, default=0.001, help="Simulated DB round trip in seconds")
+    parser.add_argument("--mode", choices=["threaded", "async"], default="threaded")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Defaults to base port + node id")
+    parser.add_argument("--node-id", type=int, default=0)
+    parser.add_argument("--cluster-size", type=int, default=1)
+    parser.add_argument("--base-port", type=int, default=5000)
+    args = parser.parse_args()
+
+    path = args.db or standin.create_database(exams=args.exams)
+    # The pool opens connections lazily, so swapping the factory before serving is enough
+    server.db_pool.factory = metrics.timed_connections(standin.connection_factory(path, args.rtt))
+    server.serve(args.mode, args.host, args.port, args.node_id, args.cluster_size, args.base_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# SQLite stand-in for the MySQL `scheduled` table so benchmarks run without a live database.
+# Connections mimic the parts of mysql.connector the server uses, plus a simulated network round trip.
+import os
+import sqlite3
+import tempfile
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled (
+    id INTEGER PRIMARY KEY,
+    Name TEXT NOT NULL,
+    Marks INTEGER NOT NULL,
+    Student_registered INTEGER NOT NULL DEFAULT 0,
+    Exam_date TEXT NOT NULL,
+    Start_time TEXT NOT NULL,
+    Duration INTEGER NOT NULL
+)
+"""
+
+
+class StandInCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self._dictionary = dictionary
+        self.rowcount = -1
+
+    def execute(self, statement, params=()):
+        time.sleep(self._connection.rtt)
+        self._cursor.execute(_to_sqlite(statement), params)
+        self.rowcount = self._cursor.rowcount
+
+    def executemany(self, statement, seq_of_params):
+        time.sleep(self._connection.rtt)
+        self._cursor.executemany(_to_sqlite(statement), seq_of_params)
+        self.rowcount = self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._shape(row) if row is not None else None
+
+    def fetchall(self):
+        return [self._shape(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+    def _shape(self, row):
+        if not self._dictionary:
+            return tuple(row)
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+
+class StandInConnection:
+    def __init__(self, path, rtt):
+        self.raw = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.raw.execute("PRAGMA busy_timeout = 30000")
+        self.rtt = rtt  # Seconds slept per statement and commit to model the MySQL round trip
+
+    def cursor(self, dictionary=False, prepared=False):
+        return StandInCursor(self, dictionary)
+
+    def commit(self):
+        self.raw.commit()
+        time.sleep(self.rtt)  # Sleep after committing so the SQLite write lock is not held meanwhile
+
+    def rollback(self):
+        self.raw.rollback()
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self.raw.close()
+
+
+def _to_sqlite(statement):
+    # MySQL-style placeholders and row locks are the only dialect differences the server relies on
+    return statement.replace("%s", "?").replace(" FOR UPDATE", "")
+
+
+def create_database(exams=20, capacity_used=0, path=None, questions=50, indexed=True):
+    """Creates a fresh stand-in database with `exams` rows in `scheduled` and a `questions`-long
+    `dsgt` question bank, and returns its path. `indexed` adds the indexes queries.migrate creates."""
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix="exam-standin-", suffix=".db")
+        os.close(handle)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("DROP TABLE IF EXISTS scheduled")
+    connection.execute(SCHEMA)
+    connection.executemany(
+        "INSERT INTO scheduled (id, Name, Marks, Student_registered, Exam_date, Start_time, Duration) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(i, f"EXAM-{i}", 100, capacity_used, "2026-11-0%d" % (i % 9 + 1), "09:00:00", 180)
+         for i in range(1, exams + 1)],
+    )
+    if indexed:
+        connection.execute("CREATE INDEX idx_scheduled_name ON scheduled (Name)")
+    connection.execute("DROP TABLE IF EXISTS dsgt")
+    connection.execute("CREATE TABLE dsgt (id INTEGER PRIMARY KEY, Question TEXT NOT NULL, Answer TEXT NOT NULL)")
+    connection.executemany("INSERT INTO dsgt (id, Question, Answer) VALUES (?, ?, ?)",
+                           [(i, f"What is {i} + {i}?", str(2 * i)) for i in range(1, questions + 1)])
+    connection.commit()
+    connection.close()
+    return path
+
+
+def connection_factory(path, rtt=0.001):
+    """Returns a zero-argument callable suitable for ConnectionPool(factory=...)."""
+    def connect():
+        return StandInConnection(path, rtt)
+    return connect
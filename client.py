@@ -1,4 +1,4 @@
-import xmlrpc.client
+import rpc_client
 import streamlit as st
 import uuid
 import time
@@ -8,24 +8,18 @@ if "session_code" not in st.session_state:
     st.session_state.session_code = str(uuid.uuid4())
 session_code = st.session_state.session_code
 
-# Connect to the server (handles leader retrieval for dynamic coordination)
-def connect_to_server():
-    leader_url = "http://localhost:5000/"
-    try:
-        leader_server = xmlrpc.client.ServerProxy(leader_url)
-        leader = leader_server.get_leader()
-        st.session_state.server_url = f"http://localhost:{5000 + leader}/"  # Simulating leader-based port adjustment
-        return xmlrpc.client.ServerProxy(st.session_state.server_url)
-    except Exception as e:
-        st.error(f"Failed to connect to leader server: {e}")
-        return None
+# Shared per-process client: the leader is cached and only re-resolved when a call fails
+server = rpc_client.get_client()
 
-server = connect_to_server()
+# The exam deadline and the end of the exam are pushed by the server instead of being polled for
+live_updates = rpc_client.get_live_updates()
+live_updates.watch(session_code)
 
-# Initialize the client session with the server using the session code
-if server:
+# Initialize the client session with the server once per browser session, not on every rerun
+if not st.session_state.get("session_initialized"):
     try:
         client_id = server.initialize_client(session_code)
+        st.session_state.session_initialized = True
     except Exception as e:
         st.error(f"Failed to initialize client session: {e}")
 
@@ -34,34 +28,45 @@ st.title("Welcome to the Examination System")
 st.sidebar.title(f"Welcome {st.session_state.get('name', 'User')}")
 
 st.header("Open Exams")
+student_name = st.session_state.get("name", "Unknown")
 if st.button("DSGT-ISE 1"):
-    exam_duration = 300  # Set exam duration in seconds (e.g., 5 minutes)
-    end_time = time.time() + exam_duration
-    ans = "None"
-    val = 1
+    # One call fetches the whole paper; the server starts the clock and keeps it
     try:
-        while time.time() < end_time:
-            exams = server.dsgt(val, st.session_state.get("name", "Unknown"), ans)
-            if exams != "Exit":
-                st.write(exams[0][0])
-                ans = st.text_input("Enter Answer", key=f"answer_{int(time.time())}")
-                val += 1
-            elif exams == "Exit":
-                st.write("Exam Finished")
-                break
-            else:
-                st.write(f"You have already given this exam. Your score is {exams}")
+        st.session_state.exam_paper = server.start_exam(session_code, "dsgt", student_name)
+        st.session_state.exam_fetched_at = time.time()
+    except Exception as e:
+        st.error(f"Failed to retrieve exam: {e}")
 
-            # Update the remaining time
-            remaining_time = int(end_time - time.time())
+paper = st.session_state.get("exam_paper")
+if paper:
+    if paper["submitted"]:
+        st.write(f"You have already given this exam. Your score is {paper['score']}")
+    else:
+        started = live_updates.latest(session_code, "exam_started")
+        stopped = live_updates.latest(session_code, "exam_stopped")
+        if started and started["exam"] == paper["exam_id"]:
+            remaining_time = max(0, int(started["deadline"] - time.time()))
+        else:  # Event not received yet: count down from the time the paper arrived
+            remaining_time = max(0, int(paper["remaining"] - (time.time() - st.session_state.exam_fetched_at)))
+        if stopped and stopped["exam"] == paper["exam_id"] and stopped["reason"] == "time_up":
+            st.warning("Time is up. Submit now; late answers are only accepted for a few seconds.")
+        else:
             st.write(f"Time remaining: {remaining_time} seconds")
 
-            if remaining_time <= 0:
-                st.write("Time is up! Exam has ended.")
-                break
-
-            # Add a short sleep to prevent excessive CPU usage
-            time.sleep(1)
-
-    except Exception as e:
-        st.error(f"Failed to retrieve exam schedule: {e}")
+        with st.form("exam_form"):
+            answers = {}
+            for question in paper["questions"]:
+                st.write(f"Q{question['number']}. {question['question']}")
+                answers[str(question["id"])] = st.text_input("Enter Answer", key=f"answer_{question['id']}")
+            if st.form_submit_button("Submit"):
+                # All answers go to the server in a single batched submit
+                try:
+                    result = server.submit_answers(session_code, "dsgt", student_name, answers)
+                    if result["accepted"]:
+                        st.write("Exam Finished")
+                    else:
+                        st.write(f"{result['reason']}. Exam has ended.")
+                    st.write(f"Your score is {result['score']}/{result['total']}")
+                    del st.session_state.exam_paper
+                except Exception as e:
+                    st.error(f"Failed to submit answers: {e}")
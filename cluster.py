@@ -0,0 +1,176 @@
+# Cluster membership for server.py: heartbeats between N server processes, Bully leader election
+# over RPC, and the get_leader/get_cluster endpoints clients use to find the leader and followers
+import logging
+import threading
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+
+from transport import TimeoutTransport
+
+log = logging.getLogger(__name__)
+
+
+class ClusterNode:
+    def __init__(self, node_id, cluster_size, host="localhost", base_port=5000,
+                 heartbeat_interval=0.5, failure_timeout=1.5, rpc_timeout=0.5):
+        self.node_id = node_id
+        self.cluster_size = cluster_size
+        self.base_port = base_port                  # Node i listens on base_port + i
+        self.heartbeat_interval = heartbeat_interval
+        self.failure_timeout = failure_timeout      # Silence after which a peer is presumed dead
+        self.rpc_timeout = rpc_timeout
+        self.peers = {i: f"http://{host}:{base_port + i}/" for i in range(cluster_size) if i != node_id}
+        self.leader = None
+        self.last_seen = {}                         # Peer id -> monotonic time of its last heartbeat
+        self.started_at = time.monotonic()
+
+        # Failover bookkeeping
+        self.elections = 0
+        self.leader_changes = 0
+        self.last_failover_seconds = None
+        self._leader_lost_at = None
+
+        self._lock = threading.Lock()
+        self._electing = False
+        self._coordinator_event = threading.Event()
+        # Only leaf RPC calls run here, so waiting on them from elections cannot deadlock the pool
+        self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * len(self.peers)), thread_name_prefix="cluster-rpc")
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name="cluster-heartbeat", daemon=True)
+
+    def start(self):
+        self._spawn_election()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # RPC endpoints
+
+    def get_leader(self):
+        """Returns the current leader's node id, waiting briefly if an election is in progress."""
+        if self.leader is None:
+            self._coordinator_event.wait(self.failure_timeout)
+        return self.leader if self.leader is not None else self.node_id
+
+    def get_cluster(self):
+        """Returns this node's view of the cluster: leader, live followers and failover statistics."""
+        alive = self.alive_nodes()
+        return {
+            "node_id": self.node_id,
+            "leader": self.leader,
+            "alive": alive,
+            "followers": [i for i in alive if i != self.leader],
+            "base_port": self.base_port,
+            "elections": self.elections,
+            "leader_changes": self.leader_changes,
+            "last_failover_seconds": self.last_failover_seconds,
+        }
+
+    def heartbeat(self, sender_id, sender_leader):
+        """Records that a peer is alive; a live leader announcing itself is accepted if it outranks ours."""
+        self.last_seen[sender_id] = time.monotonic()
+        if sender_leader == sender_id and sender_id != self.leader:
+            if sender_id < self.node_id:
+                self._spawn_election()
+            elif self.leader is None or sender_id > self.leader or not self._alive(self.leader):
+                self._set_leader(sender_id)
+        return self.node_id
+
+    def election(self, candidate_id):
+        """Bully: a lower node asks if anyone higher is alive; answer and take over the election."""
+        self.last_seen[candidate_id] = time.monotonic()
+        self._spawn_election()
+        return True
+
+    def coordinator(self, leader_id):
+        """A node announces it won the election; a lower winner is bullied by starting our own election."""
+        self.last_seen[leader_id] = time.monotonic()
+        if leader_id < self.node_id:
+            self._spawn_election()
+        else:
+            self._set_leader(leader_id)
+        return True
+
+    # Election
+
+    def start_election(self):
+        with self._lock:
+            if self._electing:
+                return
+            self._electing = True
+            self.elections += 1
+            self._coordinator_event.clear()
+        try:
+            higher = [i for i in self.peers if i > self.node_id]
+            answers = self._broadcast("election", higher, self.node_id)
+            if not any(answers.values()):
+                self._set_leader(self.node_id)
+                self._broadcast("coordinator", list(self.peers), self.node_id)
+                return
+        finally:
+            with self._lock:
+                self._electing = False
+
+        # A higher node answered; if it never announces itself, try again
+        if not self._coordinator_event.wait(self.failure_timeout) and not self._stopped.is_set():
+            self._spawn_election()
+
+    def _spawn_election(self):
+        if not self._electing and not self._stopped.is_set():
+            threading.Thread(target=self.start_election, name="cluster-election", daemon=True).start()
+
+    def alive_nodes(self):
+        now = time.monotonic()
+        alive = [i for i, seen in self.last_seen.items() if now - seen <= self.failure_timeout]
+        return sorted(alive + [self.node_id])
+
+    def _alive(self, node_id):
+        if node_id == self.node_id:
+            return True
+        seen = self.last_seen.get(node_id)
+        return seen is not None and time.monotonic() - seen <= self.failure_timeout
+
+    def _set_leader(self, leader_id):
+        with self._lock:
+            if self.leader != leader_id:
+                self.leader_changes += 1
+                if self._leader_lost_at is not None:
+                    self.last_failover_seconds = round(time.monotonic() - self._leader_lost_at, 3)
+                    self._leader_lost_at = None
+                log.info("New leader", extra={"node": self.node_id, "leader": leader_id})
+            self.leader = leader_id
+            self._coordinator_event.set()
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            self._broadcast("heartbeat", list(self.peers), self.node_id, self.leader)
+            leader = self.leader
+            if leader is not None and not self._alive(leader):
+                # Failover time is measured from the leader's last heartbeat
+                with self._lock:
+                    if self._leader_lost_at is None:
+                        self._leader_lost_at = self.last_seen.get(leader, self.started_at)
+                    self.leader = None
+                log.warning("Leader stopped responding; starting election",
+                            extra={"node": self.node_id, "leader": leader})
+                self._spawn_election()
+            elif leader is None:
+                self._spawn_election()
+
+    def _broadcast(self, method, node_ids, *params):
+        """Calls method on the given peers in parallel; returns {node_id: result or None if unreachable}."""
+        futures = {i: self._executor.submit(self._call, i, method, params) for i in node_ids}
+        return {i: future.result() for i, future in futures.items()}
+
+    def _call(self, node_id, method, params):
+        proxy = xmlrpc.client.ServerProxy(self.peers[node_id], transport=TimeoutTransport(self.rpc_timeout),
+                                          allow_none=True)
+        try:
+            result = getattr(proxy, method)(*params)
+        except (OSError, xmlrpc.client.Error):
+            return None
+        self.last_seen[node_id] = time.monotonic()
+        return result
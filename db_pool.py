@@ -0,0 +1,193 @@
+# Bounded, thread-safe database connection pool shared by the RPC worker threads
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PooledConnection:
+    """A raw driver connection plus the bookkeeping the pool needs."""
+    __slots__ = ("raw", "created_at", "last_used", "statements")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.statements = OrderedDict()  # SQL -> prepared cursor, least recently used first; dies with the connection
+
+    def age(self, now=None):
+        return (now or time.monotonic()) - self.created_at
+
+
+class ConnectionPool:
+    def __init__(self, factory, pool_size=10, max_age=1800, health_check_after=30, acquire_timeout=10):
+        self.factory = factory                        # Callable that opens a new driver connection
+        self.pool_size = pool_size                    # Upper bound on open connections
+        self.max_age = max_age                        # Seconds before a connection is recycled
+        self.health_check_after = health_check_after  # Idle seconds before a connection is pinged on checkout
+        self.acquire_timeout = acquire_timeout
+        self._idle = deque()
+        self._in_use = set()
+        self._opened = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Metrics
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.recycled = 0
+        self.health_failures = 0
+
+    def acquire(self, timeout=None):
+        """Checks out a healthy connection, waiting for one to be released if the pool is exhausted."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()  # LIFO keeps the warmest connections busy
+                    break
+                if self._opened < self.pool_size:
+                    self._opened += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"No database connection available after {timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - start
+
+        # Validation and connecting happen outside the lock so other threads are not blocked on I/O
+        if entry is not None:
+            entry = self._validate(entry)
+        if entry is None:
+            try:
+                entry = PooledConnection(self.factory())
+            except Exception:
+                self._forget()
+                raise
+
+        with self._cond:
+            self._in_use.add(entry)
+        return entry
+
+    def release(self, entry, discard=False):
+        """Returns a connection to the pool, or closes it if it is broken or the pool is shut down."""
+        with self._cond:
+            self._in_use.discard(entry)
+            if not discard and not self._closed:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._close_raw(entry)
+        self._forget()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a raw connection; ends any open transaction and returns it to the pool on exit."""
+        with self.checkout() as entry:
+            yield entry.raw
+
+    @contextmanager
+    def checkout(self):
+        """Like connection() but yields the PooledConnection, for callers keeping per-connection state."""
+        entry = self.acquire()
+        try:
+            yield entry
+        finally:
+            # After reads too: an open transaction would hand its REPEATABLE READ snapshot to the next checkout
+            broken = not self._end_transaction(entry.raw)
+            self.release(entry, discard=broken)
+
+    def metrics(self):
+        """Snapshot of pool usage: checkouts, waits and connection ages in seconds."""
+        now = time.monotonic()
+        with self._cond:
+            entries = list(self._idle) + list(self._in_use)
+            ages = [entry.age(now) for entry in entries]
+            return {
+                "pool_size": self.pool_size,
+                "open": self._opened,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+                "health_failures": self.health_failures,
+                "max_connection_age": round(max(ages), 3) if ages else 0.0,
+                "mean_connection_age": round(sum(ages) / len(ages), 3) if ages else 0.0,
+            }
+
+    def close(self):
+        """Closes every idle connection; checked-out connections are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_raw(entry)
+            self._forget()
+
+    def _validate(self, entry):
+        """Returns the entry if it is still usable, otherwise closes it and returns None."""
+        now = time.monotonic()
+        if entry.age(now) > self.max_age:
+            self.recycled += 1
+            self._close_raw(entry)
+            return None
+        if now - entry.last_used > self.health_check_after and not self._is_healthy(entry.raw):
+            self.health_failures += 1
+            self._close_raw(entry)
+            return None
+        return entry
+
+    @staticmethod
+    def _is_healthy(raw):
+        try:
+            is_connected = getattr(raw, "is_connected", None)
+            return is_connected() if is_connected else True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _end_transaction(raw):
+        """Rolls back whatever the caller left uncommitted; False if the connection is broken."""
+        try:
+            if getattr(raw, "in_transaction", True):  # Drivers that track it spare the round trip when idle
+                raw.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_raw(entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _forget(self):
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
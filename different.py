@@ -1,10 +1,96 @@
 import streamlit as st
 import random
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 import threading
-import queue
-from collections import defaultdict
+import os
+import numpy as np
+import pandas as pd
+from exam_store import SLOT_BOOKED, open_store
+from grading import AnswerKey, grade_cohort
+from lock_manager import LockManager
+from replication import Replicator
+from load_balancer import LoadBalancer
+from slot_booking import SLOT_FORMAT, SlotBookingService
+from concurrent.futures import ThreadPoolExecutor
+
+# "memory" keeps data per process; a file path gives a SQLite store shared by every process using it
+EXAM_STORE = os.environ.get("EXAM_STORE", "exam_system.db")
+
+
+@st.cache_resource
+def get_store():
+    """One store per process, shared by every session."""
+    return open_store(EXAM_STORE)
+
+
+# Rows per page in the admin and student exam lists
+PAGE_SIZE = 25
+
+# Seats per exam slot, and how many upcoming free slots a student is offered
+SLOT_CAPACITY = 30
+SLOTS_SHOWN = 10
+
+
+@st.cache_resource
+def get_slot_service():
+    """Availability index shared by every session; bookings themselves are atomic in the store."""
+    slots = SlotBookingService(get_store(), SLOT_CAPACITY)
+    # New exams get their slots when created; this covers exams created before slots existed, once per process
+    for exam_id in get_store().get_exams():
+        slots.ensure_default_slots(exam_id)
+    return slots
+
+
+# Cached queries: the store's version counters are part of the key, so any change from any session or
+# process misses the cache and everything else is served without touching the store
+
+
+@st.cache_data(max_entries=32)
+def exam_summaries(version, active_only=False):
+    """One row per exam for the list views."""
+    return [{"Exam": exam_id, "Duration (min)": exam["duration"], "Questions": len(exam["questions"]),
+             "Active": exam["active"]} for exam_id, exam in get_store().get_exams(active_only).items()]
+
+
+@st.cache_data(max_entries=32)
+def exam_report(exam_id, exams_version, responses_version):
+    """Graded rows for one exam plus per-question statistics, or (None, []) if the exam does not exist."""
+    db = ExamDatabase()
+    exam = db.get_exam(exam_id)
+    if not exam:
+        return None, []
+    report, result = grade_cohort(exam["questions"], db.get_responses(exam_id))
+    rows = [{"Student": username, "Score (%)": round(data["score"], 2), "Correct": data["correct_answers"],
+             "Total": data["total_questions"]} for username, data in report.items()]
+    return rows, result.question_statistics()
+
+
+def paginate(items, key, page_size=PAGE_SIZE):
+    """Shows a page picker when items do not fit on one page and returns the slice to render."""
+    pages = max(1, -(-len(items) // page_size))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=key) if pages > 1 else 1
+    st.caption(f"Page {page} of {pages} ({len(items)} total)")
+    return items[(page - 1) * page_size:page * page_size]
+
+
+# Seconds a session waits for a resource lock before giving up
+LOCK_TIMEOUT = 10
+
+
+@st.cache_resource
+def get_lock_manager():
+    """One lock manager per process so sessions actually exclude each other."""
+    return LockManager()
+
+
+# "async", "quorum" or "all": how many replicas must apply a change before replicate_data returns
+REPLICATION_ACKS = "quorum"
+
+
+@st.cache_resource
+def get_replication_executor():
+    """Threads that fan deltas out to replicas, shared by every session."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="replication")
 
 # Simulating distributed system components
 class Node:
@@ -12,9 +98,11 @@ class Node:
         self.id = node_id
         self.lamport_clock = 0
         self.is_coordinator = False
-        self.load = 0
+        self.load = 0             # Requests in flight, maintained by LoadBalancer
+        self.latency_ewma = 0.0   # Smoothed seconds per request on this node
         self.exam_data = {}
         self.replica_data = {}
+        self.replicated_seq = 0  # Last replication log entry applied to replica_data
         self.lock = threading.Lock()
 
 class DistributedExamSystem:
@@ -23,9 +111,14 @@ class DistributedExamSystem:
         if 'nodes' not in st.session_state:
             st.session_state.nodes = [Node(i) for i in range(3)]  # Creating 3 nodes
         self.nodes = st.session_state.nodes
+        if 'replicator' not in st.session_state:
+            st.session_state.replicator = Replicator(self.nodes, get_replication_executor(), REPLICATION_ACKS)
+        self.replicator = st.session_state.replicator
+        if 'balancer' not in st.session_state:
+            st.session_state.balancer = LoadBalancer(self.nodes)
+        self.balancer = st.session_state.balancer
         self.coordinator = None
-        self.message_queue = queue.Queue()
-        self.queue_lock = threading.Lock()  # Control access to the message queue
+        self.lock_manager = get_lock_manager()
         self.elect_coordinator()
         
     def lamport_timestamp(self, sender_node, receiver_node):
@@ -46,68 +139,82 @@ class DistributedExamSystem:
                 self.coordinator = node
                 
     def replicate_data(self, data, source_node):
-        """Data replication across nodes"""
-        with source_node.lock:  # Global lock for data replication
-            for node in self.nodes:
-                if node != source_node:
-                    node.replica_data.update(data)
-                    self.lamport_timestamp(source_node, node)
+        """Data replication across nodes: ships only changed keys, in parallel, as Lamport-stamped deltas"""
+        return self.replicator.replicate(data, source_node)
                 
     def load_balance(self):
-        """Simple load balancing implementation"""
-        loads = [node.load for node in self.nodes]
-        return self.nodes[loads.index(min(loads))]
+        """Power-of-two-choices on in-flight requests and EWMA latency; wrap the work in track(node)"""
+        return self.balancer.pick()
+
+    def track(self, node):
+        """Counts the enclosed work against node's load and latency"""
+        return self.balancer.track(node)
         
-    def acquire_lock(self, resource_id, node):
-        """Mutual exclusion implementation"""
-        with self.queue_lock:
-            while resource_id in [msg[1] for msg in self.message_queue.queue]:
-                time.sleep(0.1)
-            self.message_queue.put((node.id, resource_id))
-                
+    def acquire_lock(self, resource_id, node, timeout=LOCK_TIMEOUT):
+        """Mutual exclusion: waits in arrival (FIFO) order; returns False on timeout"""
+        # Node clocks are not synchronised (each advances only on its own events), so ordering waiters
+        # by them would let a node with a low clock jump the queue
+        return self.lock_manager.acquire(resource_id, self._lock_owner(node), timeout=timeout)
+
     def release_lock(self, resource_id, node):
         """Release mutual exclusion lock"""
-        with self.queue_lock:
-            try:
-                self.message_queue.queue.remove((node.id, resource_id))
-            except ValueError:
-                pass
+        self.lock_manager.release(resource_id, self._lock_owner(node))
+
+    def _lock_owner(self, node):
+        # Several sessions may act through the same node; each runs its script on its own thread
+        return (node.id, threading.get_ident())
 
 class ExamDatabase:
-    def __init__(self):
-        # Initialize with default data structures if they don't exist in session state
-        if 'users' not in st.session_state:
-            st.session_state.users = {}
-        if 'exams' not in st.session_state:
-            st.session_state.exams = {}
-        if 'responses' not in st.session_state:
-            st.session_state.responses = {}
-        if 'slots' not in st.session_state:
-            st.session_state.slots = defaultdict(list)
-        
+    """Thin facade over the shared exam store; see exam_store.py for the backends."""
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else get_store()
+
     def add_user(self, username, password, role):
-        st.session_state.users[username] = {"password": password, "role": role}
-        
+        return self.store.add_user(username, password, role)
+
+    def get_user(self, username):
+        return self.store.get_user(username)
+
     def add_exam(self, exam_id, questions, duration):
-        st.session_state.exams[exam_id] = {
-            "questions": questions,
-            "duration": duration,
-            "active": True
-        }
-        
+        return self.store.add_exam(exam_id, questions, duration)
+
+    def get_exam(self, exam_id):
+        return self.store.get_exam(exam_id)
+
+    def get_exams(self):
+        return self.store.get_exams()
+
+    def set_exam_active(self, exam_id, active):
+        self.store.set_exam_active(exam_id, active)
+
     def add_response(self, username, exam_id, responses):
-        st.session_state.responses[(username, exam_id)] = responses
-        
+        # Encoded once on submission so reports are a single array pass over the cohort
+        exam = self.store.get_exam(exam_id)
+        encoded = AnswerKey(exam["questions"]).encode_one(responses).tobytes() if exam else None
+        self.store.add_response(username, exam_id, responses, encoded)
+
+    def get_responses(self, exam_id):
+        return {username: np.frombuffer(encoded, dtype=np.int16)
+                for username, encoded in self.store.get_responses(exam_id).items() if encoded is not None}
+
     def add_slot(self, exam_id, slot_time):
-        if slot_time not in st.session_state.slots[exam_id]:
-            st.session_state.slots[exam_id].append(slot_time)
-        
+        self.store.add_slot(exam_id, slot_time)
+
+    def get_slots(self, exam_id):
+        return self.store.get_slots(exam_id)
+
     def get_available_exams(self):
-        return {k: v for k, v in st.session_state.exams.items() if v.get('active', True)}
+        return self.store.get_exams(active_only=True)
+
+    def version(self, name):
+        """Version counter of "exams", "responses" or "slots"; changes whenever that data does."""
+        return self.store.version(name)
 
 class ExamSystemUI:
     def __init__(self):
         self.db = ExamDatabase()
+        self.slots = get_slot_service()
         self.distributed_system = DistributedExamSystem()
         
     def login_page(self):
@@ -117,10 +224,11 @@ class ExamSystemUI:
         role = st.selectbox("Role", ["admin", "student"])
         
         if st.button("Login"):
-            if username not in st.session_state.users:
+            user = self.db.get_user(username)
+            if user is None:
                 self.db.add_user(username, password, role)
                 st.success("Account created successfully!")
-            elif st.session_state.users[username]["password"] == password:
+            elif user["password"] == password:
                 st.session_state.user = username
                 st.session_state.role = role
                 st.success("Logged in successfully!")
@@ -158,51 +266,54 @@ class ExamSystemUI:
             if st.button("Create Exam"):
                 if len(questions) == num_questions:
                     node = self.distributed_system.load_balance()
-                    self.distributed_system.acquire_lock(exam_id, node)
-                    
-                    try:
-                        if exam_id not in st.session_state.exams:
-                            self.db.add_exam(exam_id, questions, duration)
-                            # Replicate exam data
-                            self.distributed_system.replicate_data({exam_id: questions}, node)
-                            st.success(f"Exam '{exam_id}' created successfully!")
-                            st.rerun()
+                    with self.distributed_system.track(node):
+                        if not self.distributed_system.acquire_lock(exam_id, node):
+                            st.error("The exam is being modified by someone else; please try again.")
+                            created = None
                         else:
-                            st.error("An exam with this ID already exists!")
-                    finally:
-                        self.distributed_system.release_lock(exam_id, node)
+                            try:
+                                created = self.db.add_exam(exam_id, questions, duration)
+                                if created:
+                                    # Replicate exam data
+                                    self.distributed_system.replicate_data({exam_id: questions}, node)
+                            finally:
+                                self.distributed_system.release_lock(exam_id, node)
+                    if created:
+                        self.slots.ensure_default_slots(exam_id)
+                        st.success(f"Exam '{exam_id}' created successfully!")
+                        st.rerun()
+                    elif created is not None:
+                        st.error("An exam with this ID already exists!")
                 else:
                     st.error("Please complete all questions and options before creating the exam!")
         
-        # Show Created Exams
+        # Show Created Exams: one editable table per page instead of a block of widgets per exam
         st.header("Created Exams")
-        if st.session_state.exams:
-            for exam_id, exam in st.session_state.exams.items():
-                st.subheader(f"Exam: {exam_id}")
-                st.write(f"Duration: {exam['duration']} minutes")
-                st.write(f"Number of questions: {len(exam['questions'])}")
-                
-                # Add button to toggle exam visibility
-                active = st.checkbox("Active", value=exam.get('active', True), key=f"active_{exam_id}")
-                if active != exam.get('active', True):
-                    st.session_state.exams[exam_id]['active'] = active
-                    st.rerun()
+        summaries = exam_summaries(self.db.version("exams"))
+        if summaries:
+            page = paginate(summaries, "admin_exam_page")
+            edited = st.data_editor(pd.DataFrame(page), disabled=["Exam", "Duration (min)", "Questions"],
+                                    hide_index=True, use_container_width=True, key=f"admin_exams_{page[0]['Exam']}")
+            changed = [(row["Exam"], row["Active"]) for row, active in zip(page, edited["Active"])
+                       if bool(active) != row["Active"]]
+            for changed_exam, active in changed:
+                self.db.set_exam_active(changed_exam, bool(active))
+            if changed:
+                st.rerun()
         else:
             st.info("No exams have been created yet.")
                 
         # Generate Reports Section
-        if st.session_state.exams:
+        if summaries:
             st.header("Generate Reports")
-            exam_select = st.selectbox("Select Exam", list(st.session_state.exams.keys()))
+            exam_select = st.selectbox("Select Exam", [row["Exam"] for row in summaries])
             if st.button("Generate Report"):
-                report = self.generate_report(exam_select)
-                if report:
+                rows, question_stats = self.generate_report(exam_select)
+                if rows:
                     st.write("Exam Results:")
-                    for username, data in report.items():
-                        st.write(f"Student: {username}")
-                        st.write(f"Score: {data['score']:.2f}%")
-                        st.write(f"Correct Answers: {data['correct_answers']}/{data['total_questions']}")
-                        st.write("---")
+                    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+                    st.write("Question Statistics:")
+                    st.dataframe(pd.DataFrame(question_stats), hide_index=True, use_container_width=True)
                 else:
                     st.info("No submissions for this exam yet.")
             
@@ -211,37 +322,40 @@ class ExamSystemUI:
         
         # View Available Exams
         st.header("Available Exams")
-        available_exams = self.db.get_available_exams()
+        available_exams = exam_summaries(self.db.version("exams"), active_only=True)
         
         if available_exams:
-            for exam_id, exam in available_exams.items():
+            now = datetime.now().strftime(SLOT_FORMAT)
+            for exam in paginate(available_exams, "student_exam_page"):
+                exam_id = exam["Exam"]
                 st.subheader(f"Exam: {exam_id}")
-                st.write(f"Duration: {exam['duration']} minutes")
-                st.write(f"Number of questions: {len(exam['questions'])}")
-                
-                # Book Slot
-                available_slots = st.session_state.slots.get(exam_id, [])
-                if not available_slots:
-                    # Create default slots for next 7 days
-                    current_date = datetime.now()
-                    for i in range(7):
-                        slot_time = (current_date.replace(hour=9, minute=0, second=0) + 
-                                   timedelta(days=i)).strftime("%Y-%m-%d %H:%M:%S")
-                        self.db.add_slot(exam_id, slot_time)
-                    available_slots = st.session_state.slots[exam_id]
+                st.write(f"Duration: {exam['Duration (min)']} minutes")
+                st.write(f"Number of questions: {exam['Questions']}")
                 
+                # Book Slot: upcoming slots with free seats come straight from the in-memory index
+                booked_slot = self.slots.booking(exam_id, st.session_state.user)
+                if booked_slot:
+                    st.write(f"Your slot: {booked_slot}")
+                free_slots = {f"{slot_time} ({seats} seats left)": slot_time
+                              for slot_time, seats in self.slots.next_free(exam_id, SLOTS_SHOWN, after=now)}
                 selected_slot = st.selectbox(
                     f"Available Slots for {exam_id}",
-                    available_slots,
+                    list(free_slots),
                     key=f"slot_{exam_id}"
                 )
                 
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    if st.button(f"Book Slot for {exam_id}", key=f"book_{exam_id}"):
-                        st.session_state.user_slot = (exam_id, selected_slot)
-                        st.success(f"Slot booked for {exam_id} on {selected_slot}")
+                    if st.button(f"Book Slot for {exam_id}", key=f"book_{exam_id}", disabled=not free_slots):
+                        status = self.slots.book(exam_id, free_slots[selected_slot], st.session_state.user)
+                        if status == SLOT_BOOKED:
+                            st.success(f"Slot booked for {exam_id} on {free_slots[selected_slot]}")
+                        else:
+                            st.error(status)
+                    if booked_slot and st.button(f"Cancel Booking for {exam_id}", key=f"cancel_{exam_id}"):
+                        self.slots.cancel(exam_id, st.session_state.user)
+                        st.rerun()
                 
                 with col2:
                     if st.button(f"Take Exam {exam_id}", key=f"take_{exam_id}"):
@@ -253,24 +367,8 @@ class ExamSystemUI:
             st.info("No exams available.")
 
     def generate_report(self, exam_id):
-        exam = st.session_state.exams.get(exam_id)
-        if not exam:
-            return None
-        total_questions = len(exam["questions"])
-        report = {}
-        for (username, ex_id), responses in st.session_state.responses.items():
-            if ex_id == exam_id:
-                correct_answers = sum(
-                    1 for i, q in enumerate(exam["questions"])
-                    if responses.get(i) == q["correct_answer"]
-                )
-                score = (correct_answers / total_questions) * 100
-                report[username] = {
-                    "score": score,
-                    "correct_answers": correct_answers,
-                    "total_questions": total_questions
-                }
-        return report
+        """Report rows and question statistics, graded once per change to the exams or submissions."""
+        return exam_report(exam_id, self.db.version("exams"), self.db.version("responses"))
 
     def exam_page(self):
         exam_id = st.session_state.get("current_exam")
@@ -280,7 +378,7 @@ class ExamSystemUI:
             st.write("No exam selected.")
             return
         
-        exam = st.session_state.exams.get(exam_id)
+        exam = self.db.get_exam(exam_id)
         if exam and question_idx < len(exam["questions"]):
             question = exam["questions"][question_idx]
             st.write(f"Question {question_idx + 1}: {question['question']}")
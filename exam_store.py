@@ -0,0 +1,368 @@
+# Storage backends for the exam system UI: users, exams, submissions and slots live in one store
+# shared by every Streamlit session (and, with SQLite, every process) instead of st.session_state
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Seats per slot when the caller does not say
+DEFAULT_SLOT_CAPACITY = 30
+
+SLOT_BOOKED = "Slot booked"
+SLOT_FULL = "Slot is full"
+SLOT_NOT_FOUND = "Slot not found"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS users ("
+    " username TEXT PRIMARY KEY, password TEXT NOT NULL, role TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS exams ("
+    " exam_id TEXT PRIMARY KEY, questions TEXT NOT NULL, duration INTEGER NOT NULL,"
+    " active INTEGER NOT NULL DEFAULT 1)",
+    "CREATE TABLE IF NOT EXISTS responses ("
+    " exam_id TEXT NOT NULL, username TEXT NOT NULL, responses TEXT NOT NULL, encoded BLOB,"
+    " PRIMARY KEY (exam_id, username))",
+    "CREATE TABLE IF NOT EXISTS slots ("
+    f" exam_id TEXT NOT NULL, slot_time TEXT NOT NULL, capacity INTEGER NOT NULL DEFAULT {DEFAULT_SLOT_CAPACITY},"
+    " booked INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (exam_id, slot_time))",
+    "CREATE TABLE IF NOT EXISTS bookings ("
+    " exam_id TEXT NOT NULL, username TEXT NOT NULL, slot_time TEXT NOT NULL, PRIMARY KEY (exam_id, username))",
+    # Bumped in the same transaction as every change to a table so readers can cache what they parsed
+    "CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO versions (name, version) VALUES ('exams', 0), ('responses', 0), ('slots', 0)",
+)
+
+# Fixed, parameterized statements: sqlite3 keeps each one compiled in the connection's statement cache
+INSERT_USER_SQL = "INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, ?)"
+SELECT_USER_SQL = "SELECT password, role FROM users WHERE username = ?"
+INSERT_EXAM_SQL = "INSERT OR IGNORE INTO exams (exam_id, questions, duration, active) VALUES (?, ?, ?, 1)"
+SELECT_EXAMS_SQL = "SELECT exam_id, questions, duration, active FROM exams ORDER BY exam_id"
+UPDATE_EXAM_ACTIVE_SQL = "UPDATE exams SET active = ? WHERE exam_id = ?"
+BUMP_VERSION_SQL = "UPDATE versions SET version = version + 1 WHERE name = ?"
+SELECT_VERSION_SQL = "SELECT version FROM versions WHERE name = ?"
+UPSERT_RESPONSE_SQL = "REPLACE INTO responses (exam_id, username, responses, encoded) VALUES (?, ?, ?, ?)"
+SELECT_RESPONSES_SQL = "SELECT username, encoded FROM responses WHERE exam_id = ?"
+INSERT_SLOT_SQL = "INSERT OR IGNORE INTO slots (exam_id, slot_time, capacity) VALUES (?, ?, ?)"
+SELECT_SLOTS_SQL = "SELECT slot_time FROM slots WHERE exam_id = ? ORDER BY slot_time"
+SELECT_SLOT_TABLE_SQL = "SELECT slot_time, capacity, booked FROM slots WHERE exam_id = ? ORDER BY slot_time"
+SELECT_SLOT_SQL = "SELECT 1 FROM slots WHERE exam_id = ? AND slot_time = ?"
+# Conditional UPDATEs keep capacity correct even with several processes booking at once
+TAKE_SEAT_SQL = "UPDATE slots SET booked = booked + 1 WHERE exam_id = ? AND slot_time = ? AND booked < capacity"
+RELEASE_SEAT_SQL = "UPDATE slots SET booked = booked - 1 WHERE exam_id = ? AND slot_time = ? AND booked > 0"
+SELECT_BOOKING_SQL = "SELECT slot_time FROM bookings WHERE exam_id = ? AND username = ?"
+UPSERT_BOOKING_SQL = "REPLACE INTO bookings (exam_id, username, slot_time) VALUES (?, ?, ?)"
+DELETE_BOOKING_SQL = "DELETE FROM bookings WHERE exam_id = ? AND username = ?"
+
+
+class MemoryStore:
+    """Process-wide dictionaries behind a lock; shared by all sessions of one Streamlit process, not persisted."""
+
+    def __init__(self):
+        self._users = {}
+        self._exams = {}
+        self._responses = defaultdict(dict)  # exam_id -> {username: (responses, encoded)}
+        self._slots = defaultdict(dict)     # exam_id -> {slot_time: [capacity, booked]}
+        self._bookings = defaultdict(dict)  # exam_id -> {username: slot_time}
+        self._versions = {"exams": 0, "responses": 0, "slots": 0}
+        self._lock = threading.Lock()
+
+    def version(self, name):
+        """Changes whenever the exams, responses or slots change."""
+        return self._versions[name]
+
+    def add_user(self, username, password, role):
+        """Creates the user unless the name is taken; returns True if it was created."""
+        with self._lock:
+            if username in self._users:
+                return False
+            self._users[username] = {"password": password, "role": role}
+            return True
+
+    def get_user(self, username):
+        with self._lock:
+            user = self._users.get(username)
+            return dict(user) if user else None
+
+    def add_exam(self, exam_id, questions, duration):
+        """Creates the exam unless the ID is taken; returns True if it was created."""
+        with self._lock:
+            if exam_id in self._exams:
+                return False
+            self._exams[exam_id] = {"questions": questions, "duration": duration, "active": True}
+            self._versions["exams"] += 1
+            return True
+
+    def get_exam(self, exam_id):
+        with self._lock:
+            exam = self._exams.get(exam_id)
+            return dict(exam) if exam else None
+
+    def get_exams(self, active_only=False):
+        with self._lock:
+            return {exam_id: dict(exam) for exam_id, exam in self._exams.items()
+                    if exam["active"] or not active_only}
+
+    def set_exam_active(self, exam_id, active):
+        with self._lock:
+            if exam_id in self._exams:
+                self._exams[exam_id]["active"] = bool(active)
+                self._versions["exams"] += 1
+
+    def add_response(self, username, exam_id, responses, encoded=None):
+        with self._lock:
+            self._responses[exam_id][username] = (dict(responses), encoded)
+            self._versions["responses"] += 1
+
+    def get_responses(self, exam_id):
+        """Returns {username: encoded responses} for one exam."""
+        with self._lock:
+            return {username: encoded for username, (_, encoded) in self._responses.get(exam_id, {}).items()}
+
+    def add_slot(self, exam_id, slot_time, capacity=DEFAULT_SLOT_CAPACITY):
+        self.add_slots(exam_id, [slot_time], capacity)
+
+    def add_slots(self, exam_id, slot_times, capacity=DEFAULT_SLOT_CAPACITY):
+        """Creates the slots that do not exist yet; existing slots keep their capacity and bookings."""
+        with self._lock:
+            slots = self._slots[exam_id]
+            added = [slot_time for slot_time in slot_times if slot_time not in slots]
+            for slot_time in added:
+                slots[slot_time] = [capacity, 0]
+            if added:
+                self._versions["slots"] += 1
+
+    def get_slots(self, exam_id):
+        with self._lock:
+            return sorted(self._slots.get(exam_id, {}))
+
+    def get_slot_table(self, exam_id):
+        """Returns [(slot_time, capacity, booked)] in time order."""
+        with self._lock:
+            return [(slot_time, capacity, booked) for slot_time, (capacity, booked)
+                    in sorted(self._slots.get(exam_id, {}).items())]
+
+    def book_slot(self, exam_id, slot_time, username):
+        """Books (or moves) username's seat for an exam; returns (status, slot username held before or None)."""
+        with self._lock:
+            slot = self._slots.get(exam_id, {}).get(slot_time)
+            if slot is None:
+                return SLOT_NOT_FOUND, None
+            current = self._bookings[exam_id].get(username)
+            if current == slot_time:
+                return SLOT_BOOKED, current
+            if slot[1] >= slot[0]:
+                return SLOT_FULL, None
+            slot[1] += 1
+            if current is not None:
+                self._slots[exam_id][current][1] -= 1
+            self._bookings[exam_id][username] = slot_time
+            self._versions["slots"] += 1
+            return SLOT_BOOKED, current
+
+    def cancel_booking(self, exam_id, username):
+        """Frees username's seat; returns the slot it was in, or None if there was no booking."""
+        with self._lock:
+            slot_time = self._bookings.get(exam_id, {}).pop(username, None)
+            if slot_time is not None:
+                self._slots[exam_id][slot_time][1] -= 1
+                self._versions["slots"] += 1
+            return slot_time
+
+    def get_booking(self, exam_id, username):
+        with self._lock:
+            return self._bookings.get(exam_id, {}).get(username)
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    """SQLite in WAL mode: readers never block the writer, and every session and process sees the same data.
+
+    Connections come from a small pool shared by all threads: Streamlit runs reruns on short-lived
+    threads, so connections are borrowed per call, and their compiled statements are reused by every rerun.
+    """
+
+    def __init__(self, path, busy_timeout=5.0, cached_statements=64, pool_size=8):
+        self.path = path
+        self.busy_timeout = busy_timeout            # Seconds a writer waits for another writer's lock
+        self.cached_statements = cached_statements  # Compiled statements kept per connection
+        self.pool_size = pool_size                  # Connections opened at most; more callers wait for one
+        self._idle = deque()
+        self._opened = 0
+        self._pool_cond = threading.Condition()
+        self._exams_cache = (None, {})  # (exams version, {exam_id: exam}) shared by all threads
+        with self._connection() as connection, connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            # Databases created before slots had capacities
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(slots)")}
+            if "capacity" not in columns:
+                connection.execute(f"ALTER TABLE slots ADD COLUMN capacity INTEGER NOT NULL "
+                                   f"DEFAULT {DEFAULT_SLOT_CAPACITY}")
+                connection.execute("ALTER TABLE slots ADD COLUMN booked INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connection(self):
+        """Borrows a pooled connection for the duration of the block."""
+        with self._pool_cond:
+            while not self._idle and self._opened >= self.pool_size:
+                self._pool_cond.wait()
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                self._opened += 1
+        try:
+            if connection is None:
+                connection = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                                             cached_statements=self.cached_statements)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; fsync happens at checkpoints
+        except BaseException:
+            with self._pool_cond:
+                self._opened -= 1
+                self._pool_cond.notify()
+            raise
+        try:
+            yield connection
+        finally:
+            with self._pool_cond:
+                self._idle.append(connection)
+                self._pool_cond.notify()
+
+    def _write(self, statement, params, bump=None):
+        with self._connection() as connection, connection:  # Commits, or rolls back on error
+            rowcount = connection.execute(statement, params).rowcount
+            if bump and rowcount:
+                connection.execute(BUMP_VERSION_SQL, (bump,))
+            return rowcount
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so a read-then-write cannot race another process
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
+
+    def _read(self, statement, params=()):
+        with self._connection() as connection:
+            return connection.execute(statement, params).fetchall()
+
+    def add_user(self, username, password, role):
+        """Creates the user unless the name is taken; returns True if it was created."""
+        return self._write(INSERT_USER_SQL, (username, password, role)) == 1
+
+    def get_user(self, username):
+        rows = self._read(SELECT_USER_SQL, (username,))
+        return {"password": rows[0][0], "role": rows[0][1]} if rows else None
+
+    def version(self, name):
+        """Changes whenever any process changes the exams, responses or slots."""
+        return self._read(SELECT_VERSION_SQL, (name,))[0][0]
+
+    def add_exam(self, exam_id, questions, duration):
+        """Creates the exam unless the ID is taken; returns True if it was created."""
+        return self._write(INSERT_EXAM_SQL, (exam_id, json.dumps(questions), duration), bump="exams") == 1
+
+    def get_exam(self, exam_id):
+        exam = self._cached_exams().get(exam_id)
+        return dict(exam) if exam else None
+
+    def get_exams(self, active_only=False):
+        return {exam_id: dict(exam) for exam_id, exam in self._cached_exams().items()
+                if exam["active"] or not active_only}
+
+    def set_exam_active(self, exam_id, active):
+        self._write(UPDATE_EXAM_ACTIVE_SQL, (int(bool(active)), exam_id), bump="exams")
+
+    def _cached_exams(self):
+        # A one-row primary-key read decides whether the parsed exams are still current
+        version = self.version("exams")
+        cached_version, exams = self._exams_cache
+        if version != cached_version:
+            # Rows read after the version are at least that new; a change in between forces another reload
+            rows = self._read(SELECT_EXAMS_SQL)
+            exams = {exam_id: {"questions": json.loads(questions), "duration": duration, "active": bool(active)}
+                     for exam_id, questions, duration, active in rows}
+            self._exams_cache = (version, exams)
+        return exams
+
+    def add_response(self, username, exam_id, responses, encoded=None):
+        # JSON object keys are strings; grading.AnswerKey normalizes them back to question indices
+        self._write(UPSERT_RESPONSE_SQL, (exam_id, username, json.dumps(responses), encoded), bump="responses")
+
+    def get_responses(self, exam_id):
+        """Returns {username: encoded responses} for one exam."""
+        return dict(self._read(SELECT_RESPONSES_SQL, (exam_id,)))
+
+    def add_slot(self, exam_id, slot_time, capacity=DEFAULT_SLOT_CAPACITY):
+        self.add_slots(exam_id, [slot_time], capacity)
+
+    def add_slots(self, exam_id, slot_times, capacity=DEFAULT_SLOT_CAPACITY):
+        """Creates the slots that do not exist yet; existing slots keep their capacity and bookings."""
+        with self._transaction() as connection:
+            added = sum(connection.execute(INSERT_SLOT_SQL, (exam_id, slot_time, capacity)).rowcount
+                        for slot_time in slot_times)
+            if added:
+                connection.execute(BUMP_VERSION_SQL, ("slots",))
+
+    def get_slots(self, exam_id):
+        return [row[0] for row in self._read(SELECT_SLOTS_SQL, (exam_id,))]
+
+    def get_slot_table(self, exam_id):
+        """Returns [(slot_time, capacity, booked)] in time order."""
+        return self._read(SELECT_SLOT_TABLE_SQL, (exam_id,))
+
+    def book_slot(self, exam_id, slot_time, username):
+        """Books (or moves) username's seat for an exam; returns (status, slot username held before or None)."""
+        with self._transaction() as connection:
+            row = connection.execute(SELECT_BOOKING_SQL, (exam_id, username)).fetchone()
+            current = row[0] if row else None
+            if current == slot_time:
+                return SLOT_BOOKED, current
+            if not connection.execute(TAKE_SEAT_SQL, (exam_id, slot_time)).rowcount:
+                exists = connection.execute(SELECT_SLOT_SQL, (exam_id, slot_time)).fetchone()
+                return (SLOT_FULL if exists else SLOT_NOT_FOUND), None
+            if current is not None:
+                connection.execute(RELEASE_SEAT_SQL, (exam_id, current))
+            connection.execute(UPSERT_BOOKING_SQL, (exam_id, username, slot_time))
+            connection.execute(BUMP_VERSION_SQL, ("slots",))
+            return SLOT_BOOKED, current
+
+    def cancel_booking(self, exam_id, username):
+        """Frees username's seat; returns the slot it was in, or None if there was no booking."""
+        with self._transaction() as connection:
+            row = connection.execute(SELECT_BOOKING_SQL, (exam_id, username)).fetchone()
+            if row is None:
+                return None
+            connection.execute(DELETE_BOOKING_SQL, (exam_id, username))
+            connection.execute(RELEASE_SEAT_SQL, (exam_id, row[0]))
+            connection.execute(BUMP_VERSION_SQL, ("slots",))
+            return row[0]
+
+    def get_booking(self, exam_id, username):
+        rows = self._read(SELECT_BOOKING_SQL, (exam_id, username))
+        return rows[0][0] if rows else None
+
+    def close(self):
+        """Closes the idle connections; ones still borrowed are returned to the pool and reopened later."""
+        with self._pool_cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+        for connection in idle:
+            connection.close()
+
+
+def open_store(location):
+    """Opens the store named by location: "memory" or the path of a SQLite database file."""
+    if location == "memory":
+        return MemoryStore()
+    directory = os.path.dirname(os.path.abspath(location))
+    os.makedirs(directory, exist_ok=True)
+    return SQLiteStore(location)
@@ -0,0 +1,105 @@
+# Vectorized grading: answer keys and responses are encoded as option-index arrays so a whole
+# exam cohort is scored in one NumPy pass, along with per-question item statistics
+import numpy as np
+
+UNANSWERED = -1
+
+
+class AnswerKey:
+    """An exam's questions encoded as option indices."""
+
+    def __init__(self, questions):
+        self.num_questions = len(questions)
+        self.num_options = max((len(q["options"]) for q in questions), default=0)
+        self._option_index = [{option: i for i, option in enumerate(q["options"])} for q in questions]
+        self.key = np.array([index.get(q["correct_answer"], UNANSWERED)
+                             for index, q in zip(self._option_index, questions)], dtype=np.int16)
+
+    def encode(self, submissions):
+        """Encodes [{question_idx: selected option}] as an (n_students, n_questions) int16 matrix.
+
+        Rows that are already encoded arrays are copied as they are; unanswered questions and
+        options that are not on the paper become UNANSWERED.
+        """
+        rows = []
+        for responses in submissions:
+            if isinstance(responses, np.ndarray):
+                rows.append(responses)  # Already encoded with encode_one
+                continue
+            if any(not isinstance(question_idx, int) for question_idx in responses):
+                responses = {int(question_idx): option for question_idx, option in responses.items()}
+            get = responses.get
+            rows.append([index.get(get(i), UNANSWERED) for i, index in enumerate(self._option_index)])
+        if not rows:
+            return np.empty((0, self.num_questions), dtype=np.int16)
+        if all(isinstance(row, np.ndarray) for row in rows):
+            return np.stack(rows).astype(np.int16, copy=False)
+        return np.array(rows, dtype=np.int16)
+
+    def encode_one(self, responses):
+        """Encodes a single submission so it can be stored ready for grading."""
+        return self.encode([responses])[0]
+
+
+class CohortResult:
+    """Scores for every student plus per-question difficulty, discrimination and option counts."""
+
+    def __init__(self, key, matrix):
+        correct = (matrix == key.key) & (key.key != UNANSWERED)
+        self.correct = correct
+        self.correct_answers = correct.sum(axis=1)
+        self.total_questions = key.num_questions
+        self.scores = self.correct_answers / max(key.num_questions, 1) * 100
+
+        if len(matrix):
+            # Difficulty: share of the cohort answering each question correctly (the item p-value)
+            self.difficulty = correct.mean(axis=0)
+            # Discrimination: correlation between getting a question right and the rest of the score
+            rest = self.correct_answers[:, None] - correct
+            self.discrimination = _column_correlation(correct.astype(np.float64), rest.astype(np.float64))
+        else:
+            self.difficulty = self.discrimination = np.zeros(key.num_questions)
+
+        # Option distribution: counts per (question, option) with a final column for unanswered
+        options = np.where(matrix == UNANSWERED, key.num_options, matrix).astype(np.int64)
+        flat = options + np.arange(key.num_questions) * (key.num_options + 1)
+        self.option_counts = np.bincount(flat.ravel(), minlength=key.num_questions * (key.num_options + 1)) \
+            .reshape(key.num_questions, key.num_options + 1)
+
+    def question_statistics(self):
+        return [
+            {
+                "question": i + 1,
+                "difficulty": round(float(self.difficulty[i]), 3),
+                "discrimination": round(float(self.discrimination[i]), 3),
+                "option_counts": self.option_counts[i, :-1].tolist(),
+                "unanswered": int(self.option_counts[i, -1]),
+            }
+            for i in range(self.total_questions)
+        ]
+
+
+def _column_correlation(a, b):
+    """Pearson correlation of each column of a with the same column of b; 0 where either is constant."""
+    a = a - a.mean(axis=0)
+    b = b - b.mean(axis=0)
+    denominator = np.sqrt((a * a).sum(axis=0) * (b * b).sum(axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = (a * b).sum(axis=0) / denominator
+    return np.nan_to_num(correlation)
+
+
+def grade_cohort(questions, submissions):
+    """Grades {username: {question_idx: option} or encoded row} for one exam; returns (report, CohortResult)."""
+    key = AnswerKey(questions)
+    usernames = list(submissions)
+    result = CohortResult(key, key.encode([submissions[u] for u in usernames]))
+    report = {
+        username: {
+            "score": float(result.scores[row]),
+            "correct_answers": int(result.correct_answers[row]),
+            "total_questions": result.total_questions,
+        }
+        for row, username in enumerate(usernames)
+    }
+    return report, result
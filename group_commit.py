@@ -0,0 +1,173 @@
+# Group commit for registrations: increments arriving within a short window are applied
+# in one transaction with a single UPDATE ... CASE, and each caller still gets its own result
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as ResultTimeout
+
+import metrics
+from queries import ExamIds
+from registration import REGISTERED, NOT_FOUND, EXAM_FULL, TIMED_OUT
+
+
+class GroupCommitter:
+    def __init__(self, pool, capacity, window=0.005, max_batch=500, exam_ids=None):
+        self.pool = pool            # ConnectionPool shared with the RPC handlers
+        self.capacity = capacity    # Maximum registrations per exam
+        self.window = window        # Seconds to keep collecting after the first request of a batch
+        self.max_batch = max_batch  # Flush early once this many requests are waiting
+        self.exam_ids = exam_ids or ExamIds(pool)  # Resolves the exam names students type to primary keys
+        self._pending = []
+        self._cond = threading.Condition()
+        self._running = True
+
+        # Metrics
+        self.batches = 0
+        self.registrations = 0
+        self.largest_batch = 0
+
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, exam_id):
+        """Queues one registration and returns a Future resolving to its status message."""
+        future = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Group committer is stopped")
+            self._pending.append((exam_id, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def register(self, exam_id, timeout=None):
+        """Registers once and returns its status message; TIMED_OUT means it was withdrawn, not applied."""
+        return self._result(self.submit(exam_id), None if timeout is None else time.monotonic() + timeout)
+
+    def register_many(self, exam_ids, timeout=None):
+        """Queues several registrations at once; they usually land in the same transaction."""
+        futures = [self.submit(exam_id) for exam_id in exam_ids]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return [self._result(future, deadline) for future in futures]
+
+    @staticmethod
+    def _result(future, deadline):
+        try:
+            return future.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except ResultTimeout:
+            if future.cancel():
+                return TIMED_OUT  # Still queued, so the flusher skips it: the caller's answer stays true
+            return future.result()  # Already in a transaction; wait for what it did
+
+    def stats(self):
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "registrations": self.registrations,
+                "largest_batch": self.largest_batch,
+                "pending": len(self._pending),
+            }
+
+    def queue_depth(self):
+        """Registrations submitted but not yet taken into a batch."""
+        with self._cond:
+            return len(self._pending)
+
+    def stop(self):
+        """Flushes whatever is queued and stops the commit thread."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Keep collecting for a few milliseconds so concurrent callers share the commit
+                deadline = time.monotonic() + self.window
+                while self._running and len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            # Callers that gave up in the meantime cancelled their futures; from here on none can
+            taken = time.monotonic()
+            running = []
+            for exam_id, future, submitted in batch:
+                if future.set_running_or_notify_cancel():
+                    metrics.observe("group_commit_wait_seconds", taken - submitted)
+                    running.append((exam_id, future))
+            batch = running
+            if not batch:
+                continue
+
+            try:
+                with metrics.timer("group_commit_flush_seconds"):
+                    results = self._apply(batch)
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+
+            with self._cond:
+                self.batches += 1
+                self.registrations += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _apply(self, batch):
+        """Applies a batch in one transaction and returns one status message per request."""
+        exam_pks = {exam_id: self.exam_ids.resolve(exam_id) for exam_id, _ in batch}
+        requested = OrderedDict()
+        for exam_id, _ in batch:
+            exam_pk = exam_pks[exam_id]
+            if exam_pk is not None:
+                requested[exam_pk] = requested.get(exam_pk, 0) + 1
+        granted = {}
+        if requested:
+            ids = sorted(requested)  # Rows are locked in key order so concurrent batches cannot deadlock
+            placeholders = ", ".join(["%s"] * len(ids))
+            # The batch decides how many placeholders these statements have, so they run as plain text:
+            # prepared, nearly every batch shape would be a new server-side statement evicting the hot ones
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    f"SELECT id, Student_registered FROM scheduled WHERE id IN ({placeholders}) FOR UPDATE", ids)
+                current = dict(cursor.fetchall())
+
+                # Grant each exam as many seats as requested, up to its remaining capacity
+                granted = {exam_pk: max(0, min(count, self.capacity - current[exam_pk]))
+                           for exam_pk, count in requested.items() if exam_pk in current}
+                increments = [(exam_pk, count) for exam_pk, count in granted.items() if count]
+                if increments:
+                    cases = " ".join(["WHEN %s THEN Student_registered + %s"] * len(increments))
+                    params = [value for increment in increments for value in increment]
+                    params += [exam_pk for exam_pk, _ in increments]
+                    cursor.execute(
+                        f"UPDATE scheduled SET Student_registered = CASE id {cases} ELSE Student_registered END "
+                        f"WHERE id IN ({', '.join(['%s'] * len(increments))})",
+                        params,
+                    )
+                cursor.close()
+                connection.commit()
+
+        # Hand out seats in arrival order
+        results = []
+        for exam_id, _ in batch:
+            exam_pk = exam_pks[exam_id]
+            if exam_pk not in granted:
+                if exam_pk is not None:
+                    self.exam_ids.forget(exam_id)  # The row was deleted after its id was cached
+                results.append(NOT_FOUND)
+            elif granted[exam_pk] > 0:
+                granted[exam_pk] -= 1
+                results.append(REGISTERED)
+            else:
+                results.append(EXAM_FULL)
+        return results
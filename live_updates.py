@@ -0,0 +1,212 @@
+# Server push: events (schedule changes, exam start/stop) go into a bounded, sequenced history; clients long-poll for events after the last sequence number they saw, over RPC or as a
+# server-sent-events stream, instead of re-calling the server on a timer.
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BROADCAST = None  # Session of events addressed to every subscriber
+
+
+class EventHub:
+    def __init__(self, history=1000, max_wait=25, check_interval=1.0):
+        self.max_wait = max_wait              # Longest a poll may block, in seconds
+        self.check_interval = check_interval  # Seconds between checks for exams whose time is up
+        self._events = deque(maxlen=history)  # (seq, session or BROADCAST, topic, data, time)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._timers = {}  # (session_code, exam_id) -> deadline (time.time())
+        self._running = True
+
+        # Metrics
+        self.published = 0
+        self.waiting = 0
+        self.resets = 0
+
+        self._expirer = threading.Thread(target=self._expiry_loop, name="live-updates-timers", daemon=True)
+        self._expirer.start()
+
+    def publish(self, topic, data, session_code=BROADCAST):
+        """Appends an event for one session (or everyone) and wakes the pollers; returns its sequence number."""
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, session_code, topic, data, time.time()))
+            self.published += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def poll(self, session_codes, since=0, timeout=None):
+        """Events after `since` for the given session(s) and broadcasts, waiting up to `timeout` for one.
+
+        Returns {"seq": position to pass as `since` next time, "events": [...], "reset": bool}. A reset
+        means events after `since` already fell out of the history, so the caller should reload its state.
+        """
+        sessions = {session_codes} if isinstance(session_codes, str) else set(session_codes)
+        timeout = self.max_wait if timeout is None else min(timeout, self.max_wait)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if since > self._seq:
+                self.resets += 1
+                return {"seq": self._seq, "events": [], "reset": True}
+            self.waiting += 1
+            scanned = since  # Events up to here were for other sessions; wakeups only look at newer ones
+            try:
+                while True:
+                    if self._evicted(scanned):  # Publishers outran the history while this poll waited
+                        self.resets += 1
+                        return {"seq": self._seq, "events": [], "reset": True}
+                    events = [_as_dict(event) for event in self._since(scanned)
+                              if event[1] is BROADCAST or event[1] in sessions]
+                    scanned = self._seq
+                    remaining = deadline - time.monotonic()
+                    if events or remaining <= 0 or not self._running:
+                        return {"seq": self._seq, "events": events, "reset": False}
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+    def start_timer(self, session_code, exam_id, remaining):
+        """Sends exam_started with the exam's deadline now, and exam_stopped when time is up.
+
+        There are no per-second ticks: clients count down to the deadline themselves, so a running exam
+        costs two events rather than one per second in the shared history.
+        """
+        deadline = time.time() + remaining
+        with self._cond:
+            self._timers[(session_code, exam_id)] = deadline
+        self.publish("exam_started", {"exam": exam_id, "remaining": int(remaining), "deadline": deadline},
+                     session_code)
+
+    def stop_timer(self, session_code, exam_id, reason):
+        with self._cond:
+            running = self._timers.pop((session_code, exam_id), None) is not None
+        if running:
+            self.publish("exam_stopped", {"exam": exam_id, "reason": reason}, session_code)
+
+    def stats(self):
+        with self._cond:
+            return {"seq": self._seq, "history": len(self._events), "published": self.published,
+                    "waiting": self.waiting, "timers": len(self._timers), "resets": self.resets}
+
+    @property
+    def closed(self):
+        return not self._running
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _evicted(self, since):
+        # Events after since were dropped from the front of the history to make room
+        return bool(self._events) and since < self._events[0][0] - 1
+
+    def _since(self, since):
+        # The history is in sequence order, so walk back from the newest event
+        events = []
+        for event in reversed(self._events):
+            if event[0] <= since:
+                break
+            events.append(event)
+        events.reverse()
+        return events
+
+    def _expiry_loop(self):
+        while True:
+            time.sleep(self.check_interval)
+            if not self._running:
+                return
+            now = time.time()
+            with self._cond:
+                expired = [key for key, deadline in self._timers.items() if deadline <= now]
+            for session_code, exam_id in expired:
+                self.stop_timer(session_code, exam_id, "time_up")
+
+
+def _as_dict(event):
+    seq, session_code, topic, data, at = event
+    return {"seq": seq, "session": session_code, "topic": topic, "data": data, "time": at}
+
+
+class CoalescingPublisher:
+    """Publishes load() on a topic at most once per interval, however often mark_dirty() is called.
+
+    A burst of registrations becomes one schedule read and one event instead of one each.
+    """
+
+    def __init__(self, hub, topic, load, interval=0.5):
+        self.hub = hub
+        self.topic = topic
+        self.load = load
+        self.interval = interval
+        self._dirty = threading.Event()
+        self._stopped = False
+        self.publishes = 0
+        threading.Thread(target=self._run, name=f"publish-{topic}", daemon=True).start()
+
+    def mark_dirty(self):
+        self._dirty.set()
+
+    def stop(self):
+        self._stopped = True
+        self._dirty.set()
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            if self._stopped:
+                return
+            time.sleep(self.interval)  # Let the rest of the burst arrive
+            self._dirty.clear()
+            try:
+                self.hub.publish(self.topic, self.load())
+                self.publishes += 1
+            except Exception:
+                self._dirty.set()  # The next round retries
+
+
+class _EventStreamHandler(BaseHTTPRequestHandler):
+    hub = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path != "/events" or "session" not in query:
+            self.send_error(404 if url.path != "/events" else 400)
+            return
+        since = int(self.headers.get("Last-Event-ID") or query.get("since", ["0"])[0])
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not self.hub.closed:
+                reply = self.hub.poll(query["session"], since)
+                since = reply["seq"]
+                if reply["reset"]:
+                    chunk = f"id: {since}\nevent: reset\ndata: {{}}\n\n"
+                elif reply["events"]:
+                    chunk = "".join(f"id: {event['seq']}\nevent: {event['topic']}\n"
+                                    f"data: {json.dumps(event['data'], default=str)}\n\n"
+                                    for event in reply["events"])
+                else:
+                    chunk = ": keepalive\n\n"  # Lets proxies and the client notice a dead connection
+                self.wfile.write(chunk.encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The browser went away
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_sse_server(hub, port, host="0.0.0.0"):
+    """Serves GET /events?session=<code>[&session=...][&since=<seq>] as text/event-stream from a daemon thread."""
+    handler = type("EventStreamHandler", (_EventStreamHandler,), {"hub": hub})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="live-updates-http", daemon=True).start()
+    return server
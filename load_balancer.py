@@ -0,0 +1,86 @@
+# Load-aware routing: every request through a node is counted while in flight and its latency folded
+# into an EWMA; routing samples two nodes at random and takes the less busy one
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Endpoint:
+    """A routing target identified by URL, for callers whose nodes are not objects of their own."""
+    __slots__ = ("url", "load", "latency_ewma", "requests", "errors")
+
+    def __init__(self, url):
+        self.url = url
+        self.load = 0            # Requests in flight
+        self.latency_ewma = 0.0  # Seconds; 0 until the first request completes
+        self.requests = 0
+        self.errors = 0
+
+
+class LoadBalancer:
+    """Power-of-two-choices over targets that carry `load` and `latency_ewma` attributes.
+
+    Sampling two targets instead of scanning all of them keeps routing O(1) and avoids the herd
+    behaviour of always choosing the single least-loaded node from slightly stale numbers.
+    """
+
+    def __init__(self, targets, alpha=0.3, seed=None):
+        self.targets = list(targets)
+        self.alpha = alpha  # Weight of the newest latency sample in the EWMA
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def pick(self):
+        targets = self.targets
+        if len(targets) == 1:
+            return targets[0]
+        first = self._random.randrange(len(targets))
+        second = self._random.randrange(len(targets) - 1)
+        if second >= first:
+            second += 1  # Two distinct targets
+        a, b = targets[first], targets[second]
+        return a if self._cost(a) <= self._cost(b) else b
+
+    @staticmethod
+    def _cost(target):
+        # Fewest requests in flight first; between equally busy targets the historically faster one wins
+        return target.load, target.latency_ewma
+
+    def start(self, target):
+        with self._lock:
+            target.load += 1
+
+    def finish(self, target, elapsed, failed=False):
+        with self._lock:
+            target.load -= 1
+            if target.latency_ewma:
+                target.latency_ewma += self.alpha * (elapsed - target.latency_ewma)
+            else:
+                target.latency_ewma = elapsed
+            if hasattr(target, "requests"):
+                target.requests += 1
+                target.errors += failed
+
+    @contextmanager
+    def track(self, target):
+        """Counts a request against target while the block runs and records its latency."""
+        self.start(target)
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield target
+            failed = False
+        finally:
+            self.finish(target, time.perf_counter() - started, failed)
+
+    @contextmanager
+    def route(self):
+        """Picks a target and tracks the block as a request to it."""
+        with self.track(self.pick()) as target:
+            yield target
+
+    def stats(self):
+        with self._lock:
+            return [{"target": getattr(target, "url", getattr(target, "id", None)), "load": target.load,
+                     "latency_ewma": round(target.latency_ewma, 6)} for target in self.targets]
@@ -0,0 +1,122 @@
+# Lock manager for named resources: each resource has its own wait queue ordered by timestamp
+# (Lamport clock or arrival order), and a release wakes only the next waiter instead of every thread
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _Waiter:
+    __slots__ = ("key", "owner", "cond", "granted")
+
+    def __init__(self, key, owner, mutex):
+        self.key = key
+        self.owner = owner
+        self.cond = threading.Condition(mutex)
+        self.granted = False
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+class _Resource:
+    __slots__ = ("holder", "queue")
+
+    def __init__(self):
+        self.holder = None
+        self.queue = []  # Heap of _Waiter ordered by (timestamp, arrival)
+
+
+class LockManager:
+    """Exclusive locks on named resources granted in (timestamp, arrival) order.
+
+    Pass Lamport timestamps for a cluster-wide order; without one the arrival counter is used,
+    which makes the queue FIFO. Resources with no holder and no waiters are dropped.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._resources = {}
+        self._arrivals = itertools.count()
+
+        # Metrics
+        self.acquired = 0
+        self.contended = 0  # Acquisitions that had to wait
+        self.timeouts = 0
+
+    def acquire(self, resource_id, owner, timestamp=None, timeout=None):
+        """Blocks until owner holds resource_id; returns False if timeout seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._mutex:
+            arrival = next(self._arrivals)
+            resource = self._resources.get(resource_id)
+            if resource is None:
+                resource = self._resources[resource_id] = _Resource()
+            if resource.holder is None:
+                # A free resource always has an empty queue: release hands it straight to the next waiter
+                resource.holder = owner
+                self.acquired += 1
+                return True
+
+            waiter = _Waiter((arrival if timestamp is None else timestamp, arrival), owner, self._mutex)
+            heapq.heappush(resource.queue, waiter)
+            self.contended += 1
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    resource.queue.remove(waiter)
+                    heapq.heapify(resource.queue)
+                    self.timeouts += 1
+                    return False
+                waiter.cond.wait(remaining)
+            self.acquired += 1
+            return True
+
+    def release(self, resource_id, owner):
+        """Releases resource_id if owner holds it and grants it to the earliest waiter; returns False otherwise."""
+        with self._mutex:
+            resource = self._resources.get(resource_id)
+            if resource is None or resource.holder != owner:
+                return False
+            if resource.queue:
+                waiter = heapq.heappop(resource.queue)
+                resource.holder = waiter.owner
+                waiter.granted = True
+                waiter.cond.notify()
+            else:
+                del self._resources[resource_id]
+            return True
+
+    @contextmanager
+    def locked(self, resource_id, owner, timestamp=None, timeout=None):
+        """Context manager form of acquire/release; raises TimeoutError if the lock is not granted in time."""
+        if not self.acquire(resource_id, owner, timestamp, timeout):
+            raise TimeoutError(f"Timed out waiting for lock on {resource_id!r}")
+        try:
+            yield
+        finally:
+            self.release(resource_id, owner)
+
+    def holder(self, resource_id):
+        with self._mutex:
+            resource = self._resources.get(resource_id)
+            return resource.holder if resource else None
+
+    def queue_depth(self, resource_id=None):
+        """Waiters queued on one resource, or on all of them."""
+        with self._mutex:
+            if resource_id is not None:
+                resource = self._resources.get(resource_id)
+                return len(resource.queue) if resource else 0
+            return sum(len(resource.queue) for resource in self._resources.values())
+
+    def stats(self):
+        with self._mutex:
+            return {
+                "acquired": self.acquired,
+                "contended": self.contended,
+                "timeouts": self.timeouts,
+                "locked_resources": len(self._resources),
+                "waiting": sum(len(resource.queue) for resource in self._resources.values()),
+            }
@@ -1,10 +1,7 @@
-import xmlrpc.client
+import rpc_client
+import startup
 import streamlit as st
 import uuid
-import streamlit_authenticator as stauth
-import yaml
-from yaml.loader import SafeLoader
-from streamlit_router import StreamlitRouter
 
 if 'authentication_status' not in st.session_state:
     st.session_state['authentication_status'] = None
@@ -13,18 +10,11 @@ if 'username' not in st.session_state:
 if 'name' not in st.session_state:
     st.session_state['name'] = None
 
-with open('config.yml') as file:
-    config = yaml.load(file, Loader=SafeLoader)
-
 names = ["Soorya Sivaramakrishnan", "Tanish Patil", "Tushar Raja"]
 usernames = ["2022300122", "2022300128", "2022300130"]
 
-authenticator = stauth.Authenticate(
-    config['credentials'],
-    config['cookie']['name'],
-    config['cookie']['key'],
-    config['cookie']['expiry_days']
-)
+# Config is parsed and hashed once per process; the authenticator built from it each run hashes nothing
+authenticator = startup.get_authenticator()
 
 authenticator.login(location="main", key="Login")
 
@@ -34,31 +24,18 @@ elif st.session_state["authentication_status"] == None:
     st.warning("Please enter your credentials")
 else:
     # Generate a unique session code for each new webpage (client session)
-    def index(router):
-        st.write("Welcome to Exam Management system")
-
     if "session_code" not in st.session_state:
         st.session_state.session_code = str(uuid.uuid4())
     session_code = st.session_state.session_code
 
-    # Connect to the server (leader-aware connection)
-    def connect_to_server():
-        leader_url = "http://localhost:5000/"
-        try:
-            leader_server = xmlrpc.client.ServerProxy(leader_url)
-            leader = leader_server.get_leader()
-            st.session_state.server_url = f"http://localhost:{5000 + leader}/"  # Simulating leader-based port adjustment
-            return xmlrpc.client.ServerProxy(st.session_state.server_url)
-        except Exception as e:
-            st.error(f"Failed to connect to leader server: {e}")
-            return None
+    # Shared per-process client: the leader is cached and only re-resolved when a call fails
+    server = rpc_client.get_client()
 
-    server = connect_to_server()
-
-    # Initialize the client session with the server using the session code
-    if server:
+    # Initialize the client session with the server once per browser session, not on every rerun
+    if not st.session_state.get("session_initialized"):
         try:
             client_id = server.initialize_client(session_code)
+            st.session_state.session_initialized = True
             st.write(f"Session successfully initialized with ID: {client_id}")
         except Exception as e:
             st.error(f"Failed to initialize client session: {e}")
@@ -68,18 +45,18 @@ else:
     st.sidebar.title(f"Welcome {st.session_state['name']}")
     authenticator.logout('Logout', 'sidebar')
 
-    # Exam schedule section
+    # Exam schedule section: kept current by server push, so showing it costs no RPC per rerun
+    live_updates = rpc_client.get_live_updates()
     st.header("Exam Schedule")
-    if st.button("View Schedule"):
-        try:
-            exams = server.view_schedule(session_code)
-            if exams:
-                st.write("Exam Schedule:")
-                st.table(exams)
-            else:
-                st.write("No exams scheduled.")
-        except Exception as e:
-            st.error(f"Failed to retrieve exam schedule: {e}")
+    try:
+        _, exams = live_updates.get_schedule()
+        if exams:
+            st.write("Exam Schedule:")
+            st.table(exams)
+        else:
+            st.write("No exams scheduled.")
+    except Exception as e:
+        st.error(f"Failed to retrieve exam schedule: {e}")
 
     # Exam registration section
     st.header("Register for an Exam")
@@ -0,0 +1,254 @@
+# Metrics for the RPC server: latency histograms, counters and gauges in one process-wide registry,
+# readable as a dict (the get_metrics RPC) or as Prometheus text (the /metrics HTTP endpoint)
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """Estimates a quantile by interpolating inside the bucket that contains it."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if self.buckets[i] != float("inf") else lower * 2 or 1.0
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-2]
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets, self.counts):
+                running += count
+                cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+            count, total = self.count, self.sum
+        return {"count": count, "sum": round(total, 6), "p50": round(self.quantile(0.5), 6),
+                "p99": round(self.quantile(0.99), 6), "buckets": cumulative}
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}    # (name, labels) -> int
+        self._collectors = []  # Callables returning {gauge name: number}, read at collection time
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name, value, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes how long the block takes, whether or not it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def gauges(self):
+        values = {}
+        for collector in list(self._collectors):
+            try:
+                values.update(collector())
+            except Exception as error:  # A broken collector must not take the endpoint down
+                values[f"collector_error{{error=\"{type(error).__name__}\"}}"] = 1
+        return values
+
+    def snapshot(self):
+        """Everything as plain dicts and lists, safe to return over XML-RPC or JSON."""
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+        result = {"histograms": {}, "counters": {}, "gauges": self.gauges()}
+        for (name, labels), histogram in histograms:
+            result["histograms"].setdefault(name, []).append({"labels": dict(labels), **histogram.snapshot()})
+        for (name, labels), value in counters:
+            result["counters"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return result
+
+    def prometheus_text(self):
+        lines = []
+        snapshot = self.snapshot()
+        for name, series in sorted(snapshot["histograms"].items()):
+            self._header(lines, name, "histogram")
+            for entry in series:
+                for bound, count in entry["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(entry['labels'], le=bound)} {count}")
+                lines.append(f"{name}_sum{_labels(entry['labels'])} {entry['sum']}")
+                lines.append(f"{name}_count{_labels(entry['labels'])} {entry['count']}")
+        for name, series in sorted(snapshot["counters"].items()):
+            self._header(lines, name, "counter")
+            for entry in series:
+                lines.append(f"{name}{_labels(entry['labels'])} {entry['value']}")
+        for name, value in sorted(snapshot["gauges"].items()):
+            if "{" not in name:
+                self._header(lines, name, "gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in items.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(items, escaped)) + "}"
+
+
+REGISTRY = Registry()
+REGISTRY.describe("rpc_latency_seconds", "Time spent handling each RPC method")
+REGISTRY.describe("rpc_errors_total", "RPC calls that raised, by method")
+REGISTRY.describe("db_query_seconds", "Time spent in cursor.execute/executemany, by statement type")
+REGISTRY.describe("exam_lock_wait_seconds", "Time registrations waited for their exam's lock")
+REGISTRY.describe("exam_lock_hold_seconds", "Time registrations held their exam's lock")
+REGISTRY.describe("group_commit_wait_seconds", "Time registrations queued before their group-commit batch was taken")
+REGISTRY.describe("group_commit_flush_seconds", "Time each group-commit batch took to apply and commit")
+
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+timer = REGISTRY.timer
+
+
+def timed_rpc(function, name=None, registry=REGISTRY):
+    """Wraps an RPC function so every call is recorded in rpc_latency_seconds{method=name}."""
+    name = name or function.__name__
+    histogram = registry.histogram("rpc_latency_seconds", method=name)
+
+    @wraps(function)
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception:
+            registry.inc("rpc_errors_total", method=name)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+class TimedCursor:
+    """Cursor proxy that records execute/executemany time in db_query_seconds."""
+
+    def __init__(self, cursor, registry):
+        self._cursor = cursor
+        self._registry = registry
+
+    def execute(self, statement, *args, **kwargs):
+        with self._registry.timer("db_query_seconds", statement=_statement_kind(statement)):
+            return self._cursor.execute(statement, *args, **kwargs)
+
+    def executemany(self, statement, *args, **kwargs):
+        with self._registry.timer("db_query_seconds", statement=_statement_kind(statement) + "_many"):
+            return self._cursor.executemany(statement, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    """Connection proxy whose cursors are timed; everything else goes to the real connection."""
+
+    def __init__(self, connection, registry):
+        self._connection = connection
+        self._registry = registry
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs), self._registry)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def timed_connections(factory, registry=REGISTRY):
+    """Wraps a connection factory (e.g. the pool's) so every query it runs is timed."""
+    @wraps(factory)
+    def connect():
+        return TimedConnection(factory(), registry)
+    return connect
+
+
+def _statement_kind(statement):
+    # The leading keyword keeps the label set small: select, update, insert, replace, create...
+    return statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "empty"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would drown the log
+
+
+def start_http_server(port, host="0.0.0.0", registry=REGISTRY):
+    """Serves GET /metrics in Prometheus text format from a daemon thread; returns the HTTP server."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,116 @@
+# Query layer for the registration path: statements run as server-side prepared statements whose cursors
+# are cached per pooled connection, so MySQL parses each one once per connection rather than per call,
+# and exams are updated and locked by primary key after their typed name is resolved once
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+EXAM_ID_BY_NAME_SQL = "SELECT id FROM scheduled WHERE Name = %s"
+REGISTER_BY_ID_SQL = ("UPDATE scheduled SET Student_registered = Student_registered + 1 "
+                      "WHERE id = %s AND Student_registered < %s")
+EXAM_EXISTS_BY_ID_SQL = "SELECT 1 FROM scheduled WHERE id = %s"
+
+# Indexes `scheduled` needs beyond its primary key: names typed by students are resolved to ids through Name
+SCHEDULED_INDEXES = {
+    "idx_scheduled_name": "CREATE INDEX idx_scheduled_name ON scheduled (Name)",
+}
+EXISTING_INDEXES_SQL = ("SELECT DISTINCT INDEX_NAME FROM information_schema.statistics "
+                        "WHERE table_schema = DATABASE() AND table_name = 'scheduled'")
+
+
+class PreparedConnection:
+    """A pooled connection whose statements are prepared on first use and reused on later checkouts."""
+
+    def __init__(self, entry, max_statements=64):
+        self.raw = entry.raw
+        self.max_statements = max_statements  # Prepared statements kept per connection; MySQL caps them server-wide
+        self._statements = entry.statements
+
+    def execute(self, sql, params=()):
+        """Runs a write and returns the number of rows it changed."""
+        cursor = self._cursor(sql)
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+    def fetchall(self, sql, params=()):
+        cursor = self._cursor(sql)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def fetchone(self, sql, params=()):
+        # Reading every row leaves the cached cursor ready for its next execute
+        rows = self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def _cursor(self, sql):
+        cursor = self._statements.get(sql)
+        if cursor is not None:
+            self._statements.move_to_end(sql)
+            return cursor
+        if len(self._statements) >= self.max_statements:
+            self._statements.popitem(last=False)[1].close()  # Least recently used
+        cursor = self._statements[sql] = self.raw.cursor(prepared=True)
+        metrics.inc("prepared_statements_total")
+        return cursor
+
+
+@contextmanager
+def prepared(pool):
+    """Checks a connection out of pool and yields it as a PreparedConnection."""
+    with pool.checkout() as entry:
+        yield PreparedConnection(entry)
+
+
+class ExamIds:
+    """Exam name -> primary key, resolved through the Name index once and then served from memory."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, name):
+        """The id of the exam called name, or None if there is none."""
+        key = str(name)
+        exam_pk = self._ids.get(key)
+        if exam_pk is not None:
+            return exam_pk
+        with prepared(self.pool) as connection:
+            row = connection.fetchone(EXAM_ID_BY_NAME_SQL, (key,))
+        if row is None:
+            return None  # Misses are not cached, so mistyped names cannot grow the map
+        with self._lock:
+            self._ids[key] = row[0]
+        return row[0]
+
+    def update(self, rows):
+        """Learns ids from schedule rows (dicts with id and Name), e.g. whenever the schedule is reloaded."""
+        with self._lock:
+            self._ids.update((str(row["Name"]), row["id"]) for row in rows)
+
+    def forget(self, name):
+        """Drops a name whose row turned out to be gone."""
+        with self._lock:
+            self._ids.pop(str(name), None)
+
+
+def migrate(pool):
+    """Creates the indexes `scheduled` is missing (MySQL); returns the names of those created."""
+    created = []
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(EXISTING_INDEXES_SQL)
+        existing = {row[0] for row in cursor.fetchall()}
+        for name, statement in SCHEDULED_INDEXES.items():
+            if name not in existing:
+                cursor.execute(statement)
+                created.append(name)
+        cursor.close()
+    return created
@@ -0,0 +1,117 @@
+# Per-exam registration engine: registrations for different exams run in parallel,
+# registrations for the same exam are queued in timestamp order instead of being rejected
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from queries import EXAM_EXISTS_BY_ID_SQL, REGISTER_BY_ID_SQL, ExamIds, prepared
+
+REGISTERED = "Registered successfully"
+NOT_FOUND = "Exam ID not found"
+EXAM_FULL = "Exam is full"
+TIMED_OUT = "Registration timed out while waiting for access; please retry."
+
+
+class ExamLock:
+    """Critical section for a single exam that grants waiters in timestamp order."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self.holder = None
+        self.request_queue = []  # Heap of (timestamp, seq, session_code) waiting for access
+        self.users = 0           # Threads currently holding or waiting on this lock
+        self._acquired_at = 0.0
+
+    def acquire(self, session_code, timestamp, timeout):
+        """Blocks until this request is the earliest one queued and the lock is free."""
+        entry = (timestamp, next(self._seq), session_code)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            heapq.heappush(self.request_queue, entry)
+            while self.holder is not None or self.request_queue[0] is not entry:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.request_queue.remove(entry)
+                    heapq.heapify(self.request_queue)
+                    self._cond.notify_all()
+                    metrics.inc("exam_lock_timeouts_total")
+                    return False
+                self._cond.wait(remaining)
+            heapq.heappop(self.request_queue)
+            self.holder = session_code
+            self._acquired_at = acquired = time.monotonic()
+        metrics.observe("exam_lock_wait_seconds", acquired - started)
+        return True
+
+    def release(self):
+        with self._cond:
+            held = time.monotonic() - self._acquired_at
+            self.holder = None
+            self._cond.notify_all()
+        metrics.observe("exam_lock_hold_seconds", held)
+
+
+class RegistrationEngine:
+    def __init__(self, pool, capacity, wait_timeout=30, exam_ids=None):
+        self.pool = pool                  # ConnectionPool shared with the RPC handlers
+        self.capacity = capacity          # Maximum registrations per exam
+        self.wait_timeout = wait_timeout  # Seconds a request may queue before giving up
+        self.exam_ids = exam_ids or ExamIds(pool)  # Resolves the exam names students type to primary keys
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def register(self, session_code, exam_id, timestamp=None):
+        """Registers one student for an exam and returns a status message."""
+        timestamp = datetime.now().timestamp() if timestamp is None else timestamp
+        exam_pk = self.exam_ids.resolve(exam_id)
+        if exam_pk is None:
+            return NOT_FOUND  # Unknown names never queue for a lock
+        lock = self._checkout_lock(exam_pk)
+        try:
+            if not lock.acquire(session_code, timestamp, self.wait_timeout):
+                return TIMED_OUT
+            try:
+                result = self._apply(exam_pk)
+            finally:
+                lock.release()
+        finally:
+            self._return_lock(exam_pk, lock)
+        if result == NOT_FOUND:
+            self.exam_ids.forget(exam_id)  # The row was deleted after its id was cached
+        return result
+
+    def queue_depth(self):
+        """Number of registration requests currently waiting across all exams."""
+        with self._locks_guard:
+            locks = list(self._locks.values())
+        return sum(len(lock.request_queue) for lock in locks)
+
+    def _apply(self, exam_pk):
+        # The conditional UPDATE keeps capacity correct even across several server processes
+        with prepared(self.pool) as connection:
+            changed = connection.execute(REGISTER_BY_ID_SQL, (exam_pk, self.capacity))
+            connection.commit()
+            if changed:
+                return REGISTERED
+            exists = connection.fetchone(EXAM_EXISTS_BY_ID_SQL, (exam_pk,)) is not None
+        return EXAM_FULL if exists else NOT_FOUND
+
+    def _checkout_lock(self, exam_id):
+        with self._locks_guard:
+            lock = self._locks.get(exam_id)
+            if lock is None:
+                lock = self._locks[exam_id] = ExamLock()
+            lock.users += 1
+            return lock
+
+    def _return_lock(self, exam_id, lock):
+        # Drop idle locks so arbitrary exam IDs typed by clients do not accumulate
+        with self._locks_guard:
+            lock.users -= 1
+            if not lock.users:
+                del self._locks[exam_id]
@@ -0,0 +1,168 @@
+# Delta replication: changed keys are appended to a replication log tagged with the source's Lamport
+# timestamp, fanned out to replicas in parallel, and acknowledged asynchronously, by a quorum or by all.
+# A replica that falls behind catches up from the log; only one that fell off the log gets a full copy.
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+ACK_MODES = ("async", "quorum", "all")
+
+
+class LogEntry:
+    __slots__ = ("seq", "timestamp", "key", "value")
+
+    def __init__(self, seq, timestamp, key, value):
+        self.seq = seq              # Position in the replication log; replicas apply entries in this order
+        self.timestamp = timestamp  # Lamport timestamp of the source when the change was made
+        self.key = key
+        self.value = value
+
+
+class ReplicationLog:
+    """The most recent max_entries deltas, addressable by sequence number."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = []
+        self.first_seq = 1  # Sequence number of entries[0]
+        self.last_seq = 0
+
+    def append(self, timestamp, key, value):
+        self.last_seq += 1
+        entry = LogEntry(self.last_seq, timestamp, key, value)
+        self.entries.append(entry)
+        if len(self.entries) > self.max_entries:
+            drop = len(self.entries) - self.max_entries
+            del self.entries[:drop]
+            self.first_seq += drop
+        return entry
+
+    def since(self, seq):
+        """Entries after seq, or None if some of them have already been dropped from the log."""
+        if seq + 1 < self.first_seq:
+            return None
+        return self.entries[seq + 1 - self.first_seq:]
+
+
+def apply_entries(node, entries):
+    """Applies deltas to a replica in log order and merges the Lamport clock once for the batch."""
+    with node.lock:
+        applied_seq = node.replicated_seq  # Entries of a full copy share one seq, so compare against the start
+        latest = node.lamport_clock
+        for entry in entries:
+            if entry.seq > applied_seq:
+                node.replica_data[entry.key] = entry.value
+                node.replicated_seq = max(node.replicated_seq, entry.seq)
+                latest = max(latest, entry.timestamp)
+        node.lamport_clock = latest + 1
+
+
+class Replicator:
+    def __init__(self, nodes, executor=None, acks="quorum", timeout=5, max_log=10000, ship=apply_entries):
+        if acks not in ACK_MODES:
+            raise ValueError(f"acks must be one of {ACK_MODES}")
+        self.nodes = nodes
+        self.acks = acks        # async: return at once; quorum: majority of nodes incl. the source; all: every replica
+        self.timeout = timeout  # Seconds replicate waits for the acknowledgements it needs
+        self.ship = ship        # Delivers entries to a replica; raise to signal an unreachable replica
+        self.executor = executor or ThreadPoolExecutor(max_workers=max(len(nodes), 1),
+                                                       thread_name_prefix="replication")
+        self.log = ReplicationLog(max_log)
+        self._state = {}  # Latest value of every key, used to compute deltas and to build full copies
+        self._lock = threading.Lock()
+        self._progress = threading.Condition(self._lock)
+        self._sync_locks = {node.id: threading.Lock() for node in nodes}
+
+        # Metrics
+        self.replications = 0
+        self.shipped_entries = 0
+        self.full_copies = 0
+        self.failures = 0
+
+    def replicate(self, data, source_node):
+        """Ships the keys of data whose values changed; returns {"seq", "acked", "required", "ok"}."""
+        with source_node.lock:
+            source_node.lamport_clock += 1
+            timestamp = source_node.lamport_clock
+        with self._lock:
+            for key, value in data.items():
+                if key not in self._state or self._state[key] != value:
+                    self.log.append(timestamp, key, value)
+                    self._state[key] = value
+            seq = self.log.last_seq
+            self.replications += 1
+
+        replicas = [node for node in self.nodes if node is not source_node]
+        for node in replicas:
+            self.executor.submit(self._sync, node)
+        self._sync(source_node, local=True)  # The source keeps its own copy of the log too
+        required = self._required(len(replicas))
+        acked = self.wait_for(seq, required, self.timeout, replicas)
+        return {"seq": seq, "acked": acked, "required": required, "ok": acked >= required}
+
+    def _required(self, replica_count):
+        if self.acks == "async":
+            return 0
+        if self.acks == "all":
+            return replica_count
+        return len(self.nodes) // 2  # Together with the source this is a majority
+
+    def wait_for(self, seq, count, timeout, replicas=None):
+        """Waits until count replicas have applied seq; returns how many had when it stopped waiting."""
+        replicas = self.nodes if replicas is None else replicas
+        deadline = time.monotonic() + timeout
+        with self._progress:
+            while True:
+                acked = sum(1 for node in replicas if node.replicated_seq >= seq)
+                remaining = deadline - time.monotonic()
+                if acked >= count or remaining <= 0:
+                    return acked
+                self._progress.wait(remaining)
+
+    def catch_up(self, node):
+        """Brings a replica up to date, e.g. after it comes back online."""
+        return self.executor.submit(self._sync, node)
+
+    def _sync(self, node, local=False):
+        # One sync per replica at a time keeps entries in order; queued syncs find nothing left to do
+        with self._sync_locks[node.id]:
+            with self._lock:
+                entries = self.log.since(node.replicated_seq)
+                if entries is None:
+                    # Fell off the log: send every key once, stamped with the current position
+                    entries = [LogEntry(self.log.last_seq, self.log.entries[-1].timestamp, key, value)
+                               for key, value in self._state.items()]
+                    self.full_copies += 1
+            if not entries:
+                return
+            try:
+                (apply_entries if local else self.ship)(node, entries)
+            except Exception as error:
+                with self._lock:
+                    self.failures += 1
+                log.warning("Replication failed; the node will catch up from the log",
+                            extra={"node": node.id, "error": error})
+                return
+            with self._progress:
+                self.shipped_entries += len(entries)
+                self._progress.notify_all()
+
+    def lag(self):
+        """Log entries each node has yet to apply."""
+        with self._lock:
+            last_seq = self.log.last_seq
+        return {node.id: last_seq - node.replicated_seq for node in self.nodes}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "replications": self.replications,
+                "last_seq": self.log.last_seq,
+                "log_entries": len(self.log.entries),
+                "shipped_entries": self.shipped_entries,
+                "full_copies": self.full_copies,
+                "failures": self.failures,
+            }
@@ -0,0 +1,240 @@
+# Shared RPC client for the Streamlit pages: the leader address is resolved once per process,
+# kept-alive connections are reused across reruns and sessions, and reads go to the least-busy follower.
+# Live updates arrive through one long-poll per process, so pages read the schedule and exam deadlines from memory.
+import http.client
+import threading
+from collections import OrderedDict
+import time
+import xmlrpc.client
+
+import streamlit as st
+
+import transport
+from admission import retry_after
+from load_balancer import Endpoint, LoadBalancer
+
+BOOTSTRAP_URL = "http://localhost:5000/"
+
+# Calls that only read shared state and may be served by any follower
+READ_METHODS = {"view_schedule"}
+
+# Calls that may be sent again when a first attempt failed part-way. Everything else (registrations,
+# submissions, answers) is not: after a timeout the server may still have committed it
+IDEMPOTENT_METHODS = READ_METHODS | {
+    "initialize_client", "start_exam", "get_questions", "exam_time_remaining", "wait_for_updates",
+    "negotiate_transport", "get_leader", "get_cluster", "get_metrics", "get_pool_metrics",
+    "get_schedule_cache_stats", "get_group_commit_stats", "get_answer_log_stats", "get_session_stats",
+    "get_admission_stats",
+}
+
+# Errors that mean the server is unreachable or gone, as opposed to an application-level Fault
+CONNECTION_ERRORS = (OSError, http.client.HTTPException, xmlrpc.client.ProtocolError)
+
+
+class LeaderClient:
+    def __init__(self, bootstrap_url=BOOTSTRAP_URL, timeout=10, membership_ttl=30, max_retry_wait=2.0):
+        self.bootstrap_url = bootstrap_url
+        self.timeout = timeout                # Seconds before a call is treated as failed and the leader re-resolved
+        self.membership_ttl = membership_ttl  # Seconds before the follower list is refreshed
+        self.max_retry_wait = max_retry_wait  # Longest retry_after honoured once before a busy server's fault is raised
+        self.leader_url = None
+        self.follower_urls = []
+        self.followers = LoadBalancer([])     # In-flight counts and EWMA latency per follower
+        self._resolved_at = 0.0
+        self._generation = 0                  # Bumped whenever membership changes so stale proxies are dropped
+        self._idle = {}                       # URL -> proxies not in use, each holding a kept-alive connection
+        self._lock = threading.Lock()
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return lambda *params: self.call(method, *params)
+
+    def call(self, method, *params):
+        """Calls a method on the cluster, re-resolving the leader if the call fails or times out.
+
+        Only IDEMPOTENT_METHODS are then sent again; for other calls the error is raised once the leader
+        is re-resolved, since the server may have run them. A call the server refused as rate limited or
+        overloaded never ran, so any call is retried once after its retry_after hint.
+        """
+        try:
+            return self._route(method, params)
+        except xmlrpc.client.Fault as fault:
+            wait = retry_after(fault)
+            if wait is None or wait > self.max_retry_wait:
+                raise
+            time.sleep(wait)
+            return self._route(method, params)
+
+    def _route(self, method, params):
+        if self.leader_url is None or time.monotonic() - self._resolved_at > self.membership_ttl:
+            self.resolve_leader()
+        followers = self.followers
+        if method in READ_METHODS and followers.targets:
+            follower = followers.pick()
+            try:
+                with followers.track(follower):
+                    return self._call_once(follower.url, method, params)
+            except CONNECTION_ERRORS:
+                pass  # Fall back to the leader; membership is refreshed below if it is down too
+        try:
+            return self._call_once(self.leader_url, method, params)
+        except CONNECTION_ERRORS:
+            if method in IDEMPOTENT_METHODS:
+                self.resolve_leader()
+                return self._call_once(self.leader_url, method, params)
+            try:
+                self.resolve_leader()  # So the caller's own retry goes to the right node
+            except CONNECTION_ERRORS:
+                pass
+            raise
+
+    def resolve_leader(self):
+        """Asks the first reachable node which node leads and which followers are alive."""
+        known = [self.bootstrap_url] + [url for url in [self.leader_url] + self.follower_urls if url]
+        error = None
+        for url in dict.fromkeys(known):
+            node = xmlrpc.client.ServerProxy(url, transport=transport.TimeoutTransport(self.timeout))
+            try:
+                leader_url, follower_urls = self._membership(node, url)
+                break
+            except CONNECTION_ERRORS as e:
+                error = e
+        else:
+            raise error
+
+        with self._lock:
+            self.leader_url = leader_url
+            self.follower_urls = follower_urls
+            # Keep the load history of followers that are still members
+            known = {endpoint.url: endpoint for endpoint in self.followers.targets}
+            self.followers = LoadBalancer([known.get(url) or Endpoint(url) for url in follower_urls])
+            self._resolved_at = time.monotonic()
+            self._generation += 1
+            stale, self._idle = self._idle, {}
+        for proxies in stale.values():
+            for _, proxy in proxies:
+                _close(proxy)
+        return leader_url
+
+    @staticmethod
+    def _membership(node, url):
+        try:
+            cluster = node.get_cluster()
+        except xmlrpc.client.Fault:
+            return url, []  # A single server without cluster support serves everything
+        if not cluster.get("base_port"):
+            return url, []
+        base_port = cluster["base_port"]
+        leader = cluster["leader"] if cluster["leader"] is not None else node.get_leader()  # Mid-election
+        leader_url = f"http://localhost:{base_port + leader}/"
+        return leader_url, [f"http://localhost:{base_port + i}/" for i in cluster["followers"]]
+
+    def _call_once(self, url, method, params):
+        generation, proxy = self._checkout(url)
+        try:
+            result = getattr(proxy, method)(*params)
+        except CONNECTION_ERRORS:
+            _close(proxy)
+            raise
+        self._checkin(url, generation, proxy)
+        return result
+
+    def _checkout(self, url):
+        with self._lock:
+            idle = self._idle.get(url)
+            if idle:
+                return idle.pop()
+            generation = self._generation
+        return generation, transport.connect(url, timeout=self.timeout)
+
+    def _checkin(self, url, generation, proxy):
+        with self._lock:
+            if generation == self._generation:
+                self._idle.setdefault(url, []).append((generation, proxy))
+                return
+        _close(proxy)
+
+
+class LiveUpdates:
+    """Keeps the schedule and each watched session's latest exam events current via wait_for_updates."""
+
+    def __init__(self, client, wait=20, max_sessions=10000):
+        self.client = client              # LeaderClient whose timeout outlasts `wait`
+        self.wait = wait                  # Seconds each long-poll may block on the server
+        self.max_sessions = max_sessions  # Watched sessions kept; Streamlit never says when one ends
+        self.seq = 0
+        self.schedule_version = None
+        self.schedule = None
+        self._sessions = OrderedDict()    # session_code -> {topic: latest data}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="live-updates", daemon=True).start()
+
+    def watch(self, session_code):
+        """Subscribes a session to its exam events; takes effect from the next long-poll."""
+        with self._lock:
+            self._sessions.setdefault(session_code, {})
+            self._sessions.move_to_end(session_code)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def latest(self, session_code, topic):
+        """Data of the newest event on topic for the session ('exam_started', 'exam_stopped'), or None."""
+        with self._lock:
+            return self._sessions.get(session_code, {}).get(topic)
+
+    def get_schedule(self):
+        """(version, rows) of the schedule; loaded once, then updated only by pushed events."""
+        if self.schedule is None:
+            self._load_schedule()
+        return self.schedule_version, self.schedule
+
+    def _load_schedule(self):
+        reply = self.client.view_schedule("live-updates", "")  # A version that never matches returns the rows
+        with self._lock:
+            self.schedule_version, self.schedule = reply["version"], reply["exams"]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                sessions = list(self._sessions) or [""]
+            try:
+                reply = self.client.wait_for_updates(sessions, self.seq, self.wait)
+                if reply["reset"]:
+                    self._load_schedule()  # Missed events (or the server restarted); start over from its state
+            except Exception:
+                time.sleep(1)  # Server down or mid-failover; the client re-resolves the leader on the next call
+                continue
+            with self._lock:
+                for event in reply["events"]:
+                    if event["topic"] == "schedule":
+                        self.schedule_version, self.schedule = event["data"]["version"], event["data"]["exams"]
+                    elif event["session"] in self._sessions:  # Skips sessions evicted while the poll waited
+                        session_events = self._sessions[event["session"]]
+                        if event["topic"] == "exam_started":
+                            session_events.clear()  # The stop of an earlier attempt no longer applies
+                        session_events[event["topic"]] = event["data"]
+                self.seq = reply["seq"]
+
+
+def _close(proxy):
+    try:
+        if isinstance(proxy, xmlrpc.client.ServerProxy):
+            proxy("close")()  # Attribute access on ServerProxy would be a remote call
+        else:
+            proxy.close()
+    except Exception:
+        pass
+
+
+@st.cache_resource
+def get_client():
+    """Returns the process-wide client shared by every Streamlit session and rerun."""
+    return LeaderClient()
+
+
+@st.cache_resource
+def get_live_updates():
+    """Returns the process-wide live update subscriber, with its own client so long-polls do not time out."""
+    wait = 20
+    return LiveUpdates(LeaderClient(timeout=wait + 10), wait=wait)
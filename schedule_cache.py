@@ -0,0 +1,80 @@
+# In-process cache of the exam schedule with TTL expiry and write-through invalidation
+import hashlib
+import json
+import threading
+import time
+
+
+class ScheduleCache:
+    def __init__(self, loader, ttl=30):
+        self.loader = loader        # Callable returning the current list of schedule rows
+        self.ttl = ttl              # Seconds a loaded schedule is served without re-querying
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._rows = []
+        self._version = None        # Digest of the rows, so every node and restart agrees on it
+        self._loaded_at = 0.0
+        self._generation = 0        # Bumped on every invalidation
+        self._fresh_generation = -1
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, max_age=None):
+        """Returns (version, rows), reloading from the database only when stale.
+
+        max_age tightens the TTL for this read, e.g. on a node that does not see the registrations.
+        """
+        max_age = self.ttl if max_age is None else min(self.ttl, max_age)
+        with self._lock:
+            if self._is_fresh(max_age):
+                self.hits += 1
+                return self._version, self._rows
+
+        # Only one thread reloads; the others wait and then reuse its result
+        with self._load_lock:
+            with self._lock:
+                if self._is_fresh(max_age):
+                    self.hits += 1
+                    return self._version, self._rows
+                self.misses += 1
+                generation = self._generation
+
+            rows = self.loader()
+
+            with self._lock:
+                if rows != self._rows or self._version is None:
+                    self._rows = rows
+                    self._version = _digest(rows)
+                self._loaded_at = time.monotonic()
+                # A write that landed while we were loading keeps the cache stale
+                self._fresh_generation = generation
+                return self._version, self._rows
+
+    def invalidate(self):
+        """Marks the cached schedule stale so the next read goes to the database."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self._version,
+                "rows": len(self._rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+    def _is_fresh(self, max_age):
+        return (self._fresh_generation == self._generation
+                and time.monotonic() - self._loaded_at < max_age)
+
+
+def _digest(rows):
+    # Dates and times are not JSON types; their str() is stable, which is all a version needs
+    encoded = json.dumps(rows, sort_keys=True, default=str, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
@@ -6,6 +6,26 @@ import threading
 import time
 from datetime import datetime
 import uuid
+import argparse
+import logging
+import signal
+import metrics
+from structured_log import setup_logging
+from db_pool import ConnectionPool
+from schedule_cache import ScheduleCache
+from registration import RegistrationEngine, REGISTERED
+from queries import ExamIds, migrate
+from group_commit import GroupCommitter
+from async_server import AsyncXMLRPCServer
+from transport import CompactRequestHandler, negotiate_transport
+from cluster import ClusterNode
+from exam_delivery import ExamDeliveryEngine
+from answer_log import AnswerLog
+from live_updates import EventHub, CoalescingPublisher, start_sse_server
+from session_manager import SessionManager
+from admission import AdmissionController, LANE_EXAM, LANE_REGISTRATION, LANE_BROWSE
+
+log = logging.getLogger("server")
 
 # Configure MySQL connection
 db_config = {
@@ -15,116 +35,408 @@ db_config = {
     'database': 'soorya'
 }
 
-# Dictionary to store active sessions and their respective request timestamps
-sessions = {}
-mutex_lock = threading.Lock()
-deferred_requests = []
-
-# Critical section request management based on Ricart-Agrawala algorithm
-class MutexManager:
-    def __init__(self):
-        self.current_request = None  # Stores the current session holding the critical section
-        self.request_queue = []      # Queue of deferred requests (session codes)
-
-    def request_entry(self, session_code, timestamp):
-        with mutex_lock:
-            # If no one is holding the critical section, grant access
-            if not self.current_request:
-                self.current_request = session_code
-                print(f"{session_code} granted access to register for exam.")
-                return True
-            
-            # If someone else holds the critical section, compare timestamps
-            current_time = datetime.now().timestamp()
-            if timestamp < current_time:
-                # Queue this request to defer it
-                self.request_queue.append((session_code, timestamp))
-                print(f"{session_code} request deferred. Queue length: {len(self.request_queue)}")
-                return False
-            else:
-                self.request_queue.append((session_code, timestamp))
-                return False
-
-    def release_entry(self, session_code):
-        with mutex_lock:
-            if self.current_request == session_code:
-                print(f"{session_code} has released the critical section.")
-                self.current_request = None
-
-                # Grant access to the next request in the queue if any
-                if self.request_queue:
-                    next_request = min(self.request_queue, key=lambda x: x[1])  # Get the earliest request by timestamp
-                    self.request_queue.remove(next_request)
-                    self.current_request = next_request[0]
-                    print(f"{next_request[0]} granted access to register for exam after release.")
-                    return next_request[0]  # Grant access to the next client
-            return None
-
-mutex_manager = MutexManager()
+# Connection pool shared by all server worker threads
+pool_config = {
+    'pool_size': 32,            # Keep well below MySQL's max_connections
+    'max_age': 1800,            # Recycle connections after 30 minutes
+    'health_check_after': 30,   # Ping connections that have been idle this long
+    'acquire_timeout': 10
+}
+
+def connect_db():
+    return mysql.connector.connect(**db_config)
+
+# Every query run through the pool is timed into the db_query_seconds histogram
+db_pool = ConnectionPool(metrics.timed_connections(connect_db), **pool_config)
+
+# Seconds the cached schedule is served before it is re-read from MySQL. Registrations go to the leader,
+# which invalidates its cache on each one; followers never see them, so they re-read far sooner
+schedule_cache_ttl = 30
+schedule_follower_ttl = 2
+
+# Registration limits
+exam_capacity = 120            # Seats per exam; enforced by a conditional UPDATE
+registration_wait_timeout = 30 # Seconds a queued registration waits for its exam's lock
+
+# Group commit: registrations arriving within the window share one transaction
+group_commit_enabled = True
+group_commit_window = 0.005
+group_commit_max_batch = 500
+
+# Asyncio server mode: executor size and backpressure limits
+async_config = {
+    'max_workers': 32,          # Blocking handlers running at once outside admission control (which has its own)
+    'max_pending': 1024,        # Queued requests before new ones are answered with 503
+    'max_connections': 10000
+}
+
+# Exam delivery: exam ID -> question bank table (id, Question, Answer)
+question_tables = {
+    'dsgt': 'dsgt'
+}
+exam_duration = 300            # Seconds per attempt, timed by the server
+exam_page_size = 10
+
+# Write-behind answer log: answers are fsynced locally and flushed to MySQL in bulk
+answer_log_enabled = True
+answer_log_path = 'answers.log'
+
+# Cluster mode: node i of N listens on base_port + i and the nodes elect a leader among themselves
+cluster_config = {
+    'heartbeat_interval': 0.5,
+    'failure_timeout': 1.5,     # Seconds of silence before a node is presumed dead
+    'rpc_timeout': 0.5
+}
+cluster_node = None
+
+# Observability: Prometheus text on http://host:metrics_port/metrics (node i uses metrics_port + i)
+metrics_enabled = True
+metrics_port = 9100
+log_level = logging.INFO
+
+# Server push: clients long-poll wait_for_updates or stream GET http://host:sse_port/events?session=<code>
+# (node i uses sse_port + i) for schedule changes and exam start/stop
+push_config = {
+    'history': 1000,            # Events kept for clients that reconnect with their last sequence number
+    'max_wait': 25,             # Longest a wait_for_updates call blocks; in async mode it holds an executor worker
+    'check_interval': 1.0       # Seconds between checks for exams whose time is up
+}
+schedule_push_interval = 0.5   # Registrations within this window share one schedule broadcast
+sse_enabled = True
+sse_port = 8100
+
+# Admission control: at most max_workers calls run at once (below pool_size, so admitted calls do not queue
+# for a connection); the rest wait by priority lane or are refused with a retry_after hint
+admission_enabled = True
+admission_config = {
+    'max_workers': 24,
+    'queue_limits': (512, 256, 128),  # Waiting calls per lane: exam, registration, browse
+    'queue_timeout': 2.0,             # Seconds a call may wait for a worker before it is refused
+    'session_rate': 10.0,             # Calls per second per session_code on average...
+    'session_burst': 30               # ...with bursts up to this many
+}
+# RPC -> priority lane; functions not listed (stats, cluster heartbeats, long-polls) bypass admission
+admission_lanes = {
+    'start_exam': LANE_EXAM,
+    'get_questions': LANE_EXAM,
+    'submit_answers': LANE_EXAM,
+    'exam_time_remaining': LANE_EXAM,
+    'dsgt': LANE_EXAM,
+    'register_exam': LANE_REGISTRATION,
+    'register_exams_bulk': LANE_REGISTRATION,
+    'initialize_client': LANE_BROWSE,
+    'view_schedule': LANE_BROWSE
+}
+admission = AdmissionController(**admission_config) if admission_enabled else None
+
+# Client sessions: idle ones expire, the least recently seen are evicted past the cap, and a snapshot
+# file lets sessions survive a restart
+session_config = {
+    'max_sessions': 100000,
+    'idle_ttl': 4 * 3600,       # Seconds without a request before a session expires
+    'shards': 16,               # Independently locked partitions of the registry
+    'snapshot_interval': 30
+}
+session_snapshot_path = 'sessions.snapshot'
+sessions = SessionManager(**session_config)
 
 # Define server functions
 def initialize_client(session_code):
     """Initialize a new client session with a unique session code if it doesn't already exist."""
-    if session_code not in sessions:
-        sessions[session_code] = {
-            'thread_name': f"Client-{session_code}"
-        }
-        print(f"Assigned new session with ID: {session_code}.")
+    _, created = sessions.touch(session_code)
+    if created:
+        log.info("Assigned new session", extra={'session': session_code})
     return session_code
 
-def view_schedule(session_code):
-    """Fetches the exam schedule from the database for a specific session."""
-    print(f"Client {session_code} requested to view schedule.")
-    connection = mysql.connector.connect(**db_config)
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT id, Name, Marks, Student_registered, Exam_date, Start_time, Duration FROM scheduled")
-    exams = cursor.fetchall()
-    cursor.close()
-    connection.close()
+def load_schedule():
+    """Reads the full exam schedule from the database."""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT id, Name, Marks, Student_registered, Exam_date, Start_time, Duration FROM scheduled")
+        exams = cursor.fetchall()
+        cursor.close()
+    exam_ids.update(exams)  # Every schedule read refreshes the name -> id map registrations use
     return exams
 
+exam_ids = ExamIds(db_pool)
+schedule_cache = ScheduleCache(load_schedule, ttl=schedule_cache_ttl)
+registration_engine = RegistrationEngine(db_pool, exam_capacity, wait_timeout=registration_wait_timeout,
+                                         exam_ids=exam_ids)
+answer_log = None
+exam_delivery = ExamDeliveryEngine(db_pool, question_tables, duration=exam_duration, page_size=exam_page_size)
+event_hub = EventHub(**push_config)
+
+def schedule_update():
+    """The schedule broadcast after registrations: the version plus every row with its registration count."""
+    version, exams = schedule_cache.get()
+    return {'version': version, 'exams': exams}
+
+schedule_publisher = CoalescingPublisher(event_hub, 'schedule', schedule_update, interval=schedule_push_interval)
+group_committer = GroupCommitter(db_pool, exam_capacity, window=group_commit_window, max_batch=group_commit_max_batch,
+                                 exam_ids=exam_ids) if group_commit_enabled else None
+
+def view_schedule(session_code, known_version=None):
+    """Fetches the exam schedule for a specific session, served from the schedule cache.
+
+    Clients that pass the version they already hold get a "not modified" reply without rows.
+    """
+    sessions.seen(session_code)
+    log.debug("Schedule requested", extra={'session': session_code})
+    is_leader = cluster_node is None or cluster_node.get_leader() == cluster_node.node_id
+    version, exams = schedule_cache.get(max_age=None if is_leader else schedule_follower_ttl)
+    if known_version is None:
+        return exams  # Legacy callers expect the bare list of rows
+    if known_version == version:
+        return {'version': version, 'not_modified': True}
+    return {'version': version, 'not_modified': False, 'exams': exams}
+
 def register_exam(session_code, exam_id):
-    """Registers a user for an exam by incrementing the registered students count, using Ricart-Agrawala mutual exclusion."""
-    timestamp = datetime.now().timestamp()
-    can_access = mutex_manager.request_entry(session_code, timestamp)
-    
-    if not can_access:
-        return "Request deferred; waiting for access to register."
-
-    # Perform the registration in the critical section
-    try:
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-        statement = f'UPDATE scheduled SET Student_registered = Student_registered + 1 WHERE Name = "{exam_id}";'
-        cursor.execute(statement)
-        connection.commit()
-        rows_affected = cursor.rowcount
-        cursor.close()
-        connection.close()
-        
-        # Check if registration was successful
-        if rows_affected == 0:
-            return "Exam ID not found"
-        return "Registered successfully"
-    finally:
-        # Release the critical section
-        mutex_manager.release_entry(session_code)
+    """Registers a user for an exam by incrementing the registered students count.
+
+    With group commit enabled the increment shares a transaction with other registrations arriving
+    at the same time; otherwise requests for the same exam are queued and granted in timestamp order.
+    """
+    sessions.seen(session_code)
+    if group_committer:
+        result = group_committer.register(exam_id, timeout=registration_wait_timeout)
+    else:
+        result = registration_engine.register(session_code, exam_id, datetime.now().timestamp())
+    if result == REGISTERED:
+        schedule_cache.invalidate()
+        schedule_publisher.mark_dirty()
+    return result
+
+def register_exams_bulk(session_code, exam_ids):
+    """Registers a user for several exams in one call and returns one status message per exam ID.
+
+    An exam ID listed more than once is registered once; each of its positions gets that result.
+    """
+    sessions.seen(session_code)
+    unique_ids = list(dict.fromkeys(exam_ids))
+    if group_committer:
+        results = group_committer.register_many(unique_ids, timeout=registration_wait_timeout)
+    else:
+        timestamp = datetime.now().timestamp()
+        results = [registration_engine.register(session_code, exam_id, timestamp) for exam_id in unique_ids]
+    if REGISTERED in results:
+        schedule_cache.invalidate()
+        schedule_publisher.mark_dirty()
+    by_id = dict(zip(unique_ids, results))
+    return [by_id[exam_id] for exam_id in exam_ids]
+
+def dsgt(val, name, ans):
+    """Legacy per-question exam call: returns question val, "Exit" when finished, or a previous score."""
+    return exam_delivery.dsgt(val, name, ans, exam_id="dsgt")
+
+def start_exam(session_code, exam_id, name):
+    """Starts a student's attempt and returns the whole paper with the server-side time remaining."""
+    sessions.seen(session_code)
+    log.info("Exam started", extra={'session': session_code, 'exam': exam_id})
+    paper = exam_delivery.start_exam(exam_id, name)
+    if not paper['submitted']:
+        event_hub.start_timer(session_code, exam_id, paper['remaining'])
+    return paper
+
+def get_questions(session_code, exam_id, page=0):
+    """Returns one page of an exam paper."""
+    return exam_delivery.get_questions(exam_id, page)
+
+def submit_answers(session_code, exam_id, name, answers):
+    """Grades and records a student's answers ({question id: answer}) in one call."""
+    sessions.seen(session_code)
+    result = exam_delivery.submit_answers(exam_id, name, answers)
+    event_hub.stop_timer(session_code, exam_id, 'submitted')
+    return result
+
+def exam_time_remaining(session_code, exam_id, name):
+    """Returns the seconds left in a student's attempt according to the server clock."""
+    return exam_delivery.time_remaining(exam_id, name)
+
+def wait_for_updates(session_code, since=0, timeout=None):
+    """Long-polls for events after sequence number `since` addressed to session_code (or a list of them).
+
+    Returns {'seq', 'events': [{'seq', 'session', 'topic', 'data', 'time'}], 'reset'}; pass 'seq' back as
+    `since`. Broadcast events have session None.
+    Topics: 'schedule', 'exam_started' (with the exam's 'deadline') and 'exam_stopped'. On 'reset' reload with view_schedule.
+    """
+    return event_hub.poll(session_code, since, timeout)
+
+def get_answer_log_stats():
+    """Returns write-behind answer log counters: appended, pending, fsyncs and database flushes."""
+    return answer_log.stats() if answer_log else {}
+
+def get_pool_metrics():
+    """Returns connection pool metrics: checkouts, waits and connection ages."""
+    return db_pool.metrics()
+
+def get_schedule_cache_stats():
+    """Returns schedule cache hit/miss counts and the current schedule version."""
+    return schedule_cache.stats()
+
+def get_group_commit_stats():
+    """Returns the number of group-commit batches and registrations applied so far."""
+    return group_committer.stats() if group_committer else {}
+
+def get_session_stats():
+    """Returns live sessions and how many were created, evicted by the cap, expired or resumed."""
+    return sessions.stats()
+
+def get_admission_stats():
+    """Returns running calls, waiting calls per lane and how many were admitted, queued, shed or rate limited."""
+    return admission.stats() if admission else {}
+
+def get_metrics():
+    """Returns RPC latency, DB query and registration wait histograms plus live gauges such as queue depths."""
+    return metrics.REGISTRY.snapshot()
+
+def component_gauges():
+    """Numeric stats of the pool, caches and queues, read whenever metrics are collected."""
+    # Registrations go through whichever path is enabled; only that one has a queue to report
+    queue = group_committer or registration_engine
+    gauges = {'registration_queue_depth': queue.queue_depth()}
+    sources = [('db_pool', db_pool.metrics()), ('schedule_cache', schedule_cache.stats())]
+    if group_committer:
+        sources.append(('group_commit', group_committer.stats()))
+    if answer_log:
+        sources.append(('answer_log', answer_log.stats()))
+    sources.append(('live_updates', event_hub.stats()))
+    sources.append(('sessions', sessions.stats()))
+    if admission:
+        sources.append(('admission', admission.stats()))
+    for prefix, stats in sources:
+        gauges.update((f"{prefix}_{key}", value) for key, value in stats.items()
+                      if isinstance(value, (int, float)) and not isinstance(value, bool))
+    return gauges
+
+metrics.REGISTRY.add_collector(component_gauges)
+
+def get_leader():
+    """Returns the node id of the cluster leader; a standalone server leads itself."""
+    return cluster_node.get_leader() if cluster_node else 0
+
+def get_cluster():
+    """Returns the leader, live followers and failover statistics as seen by this node."""
+    if cluster_node:
+        return cluster_node.get_cluster()
+    return {'node_id': 0, 'leader': 0, 'alive': [0], 'followers': [], 'base_port': None}
 
 # Extend SimpleXMLRPCServer with threading capabilities
 class ThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
-    pass
-
-# Set up the multithreaded XML-RPC server
-server = ThreadedXMLRPCServer(("0.0.0.0", 5000), allow_none=True)
-print("Multithreaded server with replication and load balancing running on port 5000...")
-
-# Register functions
-server.register_function(initialize_client, "initialize_client")
-server.register_function(view_schedule, "view_schedule")
-server.register_function(register_exam, "register_exam")
-
-# Run the server
-try:
-    server.serve_forever()
-except KeyboardInterrupt:
-    print("\nServer is shutting down.")
+    daemon_threads = True
+    request_queue_size = 1024  # Listen backlog; the default of 5 refuses connections during bursts
+
+def build_server(mode="threaded", host="0.0.0.0", port=5000):
+    """Creates the RPC server in threaded (one thread per request) or async (event loop) mode."""
+    if mode == "async":
+        server = AsyncXMLRPCServer((host, port), admission=admission, **async_config)
+    else:
+        # Per-request access lines went to stderr under a lock; latencies are in the metrics instead
+        server = ThreadedXMLRPCServer((host, port), requestHandler=CompactRequestHandler, allow_none=True,
+                                      logRequests=False)
+
+    # Register functions, each timed into rpc_latency_seconds{method=...}
+    functions = [initialize_client, view_schedule, register_exam, register_exams_bulk, dsgt, start_exam,
+                 get_questions, submit_answers, exam_time_remaining, wait_for_updates, get_pool_metrics,
+                 get_schedule_cache_stats, get_group_commit_stats, get_answer_log_stats, get_session_stats,
+                 get_admission_stats, get_metrics, negotiate_transport, get_leader, get_cluster]
+    if cluster_node:
+        functions += [cluster_node.heartbeat, cluster_node.election, cluster_node.coordinator]
+    for function in functions:
+        name = function.__name__
+        lane = admission_lanes.get(name) if admission else None
+        keyed = function is not dsgt  # dsgt is the only admitted call without a session_code to rate limit on
+        if mode == "async":
+            # The async server admits on the event loop, before a call takes an executor worker
+            server.register_function(metrics.timed_rpc(function), name, lane=lane, keyed=keyed)
+            continue
+        if lane is not None:
+            function = admission.wrap(function, lane, keyed=keyed)
+        server.register_function(metrics.timed_rpc(function), name)
+    if mode == "async":
+        metrics.REGISTRY.add_collector(lambda: {'rpc_pending': server.pending, 'rpc_rejected': server.rejected,
+                                                'rpc_connections': server.connections})
+    else:
+        metrics.REGISTRY.add_collector(lambda: {'rpc_threads': threading.active_count()})
+    return server
+
+def side_server(start, port, host, *args):
+    """Starts a helper HTTP endpoint; a port already in use only disables that endpoint."""
+    try:
+        return start(*args, port, host)
+    except OSError as e:
+        log.warning("Could not start endpoint", extra={'endpoint': start.__name__, 'port': port, 'error': e})
+        return None
+
+def serve(mode="threaded", host="0.0.0.0", port=None, node_id=0, cluster_size=1, base_port=5000):
+    global cluster_node, answer_log
+    setup_logging(log_level)
+    port = base_port + node_id if port is None else port
+    if session_snapshot_path:
+        # Nodes of a cluster started from one directory keep separate snapshots
+        snapshot = session_snapshot_path if cluster_size == 1 else f"{session_snapshot_path}.{node_id}"
+        resumed = sessions.resume(snapshot)
+        if resumed:
+            log.info("Resumed sessions from snapshot", extra={'count': resumed, 'path': snapshot})
+    try:
+        created = migrate(db_pool)
+        if created:
+            log.info("Created indexes on scheduled", extra={'indexes': ','.join(created)})
+    except Exception as e:
+        log.warning("Could not check the indexes on scheduled", extra={'error': e})
+    if answer_log_enabled:
+        # Opened here rather than at import so unflushed answers are replayed only by a running server
+        try:
+            exam_delivery.ensure_schema()
+        except Exception as e:
+            log.warning("Could not prepare answer tables yet; the answer log will retry", extra={'error': e})
+        # Each node needs its own log and checkpoint: recovery and compaction truncate the file
+        path = answer_log_path if cluster_size == 1 else f"{answer_log_path}.{node_id}"
+        answer_log = exam_delivery.answer_log = AnswerLog(db_pool, path)
+    if cluster_size > 1:
+        cluster_node = ClusterNode(node_id, cluster_size, base_port=base_port, **cluster_config)
+    server = build_server(mode, host, port)
+    if cluster_node:
+        cluster_node.start()
+        log.info("Cluster node started", extra={'node': node_id, 'cluster_size': cluster_size})
+    metrics_server = side_server(metrics.start_http_server, metrics_port + node_id, host) if metrics_enabled else None
+    sse_server = side_server(start_sse_server, sse_port + node_id, host, event_hub) if sse_enabled else None
+    log.info("Server running", extra={'mode': mode, 'port': port,
+                                      'metrics_port': metrics_port + node_id if metrics_server else None,
+                                      'sse_port': sse_port + node_id if sse_server else None})
+
+    # A service manager stops the server with SIGTERM: treat it like Ctrl-C so the shutdown below runs
+    # (final session snapshot, answer log and group-commit flush) instead of the process dying mid-interval
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    # Run the server
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Server is shutting down")
+    finally:
+        if cluster_node:
+            cluster_node.stop()
+        if metrics_server:
+            metrics_server.shutdown()
+        event_hub.stop()
+        schedule_publisher.stop()
+        sessions.stop()
+        if sse_server:
+            sse_server.shutdown()
+        if answer_log:
+            answer_log.close()
+        if group_committer:
+            group_committer.stop()
+        db_pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exam registration RPC server")
+    parser.add_argument("--mode", choices=["threaded", "async"], default="threaded")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, help="Defaults to base port + node id")
+    parser.add_argument("--node-id", type=int, default=0)
+    parser.add_argument("--cluster-size", type=int, default=1)
+    parser.add_argument("--base-port", type=int, default=5000)
+    args = parser.parse_args()
+    serve(args.mode, args.host, args.port, args.node_id, args.cluster_size, args.base_port)
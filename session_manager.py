@@ -0,0 +1,191 @@
+# Session registry for server.py: sessions live in lock-striped shards, each an LRU capped at its share of
+# max_sessions; idle sessions expire, and a periodic snapshot file lets sessions survive a server restart
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from zlib import crc32
+
+
+class Session:
+    __slots__ = ("code", "created_at", "last_seen", "requests")
+
+    def __init__(self, code, created_at=None, last_seen=None, requests=0):
+        now = time.time()
+        self.code = code
+        self.created_at = now if created_at is None else created_at  # Wall clock, so snapshots survive restarts
+        self.last_seen = now if last_seen is None else last_seen
+        self.requests = requests
+
+
+class _Shard:
+    __slots__ = ("lock", "sessions")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()  # code -> Session, least recently seen first
+
+
+class SessionManager:
+    def __init__(self, max_sessions=100000, idle_ttl=4 * 3600, shards=16, sweep_interval=60, snapshot_interval=30):
+        self.max_sessions = max_sessions            # Sessions kept before the least recently seen are evicted
+        self.idle_ttl = idle_ttl                    # Seconds without a request before a session expires
+        self.sweep_interval = sweep_interval        # Seconds between expiry sweeps
+        self.snapshot_interval = snapshot_interval  # Seconds between snapshot writes once resume() was called
+        self.snapshot_path = None
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_cap = max(1, max_sessions // shards)
+        self._counter_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._last_snapshot = 0.0
+
+        # Metrics
+        self.created = 0
+        self.evicted = 0  # Dropped by the LRU cap
+        self.expired = 0  # Dropped after idle_ttl
+        self.resumed = 0  # Loaded from the snapshot
+
+        threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True).start()
+
+    def touch(self, code):
+        """Returns (session, created): the session for code, created if new, marked as just seen."""
+        shard = self._shard(code)
+        now = time.time()
+        evicted = expired = 0
+        with shard.lock:
+            session = shard.sessions.get(code)
+            created = session is None or now - session.last_seen > self.idle_ttl
+            if created:
+                expired = session is not None  # Idle past the TTL but not swept yet: starts over
+                session = shard.sessions[code] = Session(code, now, now)
+            shard.sessions.move_to_end(code)
+            session.last_seen = now
+            session.requests += 1
+            while len(shard.sessions) > self._shard_cap:
+                shard.sessions.popitem(last=False)
+                evicted += 1
+        if created or evicted:
+            with self._counter_lock:
+                self.created += created
+                self.evicted += evicted
+                self.expired += expired
+        return session, created
+
+    def seen(self, code):
+        """Marks an existing session as active; unknown codes are ignored rather than registered."""
+        shard = self._shard(code)
+        now = time.time()
+        with shard.lock:
+            session = shard.sessions.get(code)
+            if session is not None and now - session.last_seen > self.idle_ttl:
+                session = None  # Left for the sweeper, which counts it as expired
+            if session is not None:
+                session.last_seen = now
+                session.requests += 1
+                shard.sessions.move_to_end(code)
+        return session
+
+    def get(self, code):
+        shard = self._shard(code)
+        with shard.lock:
+            session = shard.sessions.get(code)
+        if session is not None and time.time() - session.last_seen > self.idle_ttl:
+            return None
+        return session
+
+    def remove(self, code):
+        shard = self._shard(code)
+        with shard.lock:
+            return shard.sessions.pop(code, None) is not None
+
+    def __contains__(self, code):
+        return self.get(code) is not None
+
+    def __len__(self):
+        return sum(len(shard.sessions) for shard in self._shards)
+
+    def sweep(self):
+        """Drops sessions idle for longer than idle_ttl; returns how many."""
+        cutoff = time.time() - self.idle_ttl
+        dropped = 0
+        for shard in self._shards:
+            with shard.lock:
+                # Shards are ordered by last_seen, so expired sessions are all at the front
+                while shard.sessions:
+                    code, session = next(iter(shard.sessions.items()))
+                    if session.last_seen > cutoff:
+                        break
+                    del shard.sessions[code]
+                    dropped += 1
+        with self._counter_lock:
+            self.expired += dropped
+        return dropped
+
+    def resume(self, path):
+        """Loads sessions from a snapshot written by a previous run and keeps snapshotting to the same file."""
+        self.snapshot_path = path
+        try:
+            with open(path, encoding="utf-8") as handle:
+                records = json.load(handle)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            return 0  # A torn or foreign file is not worth refusing to start over
+        cutoff = time.time() - self.idle_ttl
+        before = len(self)
+        # Oldest first, so when a shard is over its cap the sessions dropped are the least recently seen
+        for code, created_at, last_seen, requests in sorted(records, key=lambda record: record[2]):
+            if last_seen > cutoff:
+                shard = self._shard(code)
+                with shard.lock:
+                    shard.sessions[code] = Session(code, created_at, last_seen, requests)
+                    shard.sessions.move_to_end(code)
+                    if len(shard.sessions) > self._shard_cap:
+                        shard.sessions.popitem(last=False)
+        resumed = len(self) - before
+        with self._counter_lock:
+            self.resumed += resumed
+        return resumed
+
+    def snapshot(self):
+        """Writes live sessions to the snapshot file atomically; returns how many were written."""
+        if not self.snapshot_path:
+            return 0
+        records = []
+        for shard in self._shards:
+            with shard.lock:
+                records.extend([session.code, session.created_at, session.last_seen, session.requests]
+                               for session in shard.sessions.values())
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(records, handle, separators=(",", ":"))
+        os.replace(temporary, self.snapshot_path)  # Readers see the old snapshot or the new one, never half
+        self._last_snapshot = time.monotonic()
+        return len(records)
+
+    def stats(self):
+        with self._counter_lock:
+            return {"live": len(self), "created": self.created, "evicted": self.evicted,
+                    "expired": self.expired, "resumed": self.resumed}
+
+    def stop(self):
+        """Stops the sweeper and writes a final snapshot."""
+        self._stopped.set()
+        self.snapshot()
+
+    def _shard(self, code):
+        return self._shards[crc32(str(code).encode()) % len(self._shards)]
+
+    def _sweep_loop(self):
+        interval = min(self.sweep_interval, self.snapshot_interval)
+        next_sweep = time.monotonic() + self.sweep_interval
+        while not self._stopped.wait(interval):
+            if time.monotonic() >= next_sweep:
+                self.sweep()
+                next_sweep = time.monotonic() + self.sweep_interval
+            if self.snapshot_path and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+                try:
+                    self.snapshot()
+                except OSError:
+                    pass  # Disk trouble must not kill the sweeper; the next interval retries
@@ -0,0 +1,130 @@
+# Slot booking: seats are taken and released atomically in the exam store, while each process keeps a
+# sorted index of the slots that still have room so "next N free slots" is a bisect and a slice
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from exam_store import DEFAULT_SLOT_CAPACITY, SLOT_BOOKED, SLOT_FULL
+
+SLOT_FORMAT = "%Y-%m-%d %H:%M:%S"  # Sorts chronologically as a string
+
+
+class ExamSlots:
+    """Availability index for one exam: every slot in time order plus the ones with a free seat."""
+    __slots__ = ("times", "capacity", "booked", "free", "version", "loaded_at", "lock")
+
+    def __init__(self, rows, version):
+        self.times = [slot_time for slot_time, _, _ in rows]
+        self.capacity = {slot_time: capacity for slot_time, capacity, _ in rows}
+        self.booked = {slot_time: booked for slot_time, _, booked in rows}
+        self.free = [slot_time for slot_time, capacity, booked in rows if booked < capacity]
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def seat_taken(self, slot_time):
+        self.booked[slot_time] += 1
+        self._update_free(slot_time)
+
+    def seat_released(self, slot_time):
+        self.booked[slot_time] = max(0, self.booked[slot_time] - 1)
+        self._update_free(slot_time)
+
+    def mark_full(self, slot_time):
+        # Another process filled it and the store refused the booking
+        self.booked[slot_time] = self.capacity[slot_time]
+        self._update_free(slot_time)
+
+    def _update_free(self, slot_time):
+        # Idempotent, so counts that drifted from other processes' bookings cannot corrupt the list
+        i = bisect_left(self.free, slot_time)
+        listed = i < len(self.free) and self.free[i] == slot_time
+        has_room = self.booked[slot_time] < self.capacity[slot_time]
+        if has_room and not listed:
+            self.free.insert(i, slot_time)
+        elif listed and not has_room:
+            del self.free[i]
+
+
+class SlotBookingService:
+    def __init__(self, store, default_capacity=DEFAULT_SLOT_CAPACITY, refresh_interval=2.0):
+        self.store = store                        # Exam store holding slots, capacities and bookings
+        self.default_capacity = default_capacity  # Seats per slot created without an explicit capacity
+        self.refresh_interval = refresh_interval  # Seconds before an index is checked against other processes
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def create_slots(self, exam_id, slot_times, capacity=None):
+        self.store.add_slots(exam_id, slot_times, capacity or self.default_capacity)
+        self._drop(exam_id)
+
+    def ensure_default_slots(self, exam_id, days=7, hour=9, capacity=None):
+        """Gives an exam one slot a day for the next `days` days if it has none."""
+        index = self._index(exam_id)
+        if index.times:
+            return
+        start = datetime.now().replace(hour=hour, minute=0, second=0, microsecond=0)
+        self.create_slots(exam_id, [(start + timedelta(days=i)).strftime(SLOT_FORMAT) for i in range(days)], capacity)
+
+    def next_free(self, exam_id, count=5, after=None):
+        """The first `count` slots with a free seat after `after` (a SLOT_FORMAT string): [(slot_time, seats left)]."""
+        index = self._index(exam_id)
+        with index.lock:
+            start = bisect_right(index.free, after) if after else 0
+            return [(slot_time, index.capacity[slot_time] - index.booked[slot_time])
+                    for slot_time in index.free[start:start + count]]
+
+    def free_count(self, exam_id):
+        index = self._index(exam_id)
+        with index.lock:
+            return len(index.free)
+
+    def book(self, exam_id, slot_time, username):
+        """Books or moves username's seat; returns exam_store's SLOT_BOOKED, SLOT_FULL or SLOT_NOT_FOUND."""
+        index = self._index(exam_id)
+        with index.lock:
+            # Holding the index lock across the store write keeps the index in step within this process
+            status, previous = self.store.book_slot(exam_id, slot_time, username)
+            if status == SLOT_BOOKED and previous != slot_time:
+                if previous in index.booked:
+                    index.seat_released(previous)
+                if slot_time in index.booked:
+                    index.seat_taken(slot_time)
+            elif status == SLOT_FULL and slot_time in index.capacity:
+                index.mark_full(slot_time)
+            return status
+
+    def cancel(self, exam_id, username):
+        """Frees username's seat; returns the slot it was in, or None."""
+        index = self._index(exam_id)
+        with index.lock:
+            released = self.store.cancel_booking(exam_id, username)
+            if released is not None and released in index.booked:
+                index.seat_released(released)
+            return released
+
+    def booking(self, exam_id, username):
+        return self.store.get_booking(exam_id, username)
+
+    def _index(self, exam_id):
+        with self._lock:
+            index = self._indexes.get(exam_id)
+        if index is not None and time.monotonic() - index.loaded_at < self.refresh_interval:
+            return index
+        version = self.store.version("slots")
+        if index is not None and index.version == version:
+            index.loaded_at = time.monotonic()
+            return index
+        if index is None:
+            index = ExamSlots(self.store.get_slot_table(exam_id), version)
+        else:
+            with index.lock:  # Bookings in flight on the old index land in the store before it is reread
+                index = ExamSlots(self.store.get_slot_table(exam_id), version)
+        with self._lock:
+            self._indexes[exam_id] = index
+        return index
+
+    def _drop(self, exam_id):
+        with self._lock:
+            self._indexes.pop(exam_id, None)
@@ -0,0 +1,57 @@
+# Startup layer for the Streamlit pages: config.yml is parsed and its passwords hashed once per process and
+# re-read only when the file changes, so building the authenticator on each rerun is cheap.
+# yaml and streamlit_authenticator are imported on first use, so a rerun that hits the caches imports nothing.
+import copy
+import os
+
+import streamlit as st
+
+CONFIG_PATH = "config.yml"
+
+
+def load_config(path=CONFIG_PATH):
+    """Returns (config, version): the parsed config, shared by every session, and the file version it came from."""
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)  # One stat per rerun is all an unchanged file costs
+    return _parse_config(path, version), version
+
+
+@st.cache_resource(max_entries=1)  # A new version evicts the old one
+def _parse_config(path, version):
+    import yaml
+
+    with open(path) as file:
+        config = yaml.load(file, Loader=yaml.SafeLoader)
+    _hash_passwords(config["credentials"])
+    return config
+
+
+def _hash_passwords(credentials):
+    # Authenticate hashes plain-text passwords in the credentials it is given (bcrypt, deliberately slow),
+    # so doing it here once means the authenticators built from this config find nothing left to hash
+    import streamlit_authenticator as stauth
+
+    hash_passwords = getattr(stauth.Hasher, "hash_passwords", None)
+    if hash_passwords is not None:  # Older releases expect config.yml to hold hashes already
+        hash_passwords(credentials)
+
+
+def get_authenticator(path=CONFIG_PATH):
+    """Builds this run's authenticator from the cached, already hashed config.
+
+    Built on every run: its cookie manager is a component that has to be drawn each run, or the
+    remember-me cookie it reports on a later run is never read. Building one costs no hashing.
+    """
+    config, version = load_config(path)
+    cached = st.session_state.get("_credentials")
+    if cached is None or cached[0] != version:
+        # Per session, not shared: the authenticator records logins and failed attempts in its credentials
+        cached = st.session_state["_credentials"] = (version, copy.deepcopy(config["credentials"]))
+    import streamlit_authenticator as stauth
+
+    return stauth.Authenticate(
+        cached[1],
+        config["cookie"]["name"],
+        config["cookie"]["key"],
+        config["cookie"]["expiry_days"]
+    )
@@ -0,0 +1,53 @@
+# Structured, non-blocking logging: handlers only enqueue records and a single listener thread formats
+# and writes them, so request threads never contend for stdout. Records are one logfmt line each.
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is logged as a field
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class LogfmtFormatter(logging.Formatter):
+    """Formats a record as `ts=... level=... logger=... msg="..." key=value ...`."""
+
+    def format(self, record):
+        fields = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields.update((key, value) for key, value in vars(record).items() if key not in _STANDARD_ATTRS)
+        line = " ".join(f"{key}={_quote(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += " exc=" + _quote(self.formatException(record.exc_info))
+        return line
+
+
+def _quote(value):
+    text = str(value)
+    if text and not any(c in text for c in ' "=\n'):
+        return text
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def setup_logging(level=logging.INFO, stream=None):
+    """Routes the root logger through a queue to a background listener; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return _listener
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(LogfmtFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(records)]
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # Drains the queue so the last records are not lost
+    return _listener
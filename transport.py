@@ -0,0 +1,206 @@
+# Compact RPC transport: JSON (or msgpack when installed) over persistent HTTP/1.1 connections,
+# negotiated per client with XML-RPC kept as the fallback
+import datetime
+import decimal
+import http.client
+import json
+import threading
+import xmlrpc.client
+from urllib.parse import urlsplit
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; JSON is always available
+    msgpack = None
+
+COMPACT_PATH = "/compact"
+XMLRPC = "xmlrpc"
+
+
+def _to_plain(value):
+    """Converts the MySQL column types json/msgpack cannot encode natively."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class JSONCodec:
+    name = "json"
+    content_type = "application/json"
+
+    @staticmethod
+    def dumps(payload):
+        return json.dumps(payload, default=_to_plain, separators=(",", ":")).encode()
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    @staticmethod
+    def dumps(payload):
+        return msgpack.packb(payload, default=_to_plain, use_bin_type=True)
+
+    @staticmethod
+    def loads(data):
+        return msgpack.unpackb(data, raw=False)
+
+
+# Codecs in server preference order
+CODECS = {codec.name: codec for codec in ([MsgpackCodec] if msgpack else []) + [JSONCodec]}
+CODECS_BY_CONTENT_TYPE = {codec.content_type: codec for codec in CODECS.values()}
+
+
+def negotiate_transport(client_codecs):
+    """Returns the first codec in the client's preference list that the server supports, else "xmlrpc"."""
+    for name in client_codecs:
+        if name in CODECS:
+            return name
+    return XMLRPC
+
+
+def codec_for(content_type):
+    """The codec a compact request was sent with; JSON when the content type is missing or unknown."""
+    return CODECS_BY_CONTENT_TYPE.get(content_type.split(";")[0].strip(), JSONCodec)
+
+
+def compact_reply(codec, result=None, error=None):
+    """Encodes a compact response carrying result, or error as a fault; returns (content_type, body)."""
+    if error is None:
+        reply = {"result": result}
+    elif isinstance(error, xmlrpc.client.Fault):
+        reply = {"error": {"code": error.faultCode, "message": error.faultString}}
+    else:
+        reply = {"error": {"code": 1, "message": f"{type(error).__name__}:{error}"}}
+    return codec.content_type, codec.dumps(reply)
+
+
+def dispatch_compact(dispatch, content_type, body):
+    """Decodes a compact request, calls dispatch(method, params) and returns (content_type, response body)."""
+    codec = codec_for(content_type)
+    try:
+        request = codec.loads(body)
+        result = dispatch(request["method"], tuple(request.get("params", ())))
+    except Exception as error:
+        return compact_reply(codec, error=error)
+    return compact_reply(codec, result)
+
+
+class CompactRequestHandler(SimpleXMLRPCRequestHandler):
+    """XML-RPC request handler that also serves compact requests and keeps connections alive."""
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ("/", "/RPC2", COMPACT_PATH)
+    timeout = 15  # Seconds an idle keep-alive connection holds its server thread
+
+    def do_POST(self):
+        if self.path != COMPACT_PATH:
+            return super().do_POST()
+        length = int(self.headers.get("content-length", 0))
+        body = self.rfile.read(length)
+        content_type, response = dispatch_compact(self.server._dispatch, self.headers.get("content-type", ""), body)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+class CompactServerProxy:
+    """Drop-in replacement for xmlrpc.client.ServerProxy using a compact codec over one kept-alive connection."""
+
+    def __init__(self, url, codec="json", timeout=30):
+        parts = urlsplit(url)
+        self.url = url
+        self.codec = CODECS[codec]
+        self._host = parts.hostname
+        self._port = parts.port or 80
+        self._timeout = timeout
+        self._connection = None
+        self._lock = threading.Lock()  # One request at a time on the shared connection
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return lambda *params: self._call(method, params)
+
+    def _call(self, method, params):
+        body = self.codec.dumps({"method": method, "params": list(params)})
+        with self._lock:
+            reused = self._connection is not None
+            try:
+                self._send(body)
+            except (http.client.HTTPException, ConnectionError):
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection before the request reached it; resend once
+                self.close()
+                self._send(body)
+            try:
+                response = self._receive()
+            except Exception:
+                # Never resent from here: the server may already have run the call
+                self.close()
+                raise
+        reply = self.codec.loads(response)
+        if "error" in reply:
+            raise xmlrpc.client.Fault(reply["error"]["code"], reply["error"]["message"])
+        return reply["result"]
+
+    def _send(self, body):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+        try:
+            self._connection.request("POST", COMPACT_PATH, body, {"Content-Type": self.codec.content_type})
+        except Exception:
+            self.close()
+            raise
+
+    def _receive(self):
+        response = self._connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(self.url, response.status, response.reason, dict(response.getheaders()))
+        return data
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class TimeoutTransport(xmlrpc.client.Transport):
+    """XML-RPC transport whose keep-alive connection gives up after `timeout` seconds."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+def connect(url, preferred=("msgpack", "json"), timeout=30):
+    """Returns a proxy for url using the best transport both sides support, falling back to XML-RPC."""
+    offered = [name for name in preferred if name in CODECS]
+    proxy = xmlrpc.client.ServerProxy(url, transport=TimeoutTransport(timeout), allow_none=True)
+    try:
+        codec = proxy.negotiate_transport(offered)
+    except xmlrpc.client.Fault:
+        return proxy  # Older servers without negotiation speak XML-RPC only
+    if codec == XMLRPC:
+        return proxy
+    return CompactServerProxy(url, codec, timeout)